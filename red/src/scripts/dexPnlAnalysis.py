@@ -13,19 +13,66 @@ Supports full JSON and .ndjson transaction streams.
 from __future__ import annotations
 
 import argparse
+import csv
+import heapq
 import json
 import math
 import os
+import re
+import shutil
+import sqlite3
+import struct
 import sys
+import tempfile
 import time
 import urllib.parse
 import urllib.request
+import zlib
+from array import array
 from collections import Counter, defaultdict
 from pathlib import Path
-from typing import Dict, Iterable, List, Optional, Tuple
+from typing import Callable, Dict, Iterable, List, Optional, Tuple, Union
 
 import ijson
 
+try:
+    sys.path.insert(0, str(Path(__file__).resolve().parents[3] / "src" / "validator"))
+    from stage_profile import StageProfiler, add_profile_args
+except (ImportError, IndexError):  # outside the monorepo: run without --profile / --mem-report
+    from contextlib import nullcontext
+
+    class _NullStage:
+        def add(self, records_in: int = 0, records_out: int = 0, bytes_in: int = 0) -> None:
+            pass
+
+    class StageProfiler:  # type: ignore[no-redef]
+        """No-op stand-in for stage_profile.StageProfiler."""
+
+        def __init__(self, *args, **kwargs) -> None:
+            pass
+
+        @classmethod
+        def from_args(cls, args: argparse.Namespace, script: str) -> "StageProfiler":
+            return cls(script)
+
+        def stage(self, name: str):
+            return nullcontext(_NullStage())
+
+        def mem_scope(self, name: str):
+            return nullcontext()
+
+        def iter(self, name: str, iterable: Iterable) -> Iterable:
+            return iterable
+
+        def add(self, name: str, records_in: int = 0, records_out: int = 0, bytes_in: int = 0) -> None:
+            pass
+
+        def track(self, name: str, obj: object) -> None:
+            pass
+
+    def add_profile_args(parser: argparse.ArgumentParser) -> None:
+        pass
+
 USDC_MINT = "EPjFWdd5AufqSSqeM2qN1xzybapC8G4wEGGkZwyTDt1v"
 USDT_MINT = "Es9vMFrzaCERmJfrF4H2FYD4KCoNkY11McCe8BenwNYB"
 WSOL_MINT = "So11111111111111111111111111111111111111112"
@@ -74,26 +121,188 @@ def parse_args() -> argparse.Namespace:
     parser.add_argument("--price-vs", default=USDC_MINT, help="Price vs token mint (default USDC)")
     parser.add_argument("--helius-key", default="", help="Helius API key (optional)")
     parser.add_argument("--helius-config", default="", help="Config JSON that may contain heliusApiKey or rpcUrl")
+    parser.add_argument("--wallet-mem-mb", type=int, default=0, help="Spill wallet stats to disk above this budget (0 = in-memory)")
+    parser.add_argument("--spill-dir", default="", help="Directory for wallet spill partitions (default: temp dir)")
+    parser.add_argument("--spill-partitions", type=int, default=64, help="Number of hash partitions for spilled wallet stats")
+    parser.add_argument("--heavy-hitters", type=int, default=0, help="Track top pools/flows with K Space-Saving counters (0 = exact) and report only those guaranteed above N/K; wallets stay exact, bound them with --wallet-mem-mb")
+    parser.add_argument("--json-parser", choices=["auto", "fast", "ijson"], default="auto", help="Parser for full-JSON inputs (auto = fast)")
+    parser.add_argument("--export-db", default="", help="Export normalized tx tables to this SQLite file (replaced if it exists) and exit")
+    parser.add_argument("--export-batch", type=int, default=50000, help="Rows per executemany batch for --export-db")
+    parser.add_argument("--bucket-seconds", type=int, default=0, help="Also emit per-time-bucket series (0 = off)")
+    parser.add_argument("--series-out", default="", help="Series output path (.csv or .parquet)")
+    parser.add_argument("--series-lag", type=int, default=2, help="Open buckets kept behind the newest before flushing")
+    add_profile_args(parser)
     return parser.parse_args()
 
 
+JSON_PARSER = "auto"
+
+PARSE_STATS = {"backend": None, "passes": 0, "bytes": 0, "seconds": 0.0}
+
+# Replaced in main() when --profile is given; disabled it passes iterables through
+PROFILER = StageProfiler("dexPnlAnalysis")
+
+_JSON_WS = re.compile(r"[ \t\n\r]*")
+# A number is only known to be complete once one of these follows it
+_JSON_NUMBER_END = frozenset(" \t\n\r,]}")
+# Decode errors this close to the buffer end may be a chunk cut (e.g. a split \uXXXX escape)
+_JSON_CUT_SLACK = 6
+
+
+def select_ijson_backend() -> Tuple[object, str]:
+    """Prefer the yajl2 C backend; fall back to whatever ijson picked."""
+    for name in ("yajl2_c", "yajl2_cffi", "yajl2"):
+        try:
+            return ijson.get_backend(name), name
+        except Exception:
+            continue
+    return ijson, str(getattr(ijson, "backend", "python"))
+
+
+def iter_json_array_fast(path: Path, key: str = "transactions", chunk_size: int = 1 << 22) -> Iterable[Dict]:
+    """
+    Stream elements of a top-level array member using the C-accelerated
+    json.JSONDecoder.raw_decode on a sliding text buffer. Each element is
+    decoded directly from its span; other top-level members are decoded
+    and discarded. Buffers grow geometrically when an element straddles a
+    chunk boundary, so large elements are not re-scanned quadratically.
+    """
+    decoder = json.JSONDecoder()
+    with path.open("r", encoding="utf-8") as f:
+        buf = ""
+        pos = 0
+        eof = False
+        read_size = chunk_size
+
+        def fill() -> bool:
+            nonlocal buf, pos, eof
+            chunk = f.read(read_size)
+            if not chunk:
+                eof = True
+                return False
+            buf = buf[pos:] + chunk
+            pos = 0
+            return True
+
+        def skip_ws() -> None:
+            nonlocal pos
+            while True:
+                pos = _JSON_WS.match(buf, pos).end()
+                if pos < len(buf) or not fill():
+                    return
+
+        def peek() -> str:
+            skip_ws()
+            return buf[pos] if pos < len(buf) else ""
+
+        def expect(ch: str) -> None:
+            nonlocal pos
+            if peek() != ch:
+                raise ValueError(f"expected {ch!r} at offset {pos} in {path}")
+            pos += 1
+
+        def decode() -> object:
+            nonlocal pos, read_size
+            skip_ws()
+            while True:
+                try:
+                    obj, end = decoder.raw_decode(buf, pos)
+                except json.JSONDecodeError as e:
+                    # Only an error at the buffer edge can be a chunk cut; anything else is malformed
+                    cut = e.msg.startswith("Unterminated string") or e.pos >= len(buf) - _JSON_CUT_SLACK
+                    if not cut or not fill():
+                        raise
+                    read_size = min(read_size * 2, 1 << 28)
+                    continue
+                if not eof and (
+                    end == len(buf)
+                    or (isinstance(obj, (int, float)) and buf[end] not in _JSON_NUMBER_END)
+                ):
+                    # A scalar cut at the chunk edge ("1." / "1e" / "12") decodes as a shorter
+                    # value; retry with more data
+                    if fill():
+                        continue
+                read_size = chunk_size
+                pos = end
+                return obj
+
+        expect("{")
+        while True:
+            ch = peek()
+            if ch in ("}", ""):
+                return
+            if ch == ",":
+                pos += 1
+            name = decode()
+            expect(":")
+            if name != key:
+                decode()
+                continue
+            expect("[")
+            while True:
+                ch = peek()
+                if ch in ("]", ""):
+                    return
+                if ch == ",":
+                    pos += 1
+                yield decode()
+
+
+def _timed(items: Iterable[Dict]) -> Iterable[Dict]:
+    """Accumulate time spent producing items (not consuming them) into PARSE_STATS."""
+    t0 = time.perf_counter()
+    for item in items:
+        PARSE_STATS["seconds"] += time.perf_counter() - t0
+        yield item
+        t0 = time.perf_counter()
+    PARSE_STATS["seconds"] += time.perf_counter() - t0
+
+
+def _iter_ndjson(path: Path) -> Iterable[Dict]:
+    with path.open("r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line)
+            except Exception:
+                continue
+
+
+def _iter_ijson(path: Path) -> Iterable[Dict]:
+    backend, _ = select_ijson_backend()
+    with path.open("rb") as f:
+        for tx in backend.items(f, "transactions.item"):
+            yield tx
+
+
 def iter_transactions(input_path: str) -> Iterable[Dict]:
     path = Path(input_path)
     lower = path.name.lower()
     if lower.endswith(".ndjson"):
-        with path.open("r", encoding="utf-8") as f:
-            for line in f:
-                line = line.strip()
-                if not line:
-                    continue
-                try:
-                    yield json.loads(line)
-                except Exception:
-                    continue
+        backend, items = "ndjson", _iter_ndjson(path)
+    elif JSON_PARSER == "ijson":
+        backend, items = f"ijson:{select_ijson_backend()[1]}", _iter_ijson(path)
     else:
-        with path.open("rb") as f:
-            for tx in ijson.items(f, "transactions.item"):
-                yield tx
+        backend, items = "fast-raw-decode", iter_json_array_fast(path)
+    PARSE_STATS["backend"] = backend
+    PARSE_STATS["passes"] += 1
+    PARSE_STATS["bytes"] += path.stat().st_size
+    PROFILER.add("parse", bytes_in=path.stat().st_size)
+    yield from PROFILER.iter("parse", _timed(items))
+
+
+def parse_report() -> Dict[str, object]:
+    seconds = PARSE_STATS["seconds"]
+    mb = PARSE_STATS["bytes"] / (1024 * 1024)
+    return {
+        "backend": PARSE_STATS["backend"],
+        "passes": PARSE_STATS["passes"],
+        "mb": round(mb, 3),
+        "seconds": round(seconds, 3),
+        "mb_per_s": round(mb / seconds, 3) if seconds > 0 else None,
+    }
 
 
 def quantile_from_hist(hist: Counter, q: float) -> Optional[int]:
@@ -294,67 +503,457 @@ def pct(n: int, d: int) -> float:
     return (n / d) if d else 0.0
 
 
-def compute_wallet_metrics(input_path: str) -> Tuple[Dict[str, Dict], Counter]:
-    wallet_stats: Dict[str, Dict] = {}
-    wallet_counts: Counter = Counter()
+class SpaceSaving:
+    """
+    Space-Saving heavy-hitter summary (Metwally et al.) with optional per-key payload.
+
+    With capacity k over a stream of total weight N, every key whose true
+    count exceeds N/k is tracked, and each tracked estimate over-counts by at
+    most its recorded error (itself <= N/k). Payload accumulators start at
+    zero when a key (re)enters, so they cover exactly count - error events;
+    guaranteed() keys are those whose count - error alone exceeds N/k.
+    capacity <= 0 keeps every key (exact mode, error always 0).
+    """
+
+    def __init__(self, capacity: int = 0, payload: Optional[Callable[[], Dict]] = None) -> None:
+        self.capacity = capacity
+        self.payload = payload
+        self.total = 0
+        self.evictions = 0
+        # key -> [estimate, error, payload]
+        self.entries: Dict[str, list] = {}
+        # (estimate-at-push, key); at most one per tracked key, refreshed lazily.
+        self._heap: List[Tuple[int, str]] = []
+
+    def add(self, key: str, weight: int = 1) -> Optional[Dict]:
+        self.total += weight
+        entry = self.entries.get(key)
+        if entry is None:
+            floor = 0
+            if self.capacity > 0 and len(self.entries) >= self.capacity:
+                floor = self._evict_min()
+            entry = [floor, floor, self.payload() if self.payload else None]
+            self.entries[key] = entry
+            if self.capacity > 0:
+                heapq.heappush(self._heap, (floor, key))
+        entry[0] += weight
+        return entry[2]
+
+    def _evict_min(self) -> int:
+        heap = self._heap
+        while True:
+            count, key = heapq.heappop(heap)
+            current = self.entries[key][0]
+            if current != count:
+                heapq.heappush(heap, (current, key))
+                continue
+            del self.entries[key]
+            self.evictions += 1
+            return count
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.entries
+
+    def items(self) -> Iterable[Tuple[str, Optional[Dict]]]:
+        for key, entry in self.entries.items():
+            yield key, entry[2]
+
+    def estimate(self, key: str) -> int:
+        entry = self.entries.get(key)
+        return entry[0] if entry else 0
+
+    def error(self, key: str) -> int:
+        entry = self.entries.get(key)
+        return entry[1] if entry else 0
+
+    def error_bound(self) -> int:
+        return self.total // self.capacity if self.capacity > 0 else 0
+
+    def guaranteed(self, key: str) -> bool:
+        entry = self.entries.get(key)
+        if entry is None:
+            return False
+        return self.capacity <= 0 or entry[0] - entry[1] > self.error_bound()
+
+    def most_common(self, n: int) -> List[Tuple[str, int]]:
+        ranked = heapq.nlargest(n, self.entries.items(), key=lambda kv: kv[1][0])
+        return [(key, entry[0]) for key, entry in ranked]
+
+    def describe(self) -> Dict[str, int]:
+        return {
+            "capacity": self.capacity,
+            "tracked": len(self.entries),
+            "total": self.total,
+            "evictions": self.evictions,
+            "error_bound": self.error_bound(),
+            "guaranteed": sum(1 for key in self.entries if self.guaranteed(key)),
+        }
 
-    for tx in iter_transactions(input_path):
-        fee_payer = tx.get("feePayer")
-        if not fee_payer:
-            continue
 
-        wallet_counts[fee_payer] += 1
-
-        m = wallet_stats.get(fee_payer)
-        if m is None:
-            m = {
-                "tx": 0,
-                "exec": 0,
-                "fail": 0,
-                "agg_tx": 0,
-                "dex_tx": 0,
-                "tip_sum": 0,
-                "sol_delta": 0,
-                "wsol_delta": 0,
-                "usdc_delta": 0,
-                "usdt_delta": 0,
-            }
-            wallet_stats[fee_payer] = m
-
-        m["tx"] += 1
-        if tx.get("executed"):
-            m["exec"] += 1
-        else:
-            m["fail"] += 1
+WALLET_FIELDS = (
+    "tx",
+    "exec",
+    "fail",
+    "agg_tx",
+    "dex_tx",
+    "tip_sum",
+    "sol_delta",
+    "wsol_delta",
+    "usdc_delta",
+    "usdt_delta",
+)
+
+# Fixed-width spill record: base58 pubkey (<= 44 chars) + one i64 per field.
+WALLET_RECORD = struct.Struct("<44s" + "q" * len(WALLET_FIELDS))
+
+# Rough in-memory cost of one wallet_stats entry (key str + 10-key dict + slot).
+WALLET_ENTRY_BYTES = 1024
+
+
+def new_wallet_entry() -> Dict[str, int]:
+    return {field: 0 for field in WALLET_FIELDS}
+
+
+def rank_wallets(counts: Iterable[Tuple[str, int]], n: int) -> List[Tuple[str, int]]:
+    """Top n (wallet, tx) pairs; ties break on the wallet key so every mode picks the same wallets."""
+    return heapq.nsmallest(n, counts, key=lambda kv: (-kv[1], kv[0]))
+
+
+class SpilledWalletStats:
+    """
+    Wallet stats stored as fixed-width records in hash-partitioned files.
+
+    Partial aggregates are appended whenever the in-memory budget is hit;
+    each partition is merged on read, so only 1/N of the wallets is ever
+    resident. Exposes the read-only mapping surface the analysis code uses.
+    """
+
+    def __init__(self, spill_dir: str, partitions: int) -> None:
+        self.partitions = max(1, partitions)
+        self._owns_dir = not spill_dir
+        self.dir = Path(spill_dir or tempfile.mkdtemp(prefix="wallet_spill_"))
+        self.dir.mkdir(parents=True, exist_ok=True)
+        self._paths = [self.dir / f"wallets_{i:04d}.bin" for i in range(self.partitions)]
+        for p in self._paths:
+            p.write_bytes(b"")
+        self._len: Optional[int] = None
+        self.flushes = 0
+
+    def partition_of(self, wallet: str) -> int:
+        return zlib.crc32(wallet.encode("utf-8")) % self.partitions
+
+    def spill(self, wallet_stats: Dict[str, Dict]) -> None:
+        buffers: List[List[bytes]] = [[] for _ in range(self.partitions)]
+        for wallet, m in wallet_stats.items():
+            key = wallet.encode("utf-8")
+            if len(key) > 44:
+                raise ValueError(f"fee payer too long for spill record: {wallet}")
+            buffers[self.partition_of(wallet)].append(
+                WALLET_RECORD.pack(key, *(m[f] for f in WALLET_FIELDS))
+            )
+        for path, records in zip(self._paths, buffers):
+            if records:
+                with path.open("ab") as f:
+                    f.write(b"".join(records))
+        self._len = None
+        self.flushes += 1
+
+    def _load_partition(self, idx: int) -> Dict[str, Dict]:
+        merged: Dict[str, Dict] = {}
+        data = self._paths[idx].read_bytes()
+        for rec in WALLET_RECORD.iter_unpack(data):
+            wallet = rec[0].rstrip(b"\0").decode("utf-8")
+            m = merged.get(wallet)
+            if m is None:
+                merged[wallet] = dict(zip(WALLET_FIELDS, rec[1:]))
+                continue
+            for field, value in zip(WALLET_FIELDS, rec[1:]):
+                m[field] += value
+        return merged
+
+    def items(self) -> Iterable[Tuple[str, Dict]]:
+        for idx in range(self.partitions):
+            yield from self._load_partition(idx).items()
+
+    def __len__(self) -> int:
+        if self._len is None:
+            self._len = sum(len(self._load_partition(i)) for i in range(self.partitions))
+        return self._len
+
+    def __getitem__(self, wallet: str) -> Dict:
+        return self._load_partition(self.partition_of(wallet))[wallet]
+
+    def select(self, wallets: List[str]) -> Dict[str, Dict]:
+        by_partition: Dict[int, List[str]] = defaultdict(list)
+        for w in wallets:
+            by_partition[self.partition_of(w)].append(w)
+        out: Dict[str, Dict] = {}
+        for idx, members in by_partition.items():
+            merged = self._load_partition(idx)
+            for w in members:
+                if w in merged:
+                    out[w] = merged[w]
+        return out
+
+    def most_common(self, n: int) -> List[Tuple[str, int]]:
+        return rank_wallets(((w, m["tx"]) for w, m in self.items()), n)
+
+    def close(self) -> None:
+        if self._owns_dir:
+            shutil.rmtree(self.dir, ignore_errors=True)
+
+
+EXPORT_SCHEMA = """
+CREATE TABLE IF NOT EXISTS tx (
+    signature TEXT NOT NULL,
+    slot INTEGER,
+    block_time INTEGER,
+    index_in_slot INTEGER,
+    fee_payer TEXT,
+    executed INTEGER,
+    error_label TEXT,
+    jito_tip INTEGER,
+    compute_units INTEGER,
+    total_fee INTEGER,
+    fee_payer_sol_change INTEGER,
+    capture_latency_ms INTEGER,
+    instruction_count INTEGER,
+    inner_instruction_count INTEGER,
+    program_flow TEXT
+);
+CREATE TABLE IF NOT EXISTS token_changes (
+    signature TEXT NOT NULL,
+    owner TEXT,
+    mint TEXT,
+    delta_amount INTEGER,
+    decimals INTEGER
+);
+CREATE TABLE IF NOT EXISTS programs_invoked (
+    signature TEXT NOT NULL,
+    program TEXT NOT NULL,
+    kind TEXT
+);
+CREATE TABLE IF NOT EXISTS pools_targeted (
+    signature TEXT NOT NULL,
+    pool TEXT NOT NULL
+);
+"""
+
+EXPORT_INDEXES = """
+CREATE INDEX IF NOT EXISTS idx_tx_signature ON tx(signature);
+CREATE INDEX IF NOT EXISTS idx_tx_fee_payer_slot ON tx(fee_payer, slot);
+CREATE INDEX IF NOT EXISTS idx_tx_slot ON tx(slot);
+CREATE INDEX IF NOT EXISTS idx_token_changes_signature ON token_changes(signature);
+CREATE INDEX IF NOT EXISTS idx_token_changes_owner_mint ON token_changes(owner, mint);
+CREATE INDEX IF NOT EXISTS idx_programs_invoked_program ON programs_invoked(program, signature);
+CREATE INDEX IF NOT EXISTS idx_pools_targeted_pool ON pools_targeted(pool, signature);
+CREATE INDEX IF NOT EXISTS idx_pools_targeted_signature ON pools_targeted(signature);
+"""
 
-        if tx.get("aggregatorProgramsInvoked"):
-            m["agg_tx"] += 1
-        if tx.get("dexProgramsInvoked"):
-            m["dex_tx"] += 1
 
-        m["tip_sum"] += int(tx.get("jitoTipAmount") or 0)
-        m["sol_delta"] += int(tx.get("feePayerSolChange") or 0)
+def sql_int(value: object) -> Optional[object]:
+    """Coerce to an int that fits SQLite INTEGER; out-of-range values are kept as text."""
+    if value is None or value == "":
+        return None
+    try:
+        n = int(value)
+    except (TypeError, ValueError):
+        return None
+    if -(1 << 63) <= n < (1 << 63):
+        return n
+    return str(n)
+
+
+def export_transactions(input_path: str, db_path: str, batch_size: int = 50000) -> Dict[str, int]:
+    """
+    Flatten transactions into tx / token_changes / programs_invoked /
+    pools_targeted tables. Rows are buffered and written with executemany,
+    one transaction per batch; indexes are built once after the load.
+
+    The export is built in a sibling .partial file and renamed over db_path
+    only once it completes, so re-exporting replaces the previous tables
+    instead of appending to them and a failed run leaves no half-written DB.
+    """
+    partial_path = db_path + ".partial"
+    if os.path.exists(partial_path):
+        os.remove(partial_path)
+    conn = sqlite3.connect(partial_path)
+    try:
+        counts = _export_rows(conn, input_path, batch_size)
+        conn.executescript(EXPORT_INDEXES)
+        conn.execute("ANALYZE")
+        conn.close()
+        os.replace(partial_path, db_path)
+    except BaseException:
+        conn.close()
+        os.remove(partial_path)
+        raise
+    return counts
+
+
+def _export_rows(conn: sqlite3.Connection, input_path: str, batch_size: int) -> Dict[str, int]:
+    # The rollback journal stays on (in memory) so a failed batch rolls back cleanly
+    conn.execute("PRAGMA journal_mode=MEMORY")
+    conn.execute("PRAGMA synchronous=OFF")
+    conn.execute("PRAGMA temp_store=MEMORY")
+    conn.executescript(EXPORT_SCHEMA)
+
+    inserts = {
+        "tx": "INSERT INTO tx VALUES (?,?,?,?,?,?,?,?,?,?,?,?,?,?,?)",
+        "token_changes": "INSERT INTO token_changes VALUES (?,?,?,?,?)",
+        "programs_invoked": "INSERT INTO programs_invoked VALUES (?,?,?)",
+        "pools_targeted": "INSERT INTO pools_targeted VALUES (?,?)",
+    }
+    buffers: Dict[str, List[Tuple]] = {name: [] for name in inserts}
+    counts: Dict[str, int] = {name: 0 for name in inserts}
 
+    def flush() -> None:
+        with conn:
+            for name, rows in buffers.items():
+                if rows:
+                    conn.executemany(inserts[name], rows)
+                    counts[name] += len(rows)
+                    rows.clear()
+
+    for tx in iter_transactions(input_path):
+        sig = tx.get("signature")
+        if not sig:
+            continue
+        executed = bool(tx.get("executed"))
+        latency = tx.get("captureLatencyMs")
+        flow = (tx.get("txStructure") or {}).get("programFlow") or []
+        buffers["tx"].append((
+            sig,
+            sql_int(tx.get("slot")),
+            sql_int(tx.get("blockTime")),
+            sql_int(tx.get("indexInSlot")),
+            tx.get("feePayer"),
+            1 if executed else 0,
+            parse_error_label(tx.get("executionError")) if not executed else None,
+            sql_int(tx.get("jitoTipAmount")),
+            sql_int(tx.get("computeUnitsConsumed")),
+            sql_int(tx.get("totalFee")),
+            sql_int(tx.get("feePayerSolChange")),
+            latency if isinstance(latency, int) else None,
+            sql_int(tx.get("instructionCount")),
+            sql_int(tx.get("innerInstructionCount")),
+            "->".join(flow) if flow else None,
+        ))
         for change in tx.get("tokenChanges") or []:
-            if change.get("owner") != fee_payer:
-                continue
-            mint = change.get("mint")
-            if not mint:
+            dec = change.get("decimals")
+            buffers["token_changes"].append((
+                sig,
+                change.get("owner"),
+                change.get("mint"),
+                sql_int(change.get("deltaAmount")),
+                dec if isinstance(dec, int) else None,
+            ))
+        programs = tx.get("programsInvoked") or []
+        seen = set()
+        for pid in list(programs) + list(tx.get("dexProgramsInvoked") or []) + list(tx.get("aggregatorProgramsInvoked") or []):
+            if pid in seen:
                 continue
-            try:
-                delta = int(change.get("deltaAmount") or 0)
-            except Exception:
+            seen.add(pid)
+            kind = "dex" if pid in DEX_PROGRAMS else "agg" if pid in AGG_PROGRAMS else "other"
+            buffers["programs_invoked"].append((sig, pid, kind))
+        for pool in tx.get("poolsTargeted") or []:
+            buffers["pools_targeted"].append((sig, pool))
+
+        if len(buffers["tx"]) >= batch_size:
+            flush()
+
+    flush()
+    return counts
+
+
+def compute_wallet_metrics(
+    input_path: str,
+    mem_budget_mb: int = 0,
+    spill_dir: str = "",
+    spill_partitions: int = 64,
+) -> Tuple[Union[Dict[str, Dict], SpilledWalletStats], Optional[Counter]]:
+    """
+    Aggregate per-fee-payer stats. With mem_budget_mb > 0 the stats are
+    spilled to disk whenever the budget is exceeded and a SpilledWalletStats
+    is returned instead of a dict (wallet_counts is then None; use
+    wallet_stats.most_common / m["tx"] instead).
+    """
+    wallet_stats: Dict[str, Dict] = {}
+    wallet_counts: Optional[Counter] = Counter() if mem_budget_mb <= 0 else None
+    spilled: Optional[SpilledWalletStats] = None
+    max_entries = 0
+    if mem_budget_mb > 0:
+        spilled = SpilledWalletStats(spill_dir, spill_partitions)
+        max_entries = max(1, mem_budget_mb * 1024 * 1024 // WALLET_ENTRY_BYTES)
+
+    try:
+        for tx in iter_transactions(input_path):
+            fee_payer = tx.get("feePayer")
+            if not fee_payer:
                 continue
-            if mint == WSOL_MINT:
-                m["wsol_delta"] += delta
-            elif mint == USDC_MINT:
-                m["usdc_delta"] += delta
-            elif mint == USDT_MINT:
-                m["usdt_delta"] += delta
 
+            if wallet_counts is not None:
+                wallet_counts[fee_payer] += 1
+
+            m = wallet_stats.get(fee_payer)
+            if m is None:
+                if spilled is not None and len(wallet_stats) >= max_entries:
+                    spilled.spill(wallet_stats)
+                    wallet_stats.clear()
+                m = new_wallet_entry()
+                wallet_stats[fee_payer] = m
+
+            m["tx"] += 1
+            if tx.get("executed"):
+                m["exec"] += 1
+            else:
+                m["fail"] += 1
+
+            if tx.get("aggregatorProgramsInvoked"):
+                m["agg_tx"] += 1
+            if tx.get("dexProgramsInvoked"):
+                m["dex_tx"] += 1
+
+            m["tip_sum"] += int(tx.get("jitoTipAmount") or 0)
+            m["sol_delta"] += int(tx.get("feePayerSolChange") or 0)
+
+            for change in tx.get("tokenChanges") or []:
+                if change.get("owner") != fee_payer:
+                    continue
+                mint = change.get("mint")
+                if not mint:
+                    continue
+                try:
+                    delta = int(change.get("deltaAmount") or 0)
+                except Exception:
+                    continue
+                if mint == WSOL_MINT:
+                    m["wsol_delta"] += delta
+                elif mint == USDC_MINT:
+                    m["usdc_delta"] += delta
+                elif mint == USDT_MINT:
+                    m["usdt_delta"] += delta
+    except BaseException:
+        if spilled is not None:
+            spilled.close()
+        raise
+
+    if spilled is not None:
+        spilled.spill(wallet_stats)
+        wallet_stats.clear()
+        return spilled, None
     return wallet_stats, wallet_counts
 
 
+def select_wallet_stats(wallet_stats: Dict[str, Dict], wallets: List[str]) -> Dict[str, Dict]:
+    if isinstance(wallet_stats, SpilledWalletStats):
+        return wallet_stats.select(wallets)
+    return {w: wallet_stats[w] for w in wallets}
+
+
 def compute_top_wallet_token_deltas(
     input_path: str,
     top_wallets: List[str],
@@ -385,7 +984,154 @@ def compute_top_wallet_token_deltas(
     return token_deltas, mint_decimals
 
 
-def analyze_transactions(input_path: str) -> Dict:
+SERIES_FIELDS = ("tx", "fail", "tip_sum", "tip_tx", "compute_sum", "solw_sum", "stable_sum")
+SERIES_COLUMNS = ("bucket_start", "dimension", "key") + SERIES_FIELDS + ("fail_rate", "tip_avg")
+
+
+def tx_timestamp(tx: Dict) -> Optional[int]:
+    block_time = tx.get("blockTime")
+    if isinstance(block_time, int):
+        return block_time
+    captured = tx.get("capturedAt")
+    if isinstance(captured, (int, float)):
+        return int(captured) // 1000
+    return None
+
+
+class SeriesWriter:
+    """Append-only columnar sink: CSV, or Parquet row groups when pyarrow is available."""
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self.rows = 0
+        self._parquet = path.lower().endswith(".parquet")
+        if self._parquet:
+            try:
+                import pyarrow as pa
+                import pyarrow.parquet as pq
+            except ImportError as exc:
+                raise RuntimeError("Parquet series output requires pyarrow (pip install pyarrow)") from exc
+            self._pa = pa
+            schema = pa.schema(
+                [("bucket_start", pa.int64()), ("dimension", pa.string()), ("key", pa.string())]
+                + [(f, pa.int64()) for f in SERIES_FIELDS]
+                + [("fail_rate", pa.float64()), ("tip_avg", pa.float64())]
+            )
+            self._writer = pq.ParquetWriter(path, schema)
+        else:
+            self._fh = open(path, "w", newline="", encoding="utf-8")
+            self._writer = csv.writer(self._fh)
+            self._writer.writerow(SERIES_COLUMNS)
+
+    def write(self, rows: List[Tuple]) -> None:
+        if not rows:
+            return
+        self.rows += len(rows)
+        if self._parquet:
+            columns = list(zip(*rows))
+            self._writer.write_table(self._pa.table(dict(zip(SERIES_COLUMNS, columns))))
+        else:
+            self._writer.writerows(rows)
+
+    def close(self) -> None:
+        if self._parquet:
+            self._writer.close()
+        else:
+            self._fh.close()
+
+
+class BucketedSeries:
+    """
+    Per-time-bucket accumulators for the analyze_transactions dimensions
+    (program, flow, latency, category). Each (dimension, key) holds one
+    int64 array of SERIES_FIELDS. Only buckets within `lag` of the newest
+    one stay open; older buckets are flushed to the writer, so memory is
+    bounded by the window rather than the file. A transaction that lands
+    in an already-flushed bucket reopens it and yields an extra row for the
+    same bucket_start (counted in `late`); sum raw columns to combine.
+    """
+
+    def __init__(self, bucket_seconds: int, writer: SeriesWriter, lag: int = 2) -> None:
+        self.bucket_seconds = bucket_seconds
+        self.writer = writer
+        self.lag = max(0, lag)
+        self.buckets: Dict[int, Dict[Tuple[str, str], array]] = {}
+        self.newest: Optional[int] = None
+        self.flushed_upto: Optional[int] = None
+        self.late = 0
+        self.untimed = 0
+
+    def add(
+        self,
+        ts: Optional[int],
+        keys: List[Tuple[str, str]],
+        executed: bool,
+        tip: int,
+        compute: int,
+        solw_delta: int,
+        stable_delta: int,
+    ) -> None:
+        if ts is None:
+            self.untimed += 1
+            return
+        start = ts - ts % self.bucket_seconds
+        if self.flushed_upto is not None and start <= self.flushed_upto:
+            self.late += 1
+        bucket = self.buckets.get(start)
+        if bucket is None:
+            bucket = {}
+            self.buckets[start] = bucket
+        fail = 0 if executed else 1
+        tip_tx = 1 if tip > 0 else 0
+        for key in keys:
+            acc = bucket.get(key)
+            if acc is None:
+                acc = array("q", bytes(8 * len(SERIES_FIELDS)))
+                bucket[key] = acc
+            acc[0] += 1
+            acc[1] += fail
+            acc[2] += tip
+            acc[3] += tip_tx
+            acc[4] += compute
+            acc[5] += solw_delta
+            acc[6] += stable_delta
+        if self.newest is None or start > self.newest:
+            self.newest = start
+            self._flush_before(start - self.lag * self.bucket_seconds)
+
+    def _flush_before(self, cutoff: Optional[int]) -> None:
+        ready = sorted(b for b in self.buckets if cutoff is None or b < cutoff)
+        for start in ready:
+            rows = []
+            for (dimension, key), acc in sorted(self.buckets.pop(start).items()):
+                tx = acc[0]
+                rows.append(
+                    (start, dimension, key, *acc, pct(acc[1], tx), acc[2] / tx if tx else 0.0)
+                )
+            self.writer.write(rows)
+            if self.flushed_upto is None or start > self.flushed_upto:
+                self.flushed_upto = start
+
+    def close(self) -> Dict[str, int]:
+        self._flush_before(None)
+        self.writer.close()
+        return {
+            "bucket_seconds": self.bucket_seconds,
+            "rows": self.writer.rows,
+            "late_tx": self.late,
+            "untimed_tx": self.untimed,
+        }
+
+
+def new_flow_entry() -> Dict[str, int]:
+    return {"tx": 0, "fail": 0, "tip_sum": 0, "solw_sum": 0, "stable_sum": 0}
+
+
+def analyze_transactions(
+    input_path: str,
+    series: Optional[BucketedSeries] = None,
+    heavy_hitters: int = 0,
+) -> Dict:
     program_stats = {
         pid: {
             "tx": 0,
@@ -409,7 +1155,7 @@ def analyze_transactions(input_path: str) -> Dict:
         for pid in list(DEX_PROGRAMS | AGG_PROGRAMS)
     }
 
-    flow_stats: Dict[str, Dict] = {}
+    flow_stats = SpaceSaving(heavy_hitters, payload=new_flow_entry)
     latency_stats: Dict[str, Dict] = {}
     category_stats = {
         "dex_only": {"tx": 0, "fail": 0, "tip_sum": 0, "solw_sum": 0, "stable_sum": 0},
@@ -462,11 +1208,12 @@ def analyze_transactions(input_path: str) -> Dict:
         has_agg = bool(agg_list)
 
         if has_dex and has_agg:
-            cat = category_stats["both"]
+            cat_key = "both"
         elif has_dex:
-            cat = category_stats["dex_only"]
+            cat_key = "dex_only"
         else:
-            cat = category_stats["agg_only"]
+            cat_key = "agg_only"
+        cat = category_stats[cat_key]
         cat["tx"] += 1
         if not executed:
             cat["fail"] += 1
@@ -509,10 +1256,7 @@ def analyze_transactions(input_path: str) -> Dict:
             # Flow stats
         flow = tx.get("txStructure", {}).get("programFlow") or []
         flow_key = "->".join(flow) if flow else "unknown"
-        fs = flow_stats.get(flow_key)
-        if fs is None:
-            fs = {"tx": 0, "fail": 0, "tip_sum": 0, "solw_sum": 0, "stable_sum": 0}
-            flow_stats[flow_key] = fs
+        fs = flow_stats.add(flow_key)
         fs["tx"] += 1
         if not executed:
             fs["fail"] += 1
@@ -534,6 +1278,13 @@ def analyze_transactions(input_path: str) -> Dict:
         lb["solw_sum"] += solw_delta
         lb["stable_sum"] += stable_delta
 
+        if series is not None:
+            keys = [("category", cat_key), ("flow", flow_key), ("latency", bucket)]
+            for pid in dex_set | set(agg_list):
+                if pid in program_stats:
+                    keys.append(("program", PROGRAM_NAME_BY_ID.get(pid, pid)))
+            series.add(tx_timestamp(tx), keys, executed, tip, compute, solw_delta, stable_delta)
+
     program_rows = []
     for pid, ps in program_stats.items():
         if ps["tx"] == 0:
@@ -564,9 +1315,13 @@ def analyze_transactions(input_path: str) -> Dict:
 
     flow_rows = []
     for flow_key, fs in flow_stats.items():
+        if not flow_stats.guaranteed(flow_key):
+            continue
         flow_rows.append({
             "flow": flow_key,
             "tx": fs["tx"],
+            "tx_estimate": flow_stats.estimate(flow_key),
+            "tx_error": flow_stats.error(flow_key),
             "fail_rate": pct(fs["fail"], fs["tx"]),
             "tip_avg": fs["tip_sum"] / fs["tx"] if fs["tx"] else 0,
             "solw_sum": fs["solw_sum"] / LAMPORTS_PER_SOL,
@@ -607,7 +1362,7 @@ def analyze_transactions(input_path: str) -> Dict:
         })
 
     mint_rows = sorted(mint_rows, key=lambda r: abs(float(r["net_delta"])), reverse=True)
-    flow_rows = sorted(flow_rows, key=lambda r: r["tx"], reverse=True)
+    flow_rows = sorted(flow_rows, key=lambda r: r["tx_estimate"], reverse=True)
     bucket_order = {
         "<0": 0,
         "0-50": 1,
@@ -628,11 +1383,16 @@ def analyze_transactions(input_path: str) -> Dict:
         "latency": latency_rows,
         "categories": category_rows,
         "mints": mint_rows,
+        "flow_tracking": flow_stats.describe(),
     }
 
 
-def analyze_pools(input_path: str, top_n: int = 50) -> List[Dict]:
-    pool_stats: Dict[str, Dict] = {}
+def new_pool_entry() -> Dict[str, int]:
+    return {"tx": 0, "fail": 0, "tip_sum": 0, "solw_sum": 0, "stable_sum": 0, "agg_tx": 0}
+
+
+def analyze_pools(input_path: str, top_n: int = 50, heavy_hitters: int = 0) -> Dict[str, object]:
+    pool_stats = SpaceSaving(heavy_hitters, payload=new_pool_entry)
 
     for tx in iter_transactions(input_path):
         fee_payer = tx.get("feePayer")
@@ -665,10 +1425,7 @@ def analyze_pools(input_path: str, top_n: int = 50) -> List[Dict]:
         agg_tx = 1 if tx.get("aggregatorProgramsInvoked") else 0
 
         for pool in pools:
-            ps = pool_stats.get(pool)
-            if ps is None:
-                ps = {"tx": 0, "fail": 0, "tip_sum": 0, "solw_sum": 0, "stable_sum": 0, "agg_tx": 0}
-                pool_stats[pool] = ps
+            ps = pool_stats.add(pool)
             ps["tx"] += 1
             if not executed:
                 ps["fail"] += 1
@@ -677,7 +1434,12 @@ def analyze_pools(input_path: str, top_n: int = 50) -> List[Dict]:
             ps["stable_sum"] += stable_delta
             ps["agg_tx"] += agg_tx
 
-    top_pools = sorted(pool_stats.items(), key=lambda x: x[1]["tx"], reverse=True)[:top_n]
+    # Only pools certain to be heavy hitters: the stats of the rest cover too few of their events.
+    top_pools = heapq.nlargest(
+        top_n,
+        ((p, ps) for p, ps in pool_stats.items() if pool_stats.guaranteed(p)),
+        key=lambda x: pool_stats.estimate(x[0]),
+    )
     top_set = {p for p, _ in top_pools}
     pool_wallets: Dict[str, set] = {p: set() for p in top_set}
 
@@ -695,6 +1457,8 @@ def analyze_pools(input_path: str, top_n: int = 50) -> List[Dict]:
         rows.append({
             "pool": pool,
             "tx": ps["tx"],
+            "tx_estimate": pool_stats.estimate(pool),
+            "tx_error": pool_stats.error(pool),
             "fail_rate": pct(ps["fail"], ps["tx"]),
             "tip_avg": ps["tip_sum"] / ps["tx"] if ps["tx"] else 0,
             "solw_sum": ps["solw_sum"] / LAMPORTS_PER_SOL,
@@ -703,7 +1467,7 @@ def analyze_pools(input_path: str, top_n: int = 50) -> List[Dict]:
             "unique_wallets": len(pool_wallets.get(pool, set())),
         })
 
-    return rows
+    return {"pools": rows, "pool_tracking": pool_stats.describe()}
 
 
 def analyze_cohorts(wallet_stats: Dict[str, Dict], min_tx: int) -> Dict[str, List[Dict]]:
@@ -791,10 +1555,10 @@ def analyze_cohorts(wallet_stats: Dict[str, Dict], min_tx: int) -> Dict[str, Lis
 
 def summarize_wallets(
     wallet_stats: Dict[str, Dict],
-    wallet_counts: Counter,
+    wallet_counts: Optional[Counter],
     min_tx: int,
 ) -> Dict:
-    total_wallets = len(wallet_counts)
+    total_wallets = len(wallet_counts) if wallet_counts is not None else len(wallet_stats)
     sol_pos = sol_neg = sol_zero = 0
     solw_pos = solw_neg = solw_zero = 0
     stable_pos = stable_neg = stable_zero = 0
@@ -859,267 +1623,340 @@ def summarize_wallets(
     }
 
 
-def main() -> int:
-    args = parse_args()
-    input_path = args.input
-
-    wallet_stats, wallet_counts = compute_wallet_metrics(input_path)
-    top_wallets = [w for w, _ in wallet_counts.most_common(args.top_wallets)]
+def write_markdown_report(summary: Dict, path: str) -> None:
+    lines = []
+    counts = summary["counts"]
+    lines.append("# DEX PnL Summary (conservative)\n")
+    lines.append("## Coverage\n")
+    lines.append(f"- Wallets observed: {counts['wallets_total']}\n")
+    lines.append(f"- Min tx threshold: {counts['min_tx']} ({counts['min_tx_wallets']} wallets)\n")
+    lines.append(f"- Priced mints: {summary['price_coverage_overall']['priced_mints']} of {summary['price_coverage_overall']['mint_decimals']}\n")
+    lines.append("\n## SOL+WSOL outcomes\n")
+    lines.append(f"- All wallets: +{counts['sol_wsol']['pos']} / -{counts['sol_wsol']['neg']} / 0:{counts['sol_wsol']['zero']}\n")
+    lines.append(f"- Min tx wallets: +{counts['min_tx_sol_wsol']['pos']} / -{counts['min_tx_sol_wsol']['neg']} / 0:{counts['min_tx_sol_wsol']['zero']}\n")
+    lines.append("\n## Stable (USDC+USDT) outcomes\n")
+    lines.append(f"- All wallets: +{counts['stable']['pos']} / -{counts['stable']['neg']} / 0:{counts['stable']['zero']}\n")
+    lines.append(f"- Min tx wallets: +{counts['min_tx_stable']['pos']} / -{counts['min_tx_stable']['neg']} / 0:{counts['min_tx_stable']['zero']}\n")
+
+    def fmt(v: object) -> str:
+        if isinstance(v, float):
+            return f"{v:.6f}"
+        return str(v)
+
+    def table(title: str, rows: List[Dict], cols: List[str]) -> None:
+        lines.append(f"\n## {title}\n")
+        lines.append("| " + " | ".join(cols) + " |\n")
+        lines.append("| " + " | ".join(["---"] * len(cols)) + " |\n")
+        for r in rows:
+            lines.append("| " + " | ".join(fmt(r.get(c, "")) for c in cols) + " |\n")
+
+    table(
+        "Top SOL+WSOL (min tx)",
+        summary["solw_top"],
+        ["wallet", "tx", "sol_wsol", "agg_share"],
+    )
+    table(
+        "Top Stable Net (min tx)",
+        summary["stable_top"],
+        ["wallet", "tx", "stable", "sol_wsol", "agg_share"],
+    )
+    table(
+        "Category Summary (DEX vs Agg)",
+        summary["categories"],
+        ["category", "tx", "fail_rate", "tip_avg", "solw_sum", "stable_sum"],
+    )
+    table(
+        "Top Programs",
+        summary["programs"],
+        [
+            "program",
+            "tx",
+            "fail_rate",
+            "tip_rate",
+            "tip_avg",
+            "instr_p50",
+            "inner_p50",
+            "compute_avg",
+            "solw_sum",
+            "stable_sum",
+        ],
+    )
+    lines.append("\n## Program Error Signatures\n")
+    for program, errors in summary["program_errors"].items():
+        if not errors:
+            continue
+        parts = [f"{e[0]} ({e[1]})" for e in errors]
+        lines.append(f"- {program}: " + ", ".join(parts) + "\n")
+    # Under --heavy-hitters, tx counts events since the key was last (re)tracked.
+    hh = summary.get("heavy_hitters")
+    hh_cols = ["tx_estimate", "tx_error"] if hh else []
+    if hh:
+        lines.append("\n## Heavy-Hitter Tracking\n")
+        for name, info in hh.items():
+            lines.append(
+                f"- {name}: {info['guaranteed']} guaranteed of {info['tracked']} tracked "
+                f"(capacity {info['capacity']}, N/K bound {info['error_bound']})\n"
+            )
+    table(
+        "Top Program Flows",
+        summary["flows"],
+        ["flow", "tx", *hh_cols, "fail_rate", "tip_avg", "solw_sum", "stable_sum"],
+    )
+    table(
+        "Latency Buckets",
+        summary["latency"],
+        ["bucket", "tx", "fail_rate", "tip_avg", "solw_sum", "stable_sum"],
+    )
+    table(
+        "Top Pools",
+        summary["pools"],
+        ["pool", "tx", *hh_cols, "fail_rate", "tip_avg", "solw_sum", "stable_sum", "agg_share", "unique_wallets"],
+    )
+    table(
+        "Cohorts by Aggregator Share",
+        summary["cohorts"]["agg_share"],
+        ["bucket", "wallets", "avg_tx", "avg_fail_rate", "avg_tip", "solw_pos_rate", "solw_sum", "stable_sum"],
+    )
+    table(
+        "Cohorts by Tip Intensity",
+        summary["cohorts"]["tip_intensity"],
+        ["bucket", "wallets", "avg_tx", "avg_fail_rate", "avg_tip", "solw_pos_rate", "solw_sum", "stable_sum"],
+    )
+    table(
+        "Top Mint Net Flows",
+        summary["mint_flows"],
+        ["mint", "net_delta", "tx", "decimals"],
+    )
+    table(
+        "Top Mark-to-Market (top wallets)",
+        summary["pnl_top"],
+        ["wallet", "tx", "total_value_usdc", "price_coverage", "agg_share", "fail_rate"],
+    )
+    table(
+        "Bottom Mark-to-Market (top wallets)",
+        summary["pnl_bottom"],
+        ["wallet", "tx", "total_value_usdc", "price_coverage", "agg_share", "fail_rate"],
+    )
+
+    Path(path).write_text("".join(lines))
+
+
+def report_wallets(
+    args: argparse.Namespace,
+    prof: StageProfiler,
+    input_path: str,
+    wallet_stats: Union[Dict[str, Dict], SpilledWalletStats],
+    wallet_counts: Optional[Counter],
+) -> int:
+    with prof.stage("group"):
+        # Exact tx counts: wallet_stats holds every wallet (in memory or spilled),
+        # so an approximate sketch here would save nothing
+        top_wallets = [w for w, _ in rank_wallets(((w, m["tx"]) for w, m in wallet_stats.items()), args.top_wallets)]
+        top_wallet_stats = select_wallet_stats(wallet_stats, top_wallets)
+    prof.track("wallet_stats", wallet_stats)
+    if wallet_counts is not None:
+        prof.track("wallet_counts", wallet_counts)
 
     repo_root = Path(__file__).resolve().parents[2]
     helius_key = load_helius_key(args.helius_key, args.helius_config, repo_root)
 
-    token_deltas, mint_decimals = compute_top_wallet_token_deltas(input_path, top_wallets)
+    with prof.stage("group"):
+        token_deltas, mint_decimals = compute_top_wallet_token_deltas(input_path, top_wallets)
+    prof.track("token_deltas", token_deltas)
+    prof.track("mint_decimals", mint_decimals)
 
-    prices: Dict[str, float] = {}
-    if args.price_file:
-        try:
-            prices.update(read_price_file(args.price_file))
-        except Exception as exc:
-            print(f"price file error: {exc}", file=sys.stderr)
-
-    if args.price_source == "jup":
-        # Only fetch for mints seen in top wallets to keep this bounded.
-        mint_set = set(mint_decimals.keys())
-        mint_set.add(WSOL_MINT)
-        mints = sorted(mint_set)
-        try:
-            prices.update(fetch_jup_prices(mints, vs_token=args.price_vs))
-        except Exception as exc:
-            print(f"price fetch error: {exc}", file=sys.stderr)
-    elif args.price_source == "helius":
-        mint_set = set(mint_decimals.keys())
-        mint_set.add(WSOL_MINT)
-        mints = sorted(mint_set)
-        if not helius_key:
-            print("helius price source selected but no API key found", file=sys.stderr)
-        else:
+    with prof.stage("prices"):
+        prices: Dict[str, float] = {}
+        if args.price_file:
             try:
-                prices.update(fetch_helius_prices(mints, helius_key))
+                prices.update(read_price_file(args.price_file))
             except Exception as exc:
-                print(f"helius price fetch error: {exc}", file=sys.stderr)
+                print(f"price file error: {exc}", file=sys.stderr)
 
-    # Per-wallet PnL for top wallets (mark-to-market in USDC)
-    pnl_rows = []
-    for w in top_wallets:
-        m = wallet_stats[w]
-        tx = m["tx"]
-        agg_share = pct(m["agg_tx"], tx)
-        fail_rate = pct(m["fail"], tx)
-        tip_avg = m["tip_sum"] / tx if tx else 0.0
-
-        sol_units = m["sol_delta"] / LAMPORTS_PER_SOL
-        sol_price = prices.get(WSOL_MINT)
-        sol_value = sol_units * sol_price if sol_price is not None else 0.0
-
-        token_value = 0.0
-        stable_value = 0.0
-        priced = 0
-        total_mints = 0
-        for mint, delta in token_deltas[w].items():
-            total_mints += 1
-            dec = mint_decimals.get(mint)
-            units = to_units(delta, dec)
-            price = prices.get(mint)
-            if price is None:
-                continue
-            priced += 1
-            token_value += units * price
-            if mint in (USDC_MINT, USDT_MINT):
-                stable_value += units * price
-
-        total_value = sol_value + token_value
-        coverage = pct(priced, total_mints) if total_mints else 0.0
-
-        pnl_rows.append({
-            "wallet": w,
-            "tx": tx,
-            "agg_share": agg_share,
-            "fail_rate": fail_rate,
-            "tip_avg_lamports": tip_avg,
-            "sol_value_usdc": sol_value,
-            "token_value_usdc": token_value,
-            "total_value_usdc": total_value,
-            "stable_value_usdc": stable_value,
-            "price_coverage": coverage,
-            "total_mints": total_mints,
-        })
+        if args.price_source == "jup":
+            # Only fetch for mints seen in top wallets to keep this bounded.
+            mint_set = set(mint_decimals.keys())
+            mint_set.add(WSOL_MINT)
+            mints = sorted(mint_set)
+            try:
+                prices.update(fetch_jup_prices(mints, vs_token=args.price_vs))
+            except Exception as exc:
+                print(f"price fetch error: {exc}", file=sys.stderr)
+        elif args.price_source == "helius":
+            mint_set = set(mint_decimals.keys())
+            mint_set.add(WSOL_MINT)
+            mints = sorted(mint_set)
+            if not helius_key:
+                print("helius price source selected but no API key found", file=sys.stderr)
+            else:
+                try:
+                    prices.update(fetch_helius_prices(mints, helius_key))
+                except Exception as exc:
+                    print(f"helius price fetch error: {exc}", file=sys.stderr)
+
+    with prof.stage("analyze"):
+        # Per-wallet PnL for top wallets (mark-to-market in USDC)
+        pnl_rows = []
+        for w in top_wallets:
+            m = top_wallet_stats[w]
+            tx = m["tx"]
+            agg_share = pct(m["agg_tx"], tx)
+            fail_rate = pct(m["fail"], tx)
+            tip_avg = m["tip_sum"] / tx if tx else 0.0
+
+            sol_units = m["sol_delta"] / LAMPORTS_PER_SOL
+            sol_price = prices.get(WSOL_MINT)
+            sol_value = sol_units * sol_price if sol_price is not None else 0.0
+
+            token_value = 0.0
+            stable_value = 0.0
+            priced = 0
+            total_mints = 0
+            for mint, delta in token_deltas[w].items():
+                total_mints += 1
+                dec = mint_decimals.get(mint)
+                units = to_units(delta, dec)
+                price = prices.get(mint)
+                if price is None:
+                    continue
+                priced += 1
+                token_value += units * price
+                if mint in (USDC_MINT, USDT_MINT):
+                    stable_value += units * price
+
+            total_value = sol_value + token_value
+            coverage = pct(priced, total_mints) if total_mints else 0.0
+
+            pnl_rows.append({
+                "wallet": w,
+                "tx": tx,
+                "agg_share": agg_share,
+                "fail_rate": fail_rate,
+                "tip_avg_lamports": tip_avg,
+                "sol_value_usdc": sol_value,
+                "token_value_usdc": token_value,
+                "total_value_usdc": total_value,
+                "stable_value_usdc": stable_value,
+                "price_coverage": coverage,
+                "total_mints": total_mints,
+            })
 
-    pnl_rows_sorted = sorted(pnl_rows, key=lambda r: r["total_value_usdc"], reverse=True)
+        pnl_rows_sorted = sorted(pnl_rows, key=lambda r: r["total_value_usdc"], reverse=True)
 
-    # Additional derived tables
-    solw_rows = []
-    stable_rows = []
-    for w, m in wallet_stats.items():
-        if m["tx"] < args.min_tx:
-            continue
-        solw = (m["sol_delta"] + m["wsol_delta"]) / LAMPORTS_PER_SOL
-        stable = (m["usdc_delta"] + m["usdt_delta"]) / 1e6
-        solw_rows.append({
-            "wallet": w,
-            "tx": m["tx"],
-            "sol_wsol": solw,
-            "agg_share": pct(m["agg_tx"], m["tx"]),
-        })
-        stable_rows.append({
-            "wallet": w,
-            "tx": m["tx"],
-            "stable": stable,
-            "sol_wsol": solw,
-            "agg_share": pct(m["agg_tx"], m["tx"]),
-        })
+        # Additional derived tables
+        solw_rows = []
+        stable_rows = []
+        for w, m in wallet_stats.items():
+            if m["tx"] < args.min_tx:
+                continue
+            solw = (m["sol_delta"] + m["wsol_delta"]) / LAMPORTS_PER_SOL
+            stable = (m["usdc_delta"] + m["usdt_delta"]) / 1e6
+            solw_rows.append({
+                "wallet": w,
+                "tx": m["tx"],
+                "sol_wsol": solw,
+                "agg_share": pct(m["agg_tx"], m["tx"]),
+            })
+            stable_rows.append({
+                "wallet": w,
+                "tx": m["tx"],
+                "stable": stable,
+                "sol_wsol": solw,
+                "agg_share": pct(m["agg_tx"], m["tx"]),
+            })
 
-    solw_rows = sorted(solw_rows, key=lambda r: r["sol_wsol"], reverse=True)
-    stable_rows = sorted(stable_rows, key=lambda r: r["stable"], reverse=True)
-
-    tx_analysis = analyze_transactions(input_path)
-    pool_rows = analyze_pools(input_path, top_n=50)
-    cohort_rows = analyze_cohorts(wallet_stats, args.min_tx)
-
-    summary = {
-        "input": input_path,
-        "price_source": args.price_source,
-        "helius_key_loaded": bool(helius_key),
-        "top_wallets": top_wallets,
-        "counts": summarize_wallets(wallet_stats, wallet_counts, args.min_tx),
-        "solw_top": solw_rows[:10],
-        "stable_top": stable_rows[:10],
-        "pnl_top": pnl_rows_sorted[:10],
-        "pnl_bottom": list(reversed(pnl_rows_sorted[-10:])),
-        "programs": tx_analysis["programs"][:10],
-        "program_errors": {p["program"]: p["top_errors"] for p in tx_analysis["programs"][:10]},
-        "flows": tx_analysis["flows"][:15],
-        "latency": tx_analysis["latency"],
-        "categories": tx_analysis["categories"],
-        "pools": pool_rows[:20],
-        "cohorts": cohort_rows,
-        "mint_flows": tx_analysis["mints"][:20],
-        "price_coverage_overall": {
-            "priced_mints": len(prices),
-            "mint_decimals": len(mint_decimals),
-        },
-    }
+        solw_rows = sorted(solw_rows, key=lambda r: r["sol_wsol"], reverse=True)
+        stable_rows = sorted(stable_rows, key=lambda r: r["stable"], reverse=True)
+
+        series: Optional[BucketedSeries] = None
+        if args.bucket_seconds > 0:
+            series_out = args.series_out or str(Path(args.out or input_path).with_suffix("")) + ".series.csv"
+            series = BucketedSeries(args.bucket_seconds, SeriesWriter(series_out), lag=args.series_lag)
+
+        with prof.mem_scope("analyze:transactions"):
+            tx_analysis = analyze_transactions(input_path, series=series, heavy_hitters=args.heavy_hitters)
+        series_info = series.close() if series is not None else None
+        if series_info is not None:
+            series_info["path"] = series.writer.path
+        with prof.mem_scope("analyze:pools"):
+            pool_analysis = analyze_pools(input_path, top_n=50, heavy_hitters=args.heavy_hitters)
+        cohort_rows = analyze_cohorts(wallet_stats, args.min_tx)
+
+    with prof.stage("report"):
+        summary = {
+            "input": input_path,
+            "price_source": args.price_source,
+            "helius_key_loaded": bool(helius_key),
+            "top_wallets": top_wallets,
+            "counts": summarize_wallets(wallet_stats, wallet_counts, args.min_tx),
+            "solw_top": solw_rows[:10],
+            "stable_top": stable_rows[:10],
+            "pnl_top": pnl_rows_sorted[:10],
+            "pnl_bottom": list(reversed(pnl_rows_sorted[-10:])),
+            "programs": tx_analysis["programs"][:10],
+            "program_errors": {p["program"]: p["top_errors"] for p in tx_analysis["programs"][:10]},
+            "flows": tx_analysis["flows"][:15],
+            "latency": tx_analysis["latency"],
+            "categories": tx_analysis["categories"],
+            "pools": pool_analysis["pools"][:20],
+            "cohorts": cohort_rows,
+            "mint_flows": tx_analysis["mints"][:20],
+            "series": series_info,
+            "heavy_hitters": {
+                "flows": tx_analysis["flow_tracking"],
+                "pools": pool_analysis["pool_tracking"],
+            } if args.heavy_hitters > 0 else None,
+            "parse": parse_report(),
+            "price_coverage_overall": {
+                "priced_mints": len(prices),
+                "mint_decimals": len(mint_decimals),
+            },
+        }
 
-    if args.out:
-        Path(args.out).write_text(json.dumps(summary, indent=2))
-
-    if args.report:
-        lines = []
-        counts = summary["counts"]
-        lines.append("# DEX PnL Summary (conservative)\n")
-        lines.append("## Coverage\n")
-        lines.append(f"- Wallets observed: {counts['wallets_total']}\n")
-        lines.append(f"- Min tx threshold: {counts['min_tx']} ({counts['min_tx_wallets']} wallets)\n")
-        lines.append(f"- Priced mints: {summary['price_coverage_overall']['priced_mints']} of {summary['price_coverage_overall']['mint_decimals']}\n")
-        lines.append("\n## SOL+WSOL outcomes\n")
-        lines.append(f"- All wallets: +{counts['sol_wsol']['pos']} / -{counts['sol_wsol']['neg']} / 0:{counts['sol_wsol']['zero']}\n")
-        lines.append(f"- Min tx wallets: +{counts['min_tx_sol_wsol']['pos']} / -{counts['min_tx_sol_wsol']['neg']} / 0:{counts['min_tx_sol_wsol']['zero']}\n")
-        lines.append("\n## Stable (USDC+USDT) outcomes\n")
-        lines.append(f"- All wallets: +{counts['stable']['pos']} / -{counts['stable']['neg']} / 0:{counts['stable']['zero']}\n")
-        lines.append(f"- Min tx wallets: +{counts['min_tx_stable']['pos']} / -{counts['min_tx_stable']['neg']} / 0:{counts['min_tx_stable']['zero']}\n")
-
-        def fmt(v: object) -> str:
-            if isinstance(v, float):
-                return f"{v:.6f}"
-            return str(v)
-
-        def table(title: str, rows: List[Dict], cols: List[str]) -> None:
-            lines.append(f"\n## {title}\n")
-            lines.append("| " + " | ".join(cols) + " |\n")
-            lines.append("| " + " | ".join(["---"] * len(cols)) + " |\n")
-            for r in rows:
-                lines.append("| " + " | ".join(fmt(r.get(c, "")) for c in cols) + " |\n")
-
-        table(
-            "Top SOL+WSOL (min tx)",
-            summary["solw_top"],
-            ["wallet", "tx", "sol_wsol", "agg_share"],
-        )
-        table(
-            "Top Stable Net (min tx)",
-            summary["stable_top"],
-            ["wallet", "tx", "stable", "sol_wsol", "agg_share"],
-        )
-        table(
-            "Category Summary (DEX vs Agg)",
-            summary["categories"],
-            ["category", "tx", "fail_rate", "tip_avg", "solw_sum", "stable_sum"],
-        )
-        table(
-            "Top Programs",
-            summary["programs"],
-            [
-                "program",
-                "tx",
-                "fail_rate",
-                "tip_rate",
-                "tip_avg",
-                "instr_p50",
-                "inner_p50",
-                "compute_avg",
-                "solw_sum",
-                "stable_sum",
-            ],
-        )
-        lines.append("\n## Program Error Signatures\n")
-        for program, errors in summary["program_errors"].items():
-            if not errors:
-                continue
-            parts = [f"{e[0]} ({e[1]})" for e in errors]
-            lines.append(f"- {program}: " + ", ".join(parts) + "\n")
-        table(
-            "Top Program Flows",
-            summary["flows"],
-            ["flow", "tx", "fail_rate", "tip_avg", "solw_sum", "stable_sum"],
-        )
-        table(
-            "Latency Buckets",
-            summary["latency"],
-            ["bucket", "tx", "fail_rate", "tip_avg", "solw_sum", "stable_sum"],
-        )
-        table(
-            "Top Pools",
-            summary["pools"],
-            ["pool", "tx", "fail_rate", "tip_avg", "solw_sum", "stable_sum", "agg_share", "unique_wallets"],
-        )
-        table(
-            "Cohorts by Aggregator Share",
-            summary["cohorts"]["agg_share"],
-            ["bucket", "wallets", "avg_tx", "avg_fail_rate", "avg_tip", "solw_pos_rate", "solw_sum", "stable_sum"],
-        )
-        table(
-            "Cohorts by Tip Intensity",
-            summary["cohorts"]["tip_intensity"],
-            ["bucket", "wallets", "avg_tx", "avg_fail_rate", "avg_tip", "solw_pos_rate", "solw_sum", "stable_sum"],
-        )
-        table(
-            "Top Mint Net Flows",
-            summary["mint_flows"],
-            ["mint", "net_delta", "tx", "decimals"],
-        )
-        table(
-            "Top Mark-to-Market (top wallets)",
-            summary["pnl_top"],
-            ["wallet", "tx", "total_value_usdc", "price_coverage", "agg_share", "fail_rate"],
-        )
-        table(
-            "Bottom Mark-to-Market (top wallets)",
-            summary["pnl_bottom"],
-            ["wallet", "tx", "total_value_usdc", "price_coverage", "agg_share", "fail_rate"],
-        )
+        if args.out:
+            Path(args.out).write_text(json.dumps(summary, indent=2))
 
-        Path(args.report).write_text("".join(lines))
+        if args.report:
+            write_markdown_report(summary, args.report)
 
-    # Print a short console summary
-    print(json.dumps({
-        "wallets": summary["counts"]["wallets_total"],
-        "min_tx_wallets": summary["counts"]["min_tx_wallets"],
-        "priced_mints": summary["price_coverage_overall"]["priced_mints"],
-        "priced_mints_total": summary["price_coverage_overall"]["mint_decimals"],
-    }))
+        # Print a short console summary
+        print(json.dumps({
+            "wallets": summary["counts"]["wallets_total"],
+            "min_tx_wallets": summary["counts"]["min_tx_wallets"],
+            "priced_mints": summary["price_coverage_overall"]["priced_mints"],
+            "priced_mints_total": summary["price_coverage_overall"]["mint_decimals"],
+            "parse": summary["parse"],
+        }))
 
     return 0
 
 
+def main() -> int:
+    global JSON_PARSER, PROFILER
+    args = parse_args()
+    input_path = args.input
+    JSON_PARSER = args.json_parser
+    PROFILER = prof = StageProfiler.from_args(args, "dexPnlAnalysis")
+
+    if args.export_db:
+        with prof.stage("export"):
+            counts = export_transactions(input_path, args.export_db, batch_size=args.export_batch)
+        print(json.dumps({"export_db": args.export_db, "rows": counts, "parse": parse_report()}))
+        return 0
+
+    with prof.stage("group"):
+        wallet_stats, wallet_counts = compute_wallet_metrics(
+            input_path,
+            mem_budget_mb=args.wallet_mem_mb,
+            spill_dir=args.spill_dir,
+            spill_partitions=args.spill_partitions,
+        )
+    try:
+        return report_wallets(args, prof, input_path, wallet_stats, wallet_counts)
+    finally:
+        if isinstance(wallet_stats, SpilledWalletStats):
+            wallet_stats.close()
+
+
 if __name__ == "__main__":
     raise SystemExit(main())
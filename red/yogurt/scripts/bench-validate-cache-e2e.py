@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+validate-cache-e2e.py benchmark
+
+Runs each state-resolution path of the validator against one capture.db and
+reports swaps/s, SQL statements issued and peak RSS per path:
+
+  per-swap    one point query per vault per swap (the original path)
+  asof-scan   batched as-of merge join over mainnet_updates
+  asof-index  the same join over the vault_amounts derived table
+  replay      slot-ordered replay of bootstrap + mainnet updates
+  parallel    asof-index over --workers pool shards
+
+Statements are counted with the SQLite trace callback, which fires once per
+executemany row. Each path runs in a fresh process so peak RSS is its own
+(workers included for parallel, whose SQL runs in the workers and is not
+counted). With no --db a synthetic capture is generated first
+(gen-synthetic-capture.py) and each path's match count is checked against
+the generator's expectation.
+"""
+
+import argparse
+import importlib.util
+import multiprocessing
+import os
+import resource
+import sqlite3
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict
+
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+PATHS = ("per-swap", "asof-scan", "asof-index", "replay", "parallel")
+
+
+def load_script(name: str):
+    """Import a sibling script whose file name is not a valid module name."""
+    module_name = name.replace("-", "_")
+    spec = importlib.util.spec_from_file_location(module_name, os.path.join(SCRIPTS_DIR, f"{name}.py"))
+    module = importlib.util.module_from_spec(spec)
+    # Registered so pickle can resolve its functions (parallel path shards)
+    sys.modules[module_name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+def run_path(db_path: str, path: str, workers: int) -> Dict[str, float]:
+    """Child process entry point: time one validator path on db_path."""
+    validator = load_script("validate-cache-e2e")
+    conn = sqlite3.connect(db_path)
+    queries = 0
+
+    def count(_sql: str) -> None:
+        nonlocal queries
+        queries += 1
+
+    conn.set_trace_callback(count)
+
+    t0 = time.perf_counter()
+    swaps = validator.get_swaps_with_topologies(conn, venue="pumpswap")
+    load_s = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    if path in ("asof-index", "parallel"):
+        validator.refresh_vault_amounts(conn)
+    prep_s = time.perf_counter() - t0
+
+    queries = 0
+    t0 = time.perf_counter()
+    if path == "parallel":
+        # Spawned children default to spawn; fork so the shards inherit the loaded validator
+        multiprocessing.set_start_method("fork", force=True)
+        results = validator.validate_swaps_parallel(db_path, swaps, workers, method="asof", use_index=True)
+    else:
+        method = {"per-swap": "per-swap", "replay": "replay"}.get(path, "asof")
+        results = validator.validate_swaps(conn, swaps, method=method, use_index=path == "asof-index")
+    validate_s = time.perf_counter() - t0
+    conn.close()
+
+    peak_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if path == "parallel":
+        peak_kb = max(peak_kb, resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss)
+    return {
+        "swaps": len(swaps),
+        "matches_all": sum(1 for r in results if r.match),
+        "matches_single": sum(1 for r in results if r.match and r.swap.is_single_swap),
+        "load_s": load_s,
+        "prep_s": prep_s,
+        "validate_s": validate_s,
+        "queries": None if path == "parallel" else queries,
+        "peak_rss_mb": peak_kb / 1024,
+    }
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmark validate-cache-e2e.py paths")
+    parser.add_argument("--db", help="Existing capture.db to benchmark (default: generate a synthetic one)")
+    parser.add_argument("--paths", default=",".join(PATHS), help=f"Comma-separated paths to run (default {','.join(PATHS)})")
+    parser.add_argument("--workers", type=int, default=4, help="Workers for the parallel path (default 4)")
+    parser.add_argument("--pools", type=int, default=200, help="Synthetic pools (default 200)")
+    parser.add_argument("--swaps", type=int, default=50000, help="Synthetic swaps (default 50000)")
+    parser.add_argument("--multi-swap-rate", type=float, default=0.2, help="Synthetic multi-swap transaction rate (default 0.2)")
+    parser.add_argument("--mismatch-rate", type=float, default=0.05, help="Synthetic corrupted-output rate (default 0.05)")
+    parser.add_argument("--noise-updates", type=int, default=2, help="Synthetic redundant vault updates per transaction (default 2)")
+    parser.add_argument("--seed", type=int, default=7, help="Synthetic RNG seed (default 7)")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    paths = [p.strip() for p in args.paths.split(",") if p.strip()]
+    unknown = [p for p in paths if p not in PATHS]
+    if unknown:
+        sys.exit(f"Unknown path(s): {', '.join(unknown)} (choose from {', '.join(PATHS)})")
+
+    expected = None
+    tmpdir = None
+    db_path = args.db
+    if db_path is None:
+        tmpdir = tempfile.TemporaryDirectory(prefix="bench-e2e-")
+        db_path = os.path.join(tmpdir.name, "capture.db")
+        t0 = time.perf_counter()
+        expected = load_script("gen-synthetic-capture").generate_capture(
+            db_path, pools=args.pools, swaps=args.swaps, multi_swap_rate=args.multi_swap_rate,
+            mismatch_rate=args.mismatch_rate, noise_updates=args.noise_updates, seed=args.seed,
+        )
+        print(f"Generated {expected['swaps']} swaps over {expected['pools']} pools, "
+              f"{expected['mainnet_updates']} mainnet_updates in {time.perf_counter() - t0:.1f}s")
+    print(f"Capture: {db_path}")
+    print()
+
+    header = f"{'path':<11} {'swaps':>8} {'matches':>8} {'load s':>7} {'prep s':>7} {'valid s':>8} {'swaps/s':>9} {'queries':>8} {'peak MB':>8}"
+    print(header)
+    print("-" * len(header))
+    ctx = multiprocessing.get_context("spawn")
+    failed = False
+    for path in paths:
+        # A fresh interpreter per path keeps ru_maxrss (and SQLite's page cache) independent
+        with ProcessPoolExecutor(max_workers=1, mp_context=ctx) as pool:
+            r = pool.submit(run_path, db_path, path, args.workers).result()
+        rate = r["swaps"] / r["validate_s"] if r["validate_s"] > 0 else float("inf")
+        queries = "-" if r["queries"] is None else str(r["queries"])
+        print(f"{path:<11} {r['swaps']:>8} {r['matches_all']:>8} {r['load_s']:>7.2f} {r['prep_s']:>7.2f} "
+              f"{r['validate_s']:>8.2f} {rate:>9.0f} {queries:>8} {r['peak_rss_mb']:>8.1f}")
+        if expected is not None and (
+            r["matches_all"] != expected["expected_matches_all"]
+            or r["matches_single"] != expected["expected_matches_single"]
+        ):
+            failed = True
+            print(f"  ! expected {expected['expected_matches_all']} matches "
+                  f"({expected['expected_matches_single']} single-swap), got {r['matches_all']} ({r['matches_single']})")
+
+    if tmpdir is not None:
+        tmpdir.cleanup()
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
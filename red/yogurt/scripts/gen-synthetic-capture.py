@@ -0,0 +1,425 @@
+#!/usr/bin/env python3
+"""
+Synthetic capture.db generator
+
+Writes a capture.db with the schema of capture-evidence.ts and a PumpSwap
+workload whose swaps are consistent with CPMM math, so validate-cache-e2e.py
+has a known answer without a live capture:
+
+- every pool gets a frozen topology and its two vaults are bootstrapped
+  (bootstrap_updates) and published once on mainnet_updates before trading
+- each swap's actual_output_amount is cpmm_get_amount_out on the reserves
+  the vaults held before the swap's slot, and both vaults are re-published
+  at the swap's slot afterwards (a pool trades at most once per slot)
+- --mismatch-rate corrupts that fraction of outputs by >= 10 bps
+- --multi-swap-rate puts 2-3 swaps on distinct pools under one signature
+- --noise-updates adds redundant vault rewrites per swap to grow
+  mainnet_updates without changing state
+
+Expected match counts are printed at the end (and returned by
+generate_capture) for comparison with the validator's report.
+"""
+
+import argparse
+import base64
+import os
+import random
+import sqlite3
+import struct
+import time
+from typing import Dict, List
+
+# Tables and indexes as created by capture-evidence.ts (openDatabase)
+CAPTURE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS capture_sessions (
+    id TEXT PRIMARY KEY,
+    started_at INTEGER,
+    ended_at INTEGER,
+    script_name TEXT,
+    script_version TEXT,
+    script_hash TEXT,
+    grpc_endpoint TEXT,
+    shred_endpoint TEXT,
+    warmup_seconds INTEGER,
+    duration_seconds INTEGER,
+    stats_json TEXT,
+    grpc_subscription_start_slot INTEGER
+);
+
+CREATE TABLE IF NOT EXISTS mainnet_updates (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    session_id TEXT NOT NULL,
+    ingest_ts INTEGER,
+    slot INTEGER,
+    write_version TEXT,
+    pubkey TEXT,
+    owner TEXT,
+    data_b64 TEXT,
+    lamports TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_updates_session ON mainnet_updates(session_id);
+CREATE INDEX IF NOT EXISTS idx_updates_pubkey_slot ON mainnet_updates(pubkey, slot);
+
+CREATE TABLE IF NOT EXISTS cache_traces (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    session_id TEXT NOT NULL,
+    apply_ts INTEGER,
+    cache_type TEXT,
+    pubkey TEXT,
+    slot INTEGER,
+    write_version TEXT,
+    cache_key TEXT,
+    data_length INTEGER,
+    source TEXT,
+    rejected INTEGER DEFAULT 0,
+    existing_slot INTEGER,
+    evicted INTEGER DEFAULT 0,
+    out_of_frozen_range INTEGER DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS idx_traces_session ON cache_traces(session_id);
+CREATE INDEX IF NOT EXISTS idx_traces_pubkey_slot ON cache_traces(pubkey, slot);
+
+CREATE TABLE IF NOT EXISTS pending_shreds (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    session_id TEXT NOT NULL,
+    receive_ts INTEGER,
+    slot INTEGER,
+    signature TEXT,
+    raw_message_b64 TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_shreds_session ON pending_shreds(session_id);
+CREATE INDEX IF NOT EXISTS idx_shreds_sig ON pending_shreds(signature);
+
+CREATE TABLE IF NOT EXISTS mainnet_txs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    session_id TEXT NOT NULL,
+    confirm_ts INTEGER,
+    slot INTEGER,
+    signature TEXT,
+    accounts_json TEXT,
+    pre_balances_json TEXT,
+    post_balances_json TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_txs_session ON mainnet_txs(session_id);
+CREATE INDEX IF NOT EXISTS idx_txs_sig ON mainnet_txs(signature);
+
+CREATE TABLE IF NOT EXISTS parsed_swaps (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    session_id TEXT NOT NULL,
+    confirm_ts INTEGER,
+    slot INTEGER,
+    signature TEXT,
+    venue TEXT,
+    pool_pubkey TEXT,
+    direction INTEGER,
+    input_mint TEXT,
+    output_mint TEXT,
+    input_amount TEXT,
+    min_output_amount TEXT,
+    actual_output_amount TEXT,
+    tx_fee_lamports TEXT,
+    decode_success INTEGER DEFAULT 1,
+    instruction_index INTEGER DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS idx_swaps_session ON parsed_swaps(session_id);
+CREATE INDEX IF NOT EXISTS idx_swaps_venue ON parsed_swaps(venue);
+CREATE INDEX IF NOT EXISTS idx_swaps_pool ON parsed_swaps(pool_pubkey);
+CREATE INDEX IF NOT EXISTS idx_swaps_slot ON parsed_swaps(slot);
+
+CREATE TABLE IF NOT EXISTS topology_events (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    session_id TEXT NOT NULL,
+    event_ts INTEGER,
+    pool_pubkey TEXT,
+    slot INTEGER,
+    event_type TEXT,
+    prev_state TEXT,
+    new_state TEXT,
+    reason TEXT,
+    epoch INTEGER,
+    details TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_topo_events_session ON topology_events(session_id);
+CREATE INDEX IF NOT EXISTS idx_topo_events_pool ON topology_events(pool_pubkey);
+
+CREATE TABLE IF NOT EXISTS frozen_topologies (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    session_id TEXT NOT NULL,
+    pool_pubkey TEXT,
+    venue INTEGER,
+    frozen_at_slot INTEGER,
+    frozen_at_ms INTEGER,
+    vault_base TEXT,
+    vault_quote TEXT,
+    required_tick_arrays TEXT,
+    required_bin_arrays TEXT,
+    amm_config_pubkey TEXT,
+    epoch INTEGER,
+    tick_range_min INTEGER,
+    tick_range_max INTEGER,
+    bin_range_min INTEGER,
+    bin_range_max INTEGER
+);
+CREATE INDEX IF NOT EXISTS idx_frozen_session ON frozen_topologies(session_id);
+CREATE INDEX IF NOT EXISTS idx_frozen_pool ON frozen_topologies(pool_pubkey);
+
+CREATE TABLE IF NOT EXISTS stream_events (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    session_id TEXT NOT NULL,
+    event_ts INTEGER,
+    stream_type TEXT,
+    event_type TEXT,
+    last_slot_seen INTEGER,
+    error_message TEXT,
+    reconnect_attempt INTEGER,
+    rollback_depth INTEGER,
+    rollback_from_slot INTEGER
+);
+CREATE INDEX IF NOT EXISTS idx_stream_events_session ON stream_events(session_id);
+CREATE INDEX IF NOT EXISTS idx_stream_events_type ON stream_events(stream_type, event_type);
+
+CREATE TABLE IF NOT EXISTS snapshot_slot_consistency (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    session_id TEXT NOT NULL,
+    build_ts INTEGER,
+    pool_pubkey TEXT,
+    pool_slot INTEGER,
+    base_vault_slot INTEGER,
+    quote_vault_slot INTEGER,
+    min_tick_slot INTEGER,
+    min_bin_slot INTEGER,
+    slot_delta INTEGER,
+    is_consistent INTEGER,
+    build_success INTEGER
+);
+CREATE INDEX IF NOT EXISTS idx_slot_consistency_session ON snapshot_slot_consistency(session_id);
+CREATE INDEX IF NOT EXISTS idx_slot_consistency_pool ON snapshot_slot_consistency(pool_pubkey);
+CREATE INDEX IF NOT EXISTS idx_slot_consistency_delta ON snapshot_slot_consistency(slot_delta);
+
+CREATE TABLE IF NOT EXISTS bootstrap_updates (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    session_id TEXT NOT NULL,
+    fetch_ts INTEGER,
+    slot INTEGER,
+    pubkey TEXT,
+    owner TEXT,
+    data_b64 TEXT,
+    lamports TEXT,
+    executable INTEGER,
+    rent_epoch TEXT,
+    pool_pubkey TEXT,
+    account_type TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_bootstrap_session ON bootstrap_updates(session_id);
+CREATE INDEX IF NOT EXISTS idx_bootstrap_pubkey ON bootstrap_updates(pubkey);
+CREATE INDEX IF NOT EXISTS idx_bootstrap_pool ON bootstrap_updates(pool_pubkey);
+
+CREATE TABLE IF NOT EXISTS health_snapshots (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    session_id TEXT NOT NULL,
+    timestamp INTEGER,
+    healthy INTEGER,
+    orphan_buffer_size INTEGER,
+    orphan_reclaim_rate REAL,
+    orphan_ticks_claimed INTEGER,
+    orphan_bins_claimed INTEGER,
+    cache_healthy INTEGER
+);
+CREATE INDEX IF NOT EXISTS idx_health_session ON health_snapshots(session_id);
+
+CREATE TABLE IF NOT EXISTS validation_summary (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    session_id TEXT NOT NULL,
+    created_at INTEGER,
+    metric_name TEXT NOT NULL,
+    metric_category TEXT,
+    metric_value TEXT,
+    metric_count INTEGER,
+    metric_pct REAL,
+    details TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_validation_session ON validation_summary(session_id);
+CREATE INDEX IF NOT EXISTS idx_validation_metric ON validation_summary(metric_name);
+"""
+
+TOKEN_PROGRAM_HEX = "06ddf6e1d765a193d9cbe146ceeb79ac1cb485ed5f5b37913a8cf5857eff00a9"  # Tokenkeg...
+FEE_BPS = 25
+BATCH = 20000
+
+
+def cpmm_get_amount_out(amount_in: int, reserve_in: int, reserve_out: int, fee_bps: int = FEE_BPS) -> int:
+    """Same formula as validate-cache-e2e.py."""
+    amount_in_with_fee = amount_in * (10000 - fee_bps)
+    return amount_in_with_fee * reserve_out // (reserve_in * 10000 + amount_in_with_fee)
+
+
+def token_account_b64(mint: str, owner: str, amount: int) -> str:
+    """165-byte SPL token account with mint, owner and amount set."""
+    data = bytes.fromhex(mint) + bytes.fromhex(owner) + struct.pack('<Q', amount) + bytes(93)
+    return base64.b64encode(data).decode()
+
+
+def generate_capture(
+    path: str,
+    pools: int = 100,
+    swaps: int = 10000,
+    multi_swap_rate: float = 0.2,
+    mismatch_rate: float = 0.05,
+    noise_updates: int = 0,
+    seed: int = 7,
+) -> Dict[str, int]:
+    """Write a synthetic capture to path (replacing it) and return its counts and expected matches."""
+    rng = random.Random(seed)
+    if os.path.exists(path):
+        os.remove(path)
+    conn = sqlite3.connect(path)
+    conn.executescript(CAPTURE_SCHEMA)
+
+    session_id = f"synthetic-{seed}"
+    now_ms = int(time.time() * 1000)
+    start_slot = 300_000_000
+
+    def key() -> str:
+        return rng.getrandbits(256).to_bytes(32, 'big').hex()
+
+    # pool -> [vault_base, vault_quote, base_mint, quote_mint, reserve_base, reserve_quote, last_swap_slot]
+    state: Dict[str, list] = {}
+    for _ in range(pools):
+        state[key()] = [key(), key(), key(), key(), rng.randint(10**9, 10**13), rng.randint(10**9, 10**13), None]
+
+    updates: List[tuple] = []
+    swap_rows: List[tuple] = []
+    write_version = 1
+    counts = {
+        "pools": pools, "swaps": 0, "transactions": 0, "mainnet_updates": 0,
+        "expected_matches_single": 0, "expected_matches_all": 0, "single_swaps": 0,
+    }
+
+    def publish(slot: int, vault: str, mint: str, pool: str, amount: int) -> None:
+        nonlocal write_version
+        updates.append((session_id, now_ms, slot, str(write_version), vault, TOKEN_PROGRAM_HEX,
+                        token_account_b64(mint, pool, amount), "2039280"))
+        write_version += 1
+
+    def flush(force: bool = False) -> None:
+        if updates and (force or len(updates) >= BATCH):
+            conn.executemany("""
+                INSERT INTO mainnet_updates (session_id, ingest_ts, slot, write_version, pubkey, owner, data_b64, lamports)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            """, updates)
+            counts["mainnet_updates"] += len(updates)
+            updates.clear()
+        if swap_rows and (force or len(swap_rows) >= BATCH):
+            conn.executemany("""
+                INSERT INTO parsed_swaps (session_id, confirm_ts, slot, signature, venue, pool_pubkey, direction, input_mint, output_mint,
+                                          input_amount, min_output_amount, actual_output_amount, tx_fee_lamports, decode_success, instruction_index)
+                VALUES (?, ?, ?, ?, 'pumpswap', ?, ?, ?, ?, ?, ?, ?, '5000', 1, ?)
+            """, swap_rows)
+            swap_rows.clear()
+
+    conn.execute("""
+        INSERT INTO capture_sessions (id, started_at, script_name, script_version, grpc_subscription_start_slot)
+        VALUES (?, ?, 'gen-synthetic-capture.py', 'synthetic', ?)
+    """, (session_id, now_ms, start_slot))
+    for pool, (vault_base, vault_quote, base_mint, quote_mint, reserve_base, reserve_quote, _) in state.items():
+        conn.execute("""
+            INSERT INTO frozen_topologies (session_id, pool_pubkey, venue, frozen_at_slot, frozen_at_ms, vault_base, vault_quote,
+                                           required_tick_arrays, required_bin_arrays, epoch)
+            VALUES (?, ?, 0, ?, ?, ?, ?, '[]', '[]', 0)
+        """, (session_id, pool, start_slot, now_ms, vault_base, vault_quote))
+        for vault, mint, amount in ((vault_base, base_mint, reserve_base), (vault_quote, quote_mint, reserve_quote)):
+            conn.execute("""
+                INSERT INTO bootstrap_updates (session_id, fetch_ts, slot, pubkey, owner, data_b64, lamports, executable, rent_epoch, pool_pubkey, account_type)
+                VALUES (?, ?, ?, ?, ?, ?, '2039280', 0, '0', ?, 'vault')
+            """, (session_id, now_ms, start_slot - 1, vault, TOKEN_PROGRAM_HEX, token_account_b64(mint, pool, amount), pool))
+            publish(start_slot, vault, mint, pool, amount)
+
+    pool_keys = list(state)
+    slot = start_slot
+    while counts["swaps"] < swaps:
+        n = 1 if rng.random() >= multi_swap_rate else rng.randint(2, 3)
+        n = min(n, swaps - counts["swaps"], len(pool_keys))
+        tx_pools = rng.sample(pool_keys, n)
+        slot += rng.choice((0, 1, 1, 2))
+        if slot == start_slot or any(state[p][6] == slot for p in tx_pools):
+            slot += 1
+        counts["transactions"] += 1
+        signature = f"synthetic{counts['transactions']:012d}"
+
+        for index, pool in enumerate(tx_pools):
+            entry = state[pool]
+            vault_base, vault_quote, base_mint, quote_mint, reserve_base, reserve_quote, _ = entry
+            direction = rng.randint(0, 1)
+            reserve_in, reserve_out = (reserve_base, reserve_quote) if direction == 0 else (reserve_quote, reserve_base)
+            amount_in = max(1000, int(reserve_in * rng.uniform(1e-6, 1e-2)))
+            amount_out = cpmm_get_amount_out(amount_in, reserve_in, reserve_out)
+            if amount_out <= 0:
+                continue
+            corrupted = rng.random() < mismatch_rate
+            reported = int(amount_out * (1 + rng.uniform(0.001, 0.05))) + 1 if corrupted else amount_out
+
+            input_mint, output_mint = (base_mint, quote_mint) if direction == 0 else (quote_mint, base_mint)
+            swap_rows.append((session_id, now_ms, slot, signature, pool, direction, input_mint, output_mint,
+                              str(amount_in), str(amount_out * 99 // 100), str(reported), index))
+            counts["swaps"] += 1
+            if not corrupted:
+                counts["expected_matches_all"] += 1
+                if n == 1:
+                    counts["expected_matches_single"] += 1
+            if n == 1:
+                counts["single_swaps"] += 1
+
+            if direction == 0:
+                entry[4], entry[5] = reserve_base + amount_in, reserve_quote - amount_out
+            else:
+                entry[4], entry[5] = reserve_base - amount_out, reserve_quote + amount_in
+            entry[6] = slot
+            publish(slot, vault_base, base_mint, pool, entry[4])
+            publish(slot, vault_quote, quote_mint, pool, entry[5])
+
+        for _ in range(noise_updates):
+            pool = rng.choice(pool_keys)
+            entry = state[pool]
+            if rng.random() < 0.5:
+                publish(slot, entry[0], entry[2], pool, entry[4])
+            else:
+                publish(slot, entry[1], entry[3], pool, entry[5])
+        flush()
+
+    flush(force=True)
+    conn.execute("UPDATE capture_sessions SET ended_at = ? WHERE id = ?", (now_ms, session_id))
+    conn.commit()
+    conn.close()
+    return counts
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Generate a synthetic, CPMM-consistent capture.db")
+    parser.add_argument("out", help="Output path (replaced if it exists)")
+    parser.add_argument("--pools", type=int, default=100, help="Number of PumpSwap pools (default 100)")
+    parser.add_argument("--swaps", type=int, default=10000, help="Number of parsed swaps (default 10000)")
+    parser.add_argument("--multi-swap-rate", type=float, default=0.2, help="Fraction of transactions with 2-3 swaps (default 0.2)")
+    parser.add_argument("--mismatch-rate", type=float, default=0.05, help="Fraction of swaps with a corrupted output (default 0.05)")
+    parser.add_argument("--noise-updates", type=int, default=0, help="Redundant vault updates per transaction (default 0)")
+    parser.add_argument("--seed", type=int, default=7, help="RNG seed (default 7)")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    t0 = time.time()
+    counts = generate_capture(
+        args.out, pools=args.pools, swaps=args.swaps, multi_swap_rate=args.multi_swap_rate,
+        mismatch_rate=args.mismatch_rate, noise_updates=args.noise_updates, seed=args.seed,
+    )
+    print(f"Wrote {args.out} in {time.time() - t0:.1f}s")
+    print(f"  pools:            {counts['pools']}")
+    print(f"  transactions:     {counts['transactions']}")
+    print(f"  swaps:            {counts['swaps']} ({counts['single_swaps']} in single-swap transactions)")
+    print(f"  mainnet_updates:  {counts['mainnet_updates']}")
+    print(f"Expected matches: single-swap {counts['expected_matches_single']}/{counts['single_swaps']}, "
+          f"all {counts['expected_matches_all']}/{counts['swaps']}")
+
+
+if __name__ == "__main__":
+    main()
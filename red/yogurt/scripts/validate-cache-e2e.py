@@ -13,15 +13,80 @@ Methodology:
    - Compare calculated amountOut to actual_output_amount from parsed_swaps
 
 For PumpSwap, feeBps = 25
+
+Step 1's "most recent update before the slot" is resolved by default with a
+batched as-of merge join (one ordered scan per vault) over vault_amounts, a
+derived table of decoded token amounts kept in sync with mainnet_updates
+from a high-water id; --no-vault-index scans mainnet_updates directly and
+--per-swap keeps the original one-query-per-vault-per-swap path, and
+--replay instead replays vault updates and swaps in slot order against an
+in-memory cache with the live bot's (slot, write_version) staleness rule.
+--workers N validates pool-hash shards in parallel on read-only connections.
+
+--venue raydiumClmm validates Raydium CLMM swaps instead: the pool account
+and the frozen topology's required tick arrays are resolved as of each swap
+slot (bootstrap_updates + mainnet_updates) and fed to a Python port of
+simulateClmm, with decoded tick arrays held in a (pubkey, slot) LRU.
+
+--venue meteoraDlmm replays LbPair and the frozen bin arrays in slot order
+into a version-keyed cache (each account decoded once per update) and runs
+a port of simulateDlmm with its dynamic fee.
+Both look up tick/bin-array addresses in array_headers, a derived
+pubkey -> (pool, index) table kept in sync like vault_amounts; --per-swap
+and --replay apply to pumpswap only.
+
+Per-swap results are saved to validation_results and per-mode metrics to
+validation_summary; a rerun reuses saved results whose swap slot precedes
+every capture row added since (--revalidate to recompute, --no-save to
+leave the capture untouched).
 """
 
+import argparse
+import heapq
+import json
+import os
 import sqlite3
 import base64
 import struct
+import time
+import urllib.parse
+import zlib
+from collections import OrderedDict, defaultdict
+from concurrent.futures import ProcessPoolExecutor
 from dataclasses import dataclass
-from typing import Optional, Tuple
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple, Union
 import sys
 
+try:
+    sys.path.insert(0, str(Path(__file__).resolve().parents[3] / "src" / "validator"))
+    from stage_profile import StageProfiler, add_profile_args
+except (ImportError, IndexError):  # outside the monorepo: run without --profile / --mem-report
+    from contextlib import nullcontext
+
+    class _NullStage:
+        def add(self, records_in: int = 0, records_out: int = 0, bytes_in: int = 0) -> None:
+            pass
+
+    class StageProfiler:  # type: ignore[no-redef]
+        """No-op stand-in for stage_profile.StageProfiler."""
+
+        @classmethod
+        def from_args(cls, args: argparse.Namespace, script: str) -> "StageProfiler":
+            return cls()
+
+        def stage(self, name: str):
+            return nullcontext(_NullStage())
+
+    def add_profile_args(parser: argparse.ArgumentParser) -> None:
+        pass
+
+try:
+    import numpy as np
+except ImportError:  # batch CPMM falls back to the per-swap Python path
+    np = None
+
 DB_PATH = "data/evidence/capture.db"
 
 @dataclass
@@ -35,6 +100,7 @@ class SwapData:
     vault_quote: str
     signature: str
     is_single_swap: bool = True
+    swap_id: int = 0  # parsed_swaps.id
 
 @dataclass
 class VaultState:
@@ -52,6 +118,7 @@ class ValidationResult:
     error_bps: Optional[float]
     match: bool
     failure_reason: Optional[str]
+    pool_state: Optional[Union["ClmmPoolState", "DlmmPoolState"]] = None  # CLMM / DLMM swaps only
 
 
 def decode_token_account_amount(data_b64: str) -> int:
@@ -87,6 +154,154 @@ def cpmm_get_amount_out(amount_in: int, reserve_in: int, reserve_out: int, fee_b
     return numerator // denominator
 
 
+_U32 = 0xFFFFFFFF
+
+
+def _mul_u64(a, b):
+    """Full 64x64 -> 128-bit product of uint64 arrays as (hi, lo)."""
+    a0, a1 = a & _U32, a >> np.uint64(32)
+    b0, b1 = b & _U32, b >> np.uint64(32)
+    p00, p01, p10, p11 = a0 * b0, a0 * b1, a1 * b0, a1 * b1
+    mid = (p00 >> np.uint64(32)) + (p01 & _U32) + (p10 & _U32)
+    lo = (p00 & _U32) | (mid << np.uint64(32))
+    hi = p11 + (p01 >> np.uint64(32)) + (p10 >> np.uint64(32)) + (mid >> np.uint64(32))
+    return hi, lo
+
+
+def _mul_u64_small(a, s):
+    """a * s as (hi, lo) for uint64 a and multipliers s < 2^32."""
+    hi = ((a >> np.uint64(32)) * s + (((a & _U32) * s) >> np.uint64(32))) >> np.uint64(32)
+    return hi, a * s
+
+
+def _mul128_u64(hi, lo, b, small: bool = False):
+    """(hi, lo) * b mod 2^128 (small: every b < 2^32)."""
+    phi, plo = _mul_u64_small(lo, b) if small else _mul_u64(lo, b)
+    return phi + hi * b, plo
+
+
+def _add128(ah, al, bh, bl):
+    lo = al + bl
+    return ah + bh + (lo < al).astype(np.uint64), lo
+
+
+def _sub128(ah, al, bh, bl):
+    return ah - bh - (al < bl).astype(np.uint64), al - bl
+
+
+def _to_float128(hi, lo, signed: bool = False):
+    """Approximate a (hi, lo) pair as float64 (two's complement when signed)."""
+    high = hi.view(np.int64).astype(np.float64) if signed else hi.astype(np.float64)
+    return high * 18446744073709551616.0 + lo.astype(np.float64)
+
+
+def cpmm_get_amount_out_batch(amount_in, reserve_in, reserve_out, fee_bps) -> List[int]:
+    """
+    Vectorised cpmm_get_amount_out with identical floor semantics.
+
+    Operands are u64; the numerator is formed exactly as a 128-bit (hi, lo)
+    pair. The quotient is estimated in float64 and then corrected using the
+    exact 128-bit remainder, so the result equals the integer floor. Rows
+    whose numerator may not fit in u128 (or that fail to settle) are
+    recomputed with Python ints. Without numpy this is a plain loop.
+    """
+    n = len(amount_in)
+    if np is None or n == 0:
+        return [cpmm_get_amount_out(a, ri, ro, f) for a, ri, ro, f in zip(amount_in, reserve_in, reserve_out, fee_bps)]
+
+    fallback = np.zeros(n, dtype=bool)
+
+    def as_u64(values):
+        try:
+            return np.array(values, dtype=np.uint64)
+        except OverflowError:
+            pass
+        arr = np.zeros(n, dtype=np.uint64)
+        for i, v in enumerate(values):
+            if 0 <= v < 1 << 64:
+                arr[i] = v
+            else:
+                fallback[i] = True
+        return arr
+
+    a, ri, ro = as_u64(amount_in), as_u64(reserve_in), as_u64(reserve_out)
+    fee = np.asarray(fee_bps, dtype=np.int64)
+    fallback |= (fee < 0) | (fee > 10000)
+    w = np.where(fallback, 0, 10000 - fee).astype(np.uint64)
+
+    with np.errstate(over="ignore", divide="ignore", invalid="ignore"):
+        ah, al = _mul_u64_small(a, w)                # amount_in_with_fee, < 2^78
+        nh, nl = _mul128_u64(ah, al, ro)             # numerator mod 2^128
+        th, tl = _mul_u64_small(ri, np.uint64(10000))
+        dh, dl = _add128(th, tl, ah, al)             # denominator, < 2^79
+
+        num_f = a.astype(np.float64) * w.astype(np.float64) * ro.astype(np.float64)
+        den_f = _to_float128(dh, dl)
+        fallback |= num_f >= 2.0 ** 127
+        zero = (ri == 0) | (ro == 0) | ((dh == 0) & (dl == 0))
+
+        q_f = np.floor(num_f / np.where(den_f > 0, den_f, 1.0))
+        q = np.clip(q_f, 0, 2.0 ** 64 - 4096).astype(np.uint64)
+
+        # r = num - q*den (exact, small relative to den * 2^14)
+        ph, pl = _mul128_u64(dh, dl, q)
+        rh, rl = _sub128(nh, nl, ph, pl)
+        k_f = np.floor(_to_float128(rh, rl, signed=True) / np.where(den_f > 0, den_f, 1.0))
+        fallback |= np.abs(k_f) >= 2.0 ** 31
+        k = np.where(np.abs(k_f) < 2.0 ** 31, k_f, 0).astype(np.int64)
+        kh, kl = _mul128_u64(dh, dl, np.abs(k).astype(np.uint64), small=True)
+        pos = k >= 0
+        sh, sl = _sub128(rh, rl, kh, kl)
+        uh, ul = _add128(rh, rl, kh, kl)
+        rh, rl = np.where(pos, sh, uh), np.where(pos, sl, ul)
+        q = (q.view(np.int64) + k).view(np.uint64)
+
+        for _ in range(2):
+            neg = rh.view(np.int64) < 0
+            q = np.where(neg, q - np.uint64(1), q)
+            ah2, al2 = _add128(rh, rl, dh, dl)
+            rh, rl = np.where(neg, ah2, rh), np.where(neg, al2, rl)
+            ge = ~neg & ((rh > dh) | ((rh == dh) & (rl >= dl)))
+            q = np.where(ge, q + np.uint64(1), q)
+            sh2, sl2 = _sub128(rh, rl, dh, dl)
+            rh, rl = np.where(ge, sh2, rh), np.where(ge, sl2, rl)
+        unsettled = (rh.view(np.int64) < 0) | (rh > dh) | ((rh == dh) & (rl >= dl))
+        fallback |= unsettled & ~zero
+
+    out = np.where(zero, np.uint64(0), q).tolist()
+    for i in np.flatnonzero(fallback).tolist():
+        out[i] = cpmm_get_amount_out(amount_in[i], reserve_in[i], reserve_out[i], fee_bps[i])
+    return out
+
+
+def error_bps_batch(calculated: List[int], actual: List[int]) -> List[Optional[float]]:
+    """
+    abs(calculated - actual) * 10000 / actual per row, None where actual <= 0.
+
+    Rows whose operands are exact in float64 (< 2^53) are divided as arrays;
+    IEEE division is correctly rounded, so they equal Python's int / int.
+    Larger rows use Python ints.
+    """
+    if np is None:
+        return [abs(c - a) * 10000 / a if a > 0 else None for c, a in zip(calculated, actual)]
+    exact_limit = 1 << 53
+    c = np.array([v if abs(v) < exact_limit else 0 for v in calculated], dtype=np.float64)
+    a = np.array([v if abs(v) < exact_limit else 0 for v in actual], dtype=np.float64)
+    diff = np.abs(c - a) * 10000.0
+    with np.errstate(divide="ignore", invalid="ignore"):
+        err = diff / a
+    slow = (diff >= exact_limit) | np.array(
+        [abs(x) >= exact_limit or abs(y) >= exact_limit for x, y in zip(calculated, actual)], dtype=bool
+    )
+    out: List[Optional[float]] = err.tolist()
+    for i, act in enumerate(actual):
+        if act <= 0:
+            out[i] = None
+        elif slow[i]:
+            out[i] = abs(calculated[i] - act) * 10000 / act
+    return out
+
+
 def get_vault_state_before_slot(conn: sqlite3.Connection, vault_pubkey: str, before_slot: int) -> Optional[VaultState]:
     """Get the most recent vault state before a given slot."""
     cursor = conn.cursor()
@@ -111,12 +326,281 @@ def get_vault_state_before_slot(conn: sqlite3.Connection, vault_pubkey: str, bef
         return None
 
 
-def validate_swap(conn: sqlite3.Connection, swap: SwapData) -> ValidationResult:
-    """Validate a single swap using cache state."""
+VAULT_AMOUNTS_SCHEMA = """
+CREATE TABLE IF NOT EXISTS vault_amounts (
+    pubkey TEXT NOT NULL,
+    slot INTEGER NOT NULL,
+    write_version TEXT,
+    amount INTEGER,
+    PRIMARY KEY (pubkey, slot)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS vault_amounts_pubkeys (
+    pubkey TEXT PRIMARY KEY
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS derived_watermarks (
+    table_name TEXT PRIMARY KEY,
+    last_id INTEGER NOT NULL
+);
+"""
 
-    # Get vault states before the swap
-    base_vault = get_vault_state_before_slot(conn, swap.vault_base, swap.swap_slot)
-    quote_vault = get_vault_state_before_slot(conn, swap.vault_quote, swap.swap_slot)
+
+def refresh_vault_amounts(conn: sqlite3.Connection, batch_size: int = 50000) -> Dict[str, int]:
+    """
+    Incrementally maintain vault_amounts from mainnet_updates.
+
+    Covers every vault referenced by frozen_topologies. Vaults seen for the
+    first time are backfilled up to the stored high-water id, then all
+    tracked vaults are advanced past it. Rows are applied in id order, so for
+    a given (pubkey, slot) the highest id wins, the same row the as-of query
+    on mainnet_updates resolves to. Undecodable rows are stored with a NULL
+    amount so they still shadow older state, as the per-swap path does.
+    """
+    conn.executescript(VAULT_AMOUNTS_SCHEMA)
+    row = conn.execute("SELECT last_id FROM derived_watermarks WHERE table_name = 'vault_amounts'").fetchone()
+    last_id = row[0] if row else 0
+    max_id = conn.execute("SELECT COALESCE(MAX(id), 0) FROM mainnet_updates").fetchone()[0]
+
+    new_vaults = [r[0] for r in conn.execute("""
+        SELECT vault FROM (
+            SELECT vault_base AS vault FROM frozen_topologies
+            UNION
+            SELECT vault_quote FROM frozen_topologies
+        )
+        WHERE vault IS NOT NULL
+        AND vault NOT IN (SELECT pubkey FROM vault_amounts_pubkeys)
+    """)]
+
+    stats = {"new_vaults": len(new_vaults), "rows": 0, "last_id": max_id}
+    upsert = "INSERT OR REPLACE INTO vault_amounts (pubkey, slot, write_version, amount) VALUES (?, ?, ?, ?)"
+
+    def apply(cursor: sqlite3.Cursor) -> None:
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                return
+            out = []
+            for pubkey, slot, write_version, data_b64 in rows:
+                try:
+                    amount = decode_token_account_amount(data_b64)
+                except Exception:
+                    amount = None
+                if amount is not None and amount >= 1 << 63:
+                    amount = str(amount)
+                out.append((pubkey, slot, write_version, amount))
+            conn.executemany(upsert, out)
+            stats["rows"] += len(out)
+
+    with conn:
+        if new_vaults:
+            conn.executemany("INSERT OR IGNORE INTO vault_amounts_pubkeys (pubkey) VALUES (?)", [(v,) for v in new_vaults])
+            if last_id > 0:
+                for i in range(0, len(new_vaults), 500):
+                    chunk = new_vaults[i:i + 500]
+                    placeholders = ",".join("?" * len(chunk))
+                    apply(conn.execute(f"""
+                        SELECT pubkey, slot, write_version, data_b64
+                        FROM mainnet_updates
+                        WHERE id <= ? AND pubkey IN ({placeholders})
+                        ORDER BY id
+                    """, (last_id, *chunk)))
+        if max_id > last_id:
+            apply(conn.execute("""
+                SELECT pubkey, slot, write_version, data_b64
+                FROM mainnet_updates
+                WHERE id > ? AND id <= ?
+                AND pubkey IN (SELECT pubkey FROM vault_amounts_pubkeys)
+                ORDER BY id
+            """, (last_id, max_id)))
+        conn.execute(
+            "INSERT OR REPLACE INTO derived_watermarks (table_name, last_id) VALUES ('vault_amounts', ?)",
+            (max_id,),
+        )
+    return stats
+
+
+def vault_amounts_current(conn: sqlite3.Connection) -> bool:
+    """True if vault_amounts covers every topology vault up to the current mainnet_updates high-water id."""
+    try:
+        row = conn.execute("SELECT last_id FROM derived_watermarks WHERE table_name = 'vault_amounts'").fetchone()
+        max_id = conn.execute("SELECT COALESCE(MAX(id), 0) FROM mainnet_updates").fetchone()[0]
+        missing = conn.execute("""
+            SELECT 1 FROM (
+                SELECT vault_base AS vault FROM frozen_topologies
+                UNION
+                SELECT vault_quote FROM frozen_topologies
+            )
+            WHERE vault IS NOT NULL
+            AND vault NOT IN (SELECT pubkey FROM vault_amounts_pubkeys)
+            LIMIT 1
+        """).fetchone()
+    except sqlite3.OperationalError:
+        return False
+    return row is not None and row[0] == max_id and missing is None
+
+
+def get_vault_states_asof(
+    conn: sqlite3.Connection,
+    swaps: List[SwapData],
+    use_index: bool = False,
+) -> Dict[Tuple[str, int], Optional[VaultState]]:
+    """
+    Batched equivalent of get_vault_state_before_slot for every (vault, slot)
+    the swaps need.
+
+    Query slots are grouped per vault and sorted, then merge-joined against a
+    single (slot, id)-ordered scan of that vault's mainnet_updates, so the
+    work is O(N + M) with one query per vault. Ties within a slot resolve to
+    the highest id, matching the backward index scan of the per-swap query.
+    Each chosen row is decoded once, however many swaps share it. With
+    use_index the scan reads pre-decoded amounts from vault_amounts instead
+    (see refresh_vault_amounts).
+    """
+    wanted: Dict[str, set] = defaultdict(set)
+    for swap in swaps:
+        wanted[swap.vault_base].add(swap.swap_slot)
+        wanted[swap.vault_quote].add(swap.swap_slot)
+
+    states: Dict[Tuple[str, int], Optional[VaultState]] = {}
+    cursor = conn.cursor()
+    for vault, slot_set in wanted.items():
+        slots = sorted(slot_set)
+        if use_index:
+            cursor.execute("""
+                SELECT slot, slot, amount
+                FROM vault_amounts
+                WHERE pubkey = ? AND slot < ?
+                ORDER BY slot
+            """, (vault, slots[-1]))
+        else:
+            cursor.execute("""
+                SELECT id, slot, data_b64
+                FROM mainnet_updates
+                WHERE pubkey = ? AND slot < ?
+                ORDER BY slot, id
+            """, (vault, slots[-1]))
+
+        current = None  # (id, slot, data_b64) of the latest row before the query slot
+        decoded: Dict[int, Optional[VaultState]] = {}
+        row = cursor.fetchone()
+        for query_slot in slots:
+            while row is not None and row[1] < query_slot:
+                current = row
+                row = cursor.fetchone()
+            if current is None:
+                states[(vault, query_slot)] = None
+                continue
+            row_id, slot, data_b64 = current
+            if row_id not in decoded and use_index:
+                decoded[row_id] = VaultState(pubkey=vault, slot=slot, amount=int(data_b64)) if data_b64 is not None else None
+            elif row_id not in decoded:
+                try:
+                    decoded[row_id] = VaultState(pubkey=vault, slot=slot, amount=decode_token_account_amount(data_b64))
+                except Exception as e:
+                    print(f"Error decoding vault {vault}: {e}", file=sys.stderr)
+                    decoded[row_id] = None
+            states[(vault, query_slot)] = decoded[row_id]
+    return states
+
+
+REPLAY_BATCH = 10000
+
+_UNDECODED = object()
+
+
+def _iter_ordered(cursor: sqlite3.Cursor):
+    while True:
+        rows = cursor.fetchmany(REPLAY_BATCH)
+        if not rows:
+            return
+        yield from rows
+
+
+def _replay_stream(conn: sqlite3.Connection, pubkeys: List[str]):
+    """
+    (slot, write_version, pubkey, data_b64) rows of bootstrap_updates
+    (write_version 0) and mainnet_updates for pubkeys, merged into one
+    (slot, write_version)-ordered stream.
+    """
+    conn.execute("CREATE TEMP TABLE IF NOT EXISTS replay_accounts (pubkey TEXT PRIMARY KEY)")
+    conn.execute("DELETE FROM replay_accounts")
+    conn.executemany("INSERT OR IGNORE INTO replay_accounts (pubkey) VALUES (?)", [(p,) for p in pubkeys])
+
+    bootstrap = _iter_ordered(conn.execute("""
+        SELECT b.slot, 0, b.pubkey, b.data_b64
+        FROM bootstrap_updates b
+        INNER JOIN replay_accounts r ON b.pubkey = r.pubkey
+        ORDER BY b.slot, b.id
+    """))
+    updates = _iter_ordered(conn.cursor().execute("""
+        SELECT u.slot, COALESCE(CAST(u.write_version AS INTEGER), 0), u.pubkey, u.data_b64
+        FROM mainnet_updates u
+        INNER JOIN replay_accounts r ON u.pubkey = r.pubkey
+        ORDER BY u.slot, COALESCE(CAST(u.write_version AS INTEGER), 0), u.id
+    """))
+    return heapq.merge(bootstrap, updates, key=lambda row: (row[0], row[1]))
+
+
+def replay_vault_states(
+    conn: sqlite3.Connection,
+    swaps: List[SwapData],
+    stats: Optional[Dict[str, int]] = None,
+) -> Tuple[List[Optional[VaultState]], List[Optional[VaultState]]]:
+    """
+    Slot-ordered replay of vault updates against the swaps.
+
+    bootstrap_updates (write_version 0) and mainnet_updates for the swaps'
+    vaults are merged into one (slot, write_version) stream and applied to an
+    in-memory dict with the staleness rule of yogurt/src/cache/vault.ts: an
+    update wins only if (slot, write_version) is newer than what is held.
+    Swaps must be in slot order; each sees every update from slots before
+    its own, i.e. what the live cache would have held. Amounts are decoded
+    lazily, only when a swap reads them. One linear pass over both tables.
+    """
+    stream = _replay_stream(conn, [v for swap in swaps for v in (swap.vault_base, swap.vault_quote)])
+
+    # pubkey -> [slot, write_version, data_b64, decoded VaultState | None | _UNDECODED]
+    cache: Dict[str, list] = {}
+    applied = stale = 0
+
+    def read(vault: str) -> Optional[VaultState]:
+        entry = cache.get(vault)
+        if entry is None:
+            return None
+        if entry[3] is _UNDECODED:
+            try:
+                entry[3] = VaultState(pubkey=vault, slot=entry[0], amount=decode_token_account_amount(entry[2]))
+            except Exception as e:
+                print(f"Error decoding vault {vault}: {e}", file=sys.stderr)
+                entry[3] = None
+        return entry[3]
+
+    bases: List[Optional[VaultState]] = []
+    quotes: List[Optional[VaultState]] = []
+    pending = next(stream, None)
+    last_slot = None
+    for swap in swaps:
+        if last_slot is not None and swap.swap_slot < last_slot:
+            raise ValueError("replay_vault_states requires swaps sorted by slot")
+        last_slot = swap.swap_slot
+        while pending is not None and pending[0] < swap.swap_slot:
+            slot, write_version, pubkey, data_b64 = pending
+            existing = cache.get(pubkey)
+            if existing is not None and (slot, write_version) <= (existing[0], existing[1]):
+                stale += 1
+            else:
+                cache[pubkey] = [slot, write_version, data_b64, _UNDECODED]
+                applied += 1
+            pending = next(stream, None)
+        bases.append(read(swap.vault_base))
+        quotes.append(read(swap.vault_quote))
+
+    if stats is not None:
+        stats.update({"applied": applied, "stale": stale, "vaults": len(cache)})
+    return bases, quotes
+
+
+def evaluate_swap(swap: SwapData, base_vault: Optional[VaultState], quote_vault: Optional[VaultState]) -> ValidationResult:
+    """Run CPMM math for a swap against the given vault states."""
 
     # Check if we have both vault states
     if base_vault is None or quote_vault is None:
@@ -177,59 +661,1189 @@ def validate_swap(conn: sqlite3.Connection, swap: SwapData) -> ValidationResult:
     )
 
 
-def get_swaps_with_topologies(conn: sqlite3.Connection, venue: str = 'pumpswap', single_swap_only: bool = False, limit: int = None) -> list[SwapData]:
-    """Get swaps joined with their frozen topologies."""
+def evaluate_swaps_batch(
+    swaps: List[SwapData],
+    bases: List[Optional[VaultState]],
+    quotes: List[Optional[VaultState]],
+) -> List[ValidationResult]:
+    """Array form of evaluate_swap: one batched CPMM and error pass for all swaps with state."""
+    results: List[Optional[ValidationResult]] = [None] * len(swaps)
+    rows = []
+    for i, (swap, base_vault, quote_vault) in enumerate(zip(swaps, bases, quotes)):
+        if base_vault is None or quote_vault is None:
+            results[i] = evaluate_swap(swap, base_vault, quote_vault)
+        else:
+            rows.append(i)
+
+    amount_in, reserve_in, reserve_out = [], [], []
+    for i in rows:
+        swap = swaps[i]
+        if swap.direction == 0:
+            reserve_in.append(bases[i].amount)
+            reserve_out.append(quotes[i].amount)
+        else:
+            reserve_in.append(quotes[i].amount)
+            reserve_out.append(bases[i].amount)
+        amount_in.append(swap.input_amount)
+
+    calculated = cpmm_get_amount_out_batch(amount_in, reserve_in, reserve_out, [25] * len(rows))
+    errors = error_bps_batch(calculated, [swaps[i].actual_output for i in rows])
+
+    for i, calculated_output, error_bps in zip(rows, calculated, errors):
+        match = error_bps is not None and error_bps <= 1
+        failure_reason = None
+        if not match:
+            if error_bps is not None:
+                failure_reason = f"Error {error_bps:.2f} bps"
+            else:
+                failure_reason = "Cannot calculate error (zero actual output)"
+        results[i] = ValidationResult(
+            swap=swaps[i],
+            base_vault_state=bases[i],
+            quote_vault_state=quotes[i],
+            calculated_output=calculated_output,
+            actual_output=swaps[i].actual_output,
+            error_bps=error_bps,
+            match=match,
+            failure_reason=failure_reason
+        )
+    return results
+
+
+def validate_swap(conn: sqlite3.Connection, swap: SwapData) -> ValidationResult:
+    """Validate a single swap using cache state (one point query per vault)."""
+
+    # Get vault states before the swap
+    base_vault = get_vault_state_before_slot(conn, swap.vault_base, swap.swap_slot)
+    quote_vault = get_vault_state_before_slot(conn, swap.vault_quote, swap.swap_slot)
+    return evaluate_swap(swap, base_vault, quote_vault)
+
+
+# ============================================================================
+# RAYDIUM CLMM
+# ============================================================================
+
+RAYDIUM_CLMM_PROGRAM_HEX = "a5d5ca9e04cf5db590b714ba2fe32cb159133fc1c192b72257fd07d39cb0401e"  # CAMMCzo5...
+CLMM_POOL_DISC = bytes.fromhex("f7ede3f5d7c3de46")
+CLMM_POOL_MIN_SIZE = 1544
+CLMM_AMM_CONFIG_MIN_SIZE = 100
+TICK_ARRAY_DISC = bytes.fromhex("c09b55cd31f9812a")
+TICK_ARRAY_SIZE = 10124
+TICKS_PER_ARRAY = 60
+TICK_SIZE = 168
+
+Q64 = 1 << 64
+Q128 = 1 << 128
+MIN_TICK = -443636
+MAX_TICK = 443636
+MIN_SQRT_PRICE_X64 = 4295048016
+MAX_SQRT_PRICE_X64 = 79226673515401279992447579055
+
+# Bit multipliers of sim/math/clmm.ts tickToSqrtPriceX64, kept identical so
+# this port reproduces the bot's simulator, not the on-chain program.
+_TICK_MULTIPLIERS = [
+    (0x1, 18446744073709551616),
+    (0x2, 18446744073709553664),
+    (0x4, 18446744073709555712),
+    (0x8, 18446744073709559808),
+    (0x10, 18446744073709568000),
+    (0x20, 18446744073709584384),
+    (0x40, 18446744073709617152),
+    (0x80, 18446744073709682688),
+    (0x100, 18446744073709813760),
+    (0x200, 18446744073710075904),
+    (0x400, 18446744073710600192),
+    (0x800, 18446744073711648768),
+    (0x1000, 18446744073713745920),
+    (0x2000, 18446744073717940224),
+    (0x4000, 18446744073726328832),
+    (0x8000, 18446744073743106048),
+    (0x10000, 18446744073776660480),
+    (0x20000, 18446744073843769344),
+    (0x40000, 18446744073977987072),
+]
+
+
+@dataclass
+class ClmmPoolState:
+    pubkey: str
+    slot: int
+    amm_config: str
+    tick_spacing: int
+    liquidity: int
+    sqrt_price_x64: int
+    tick_current: int
+
+
+def decode_clmm_pool(pubkey: str, slot: int, data: bytes) -> Optional[ClmmPoolState]:
+    """Decode the simulation fields of a Raydium CLMM PoolState (see decode/programs/raydiumClmm.ts)."""
+    if len(data) < CLMM_POOL_MIN_SIZE or data[:8] != CLMM_POOL_DISC:
+        return None
+    return ClmmPoolState(
+        pubkey=pubkey,
+        slot=slot,
+        amm_config=data[9:41].hex(),
+        tick_spacing=struct.unpack_from('<H', data, 235)[0],
+        liquidity=int.from_bytes(data[237:253], 'little'),
+        sqrt_price_x64=int.from_bytes(data[253:269], 'little'),
+        tick_current=struct.unpack_from('<i', data, 269)[0],
+    )
+
+
+def decode_clmm_fee_bps(data: bytes) -> Optional[int]:
+    """AmmConfig tradeFeeRate (1e-6 units at offset 47) in bps, rounded like tradeFeeRateToBps."""
+    if len(data) < CLMM_AMM_CONFIG_MIN_SIZE:
+        return None
+    fee_bps = (struct.unpack_from('<I', data, 47)[0] + 50) // 100
+    return fee_bps if fee_bps <= 1000 else None
+
+
+def decode_tick_array(data: bytes) -> Optional[Tuple[str, int, Dict[int, int]]]:
+    """
+    Decode a TickArray into (pool, startTickIndex, {offset: liquidityNet}).
+
+    Only initialized ticks (liquidityGross != 0) are kept; they are the only
+    ones simulate_clmm ever reads.
+    """
+    if len(data) < TICK_ARRAY_SIZE or data[:8] != TICK_ARRAY_DISC:
+        return None
+    ticks: Dict[int, int] = {}
+    for i in range(TICKS_PER_ARRAY):
+        base = 44 + i * TICK_SIZE
+        if data[base + 20:base + 36].count(0) != 16:
+            ticks[i] = int.from_bytes(data[base + 4:base + 20], 'little', signed=True)
+    return data[8:40].hex(), struct.unpack_from('<i', data, 40)[0], ticks
+
+
+class TickArrayCache:
+    """
+    LRU of decoded tick arrays keyed by the (pubkey, slot) of the account
+    state they were decoded from. Consecutive swaps on a pool mostly resolve
+    to the same tick-array states, so they share one parse (and one fetch of
+    the ~10KB account) instead of re-decoding it per swap.
+    """
+
+    def __init__(self, capacity: int = 4096):
+        self.capacity = capacity
+        self.entries: "OrderedDict[Tuple[str, int], Optional[Tuple[str, int, Dict[int, int]]]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Tuple[str, int], load) -> Optional[Tuple[str, int, Dict[int, int]]]:
+        """Return the decoded array for key, calling load() for the raw bytes on a miss."""
+        if key in self.entries:
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return self.entries[key]
+        self.misses += 1
+        data = load()
+        decoded = decode_tick_array(data) if data is not None else None
+        self.entries[key] = decoded
+        if len(self.entries) > self.capacity:
+            self.entries.popitem(last=False)
+        return decoded
+
+
+def tick_to_sqrt_price_x64(tick: int) -> int:
+    if tick < MIN_TICK or tick > MAX_TICK:
+        raise ValueError(f"Tick {tick} out of bounds [{MIN_TICK}, {MAX_TICK}]")
+    abs_tick = abs(tick)
+    ratio = Q64
+    for bit, multiplier in _TICK_MULTIPLIERS:
+        if abs_tick & bit:
+            ratio = (ratio * multiplier) >> 64
+    if tick < 0:
+        ratio = Q128 // ratio
+    return ratio
+
+
+def sqrt_price_x64_to_tick(sqrt_price_x64: int) -> int:
+    """Largest tick whose tick_to_sqrt_price_x64 is <= sqrt_price_x64 (binary search)."""
+    if sqrt_price_x64 < MIN_SQRT_PRICE_X64 or sqrt_price_x64 > MAX_SQRT_PRICE_X64:
+        raise ValueError("Sqrt price out of bounds")
+    low, high = MIN_TICK, MAX_TICK
+    while low < high:
+        mid = low + (high - low + 1) // 2
+        if tick_to_sqrt_price_x64(mid) <= sqrt_price_x64:
+            low = mid
+        else:
+            high = mid - 1
+    return low
+
+
+def get_amount0_delta(sqrt_a: int, sqrt_b: int, liquidity: int, round_up: bool) -> int:
+    if sqrt_a > sqrt_b:
+        sqrt_a, sqrt_b = sqrt_b, sqrt_a
+    numerator = liquidity * (sqrt_b - sqrt_a) * Q64
+    denominator = sqrt_a * sqrt_b
+    return -(-numerator // denominator) if round_up else numerator // denominator
+
+
+def get_amount1_delta(sqrt_a: int, sqrt_b: int, liquidity: int, round_up: bool) -> int:
+    if sqrt_a > sqrt_b:
+        sqrt_a, sqrt_b = sqrt_b, sqrt_a
+    numerator = liquidity * (sqrt_b - sqrt_a)
+    return -(-numerator // Q64) if round_up else numerator // Q64
+
+
+def get_next_sqrt_price_from_input(sqrt_price_x64: int, liquidity: int, amount_in: int, zero_for_one: bool) -> int:
+    if sqrt_price_x64 <= 0 or liquidity <= 0:
+        raise ValueError("Invalid sqrt price or liquidity")
+    if zero_for_one:
+        return (sqrt_price_x64 * (liquidity << 64)) // ((liquidity << 64) + amount_in * sqrt_price_x64)
+    return sqrt_price_x64 + (amount_in << 64) // liquidity
+
+
+def compute_swap_step(sqrt_current: int, sqrt_target: int, liquidity: int, amount_remaining: int, fee_bps: int) -> Tuple[int, int, int, int]:
+    """Exact-input swap step within one tick range: (sqrt_price_next, amount_in, amount_out, fee)."""
+    zero_for_one = sqrt_current >= sqrt_target
+    remaining_less_fee = amount_remaining * (10000 - fee_bps) // 10000
+    if zero_for_one:
+        amount_in = get_amount0_delta(sqrt_target, sqrt_current, liquidity, True)
+    else:
+        amount_in = get_amount1_delta(sqrt_current, sqrt_target, liquidity, True)
+
+    if remaining_less_fee >= amount_in:
+        sqrt_next = sqrt_target
+    else:
+        sqrt_next = get_next_sqrt_price_from_input(sqrt_current, liquidity, remaining_less_fee, zero_for_one)
+        amount_in = remaining_less_fee
+
+    if zero_for_one:
+        amount_out = get_amount1_delta(sqrt_next, sqrt_current, liquidity, False)
+    else:
+        amount_out = get_amount0_delta(sqrt_current, sqrt_next, liquidity, False)
+
+    if amount_remaining - amount_in > 0:
+        fee = amount_remaining - amount_in
+    else:
+        fee = amount_in * fee_bps // (10000 - fee_bps)
+    return sqrt_next, amount_in, amount_out, fee
+
+
+def _tick_array_start(tick: int, tick_spacing: int) -> int:
+    ticks_per_array = TICKS_PER_ARRAY * tick_spacing
+    if tick >= 0:
+        return tick // ticks_per_array * ticks_per_array
+    return -(-(tick + 1) // ticks_per_array) * ticks_per_array - ticks_per_array
+
+
+def _tick_liquidity_net(tick_arrays: Dict[int, Dict[int, int]], tick: int, tick_spacing: int) -> Optional[int]:
+    """liquidityNet of an initialized tick, or None (getTickFromArray + initialized check)."""
+    start = _tick_array_start(tick, tick_spacing)
+    ticks = tick_arrays.get(start)
+    if ticks is None:
+        return None
+    return ticks.get((tick - start) // tick_spacing)
+
+
+def simulate_clmm(
+    pool: ClmmPoolState,
+    tick_arrays: Dict[int, Dict[int, int]],
+    amount_in: int,
+    zero_for_one: bool,
+    fee_bps: int = 25,
+) -> Tuple[bool, int, Optional[str]]:
+    """
+    Port of simulateClmm (yogurt/src/sim/math/clmm.ts), exact input.
+
+    tick_arrays maps startTickIndex -> {offset: liquidityNet} of initialized
+    ticks. Returns (success, output_amount, error); on failure the output is
+    what had accumulated before the walk stopped.
+    """
+    step_ticks = -pool.tick_spacing if zero_for_one else pool.tick_spacing
+    sqrt_price = pool.sqrt_price_x64
+    tick = pool.tick_current
+    liquidity = pool.liquidity
+    remaining = amount_in
+    calculated = 0
+
+    iterations = 0
+    while remaining > 0 and iterations < 100:
+        iterations += 1
+
+        next_tick = None
+        search = tick // pool.tick_spacing * pool.tick_spacing
+        for _ in range(1000):
+            search += step_ticks
+            if _tick_liquidity_net(tick_arrays, search, pool.tick_spacing) is not None:
+                next_tick = search
+                break
+        if next_tick is None:
+            return False, calculated, "InsufficientLiquidity"
+
+        sqrt_target = tick_to_sqrt_price_x64(next_tick)
+        sqrt_price, step_in, step_out, _ = compute_swap_step(sqrt_price, sqrt_target, liquidity, remaining, fee_bps)
+        remaining -= step_in
+        calculated += step_out
+
+        if sqrt_price == sqrt_target:
+            liquidity_net = _tick_liquidity_net(tick_arrays, next_tick, pool.tick_spacing)
+            liquidity += -liquidity_net if zero_for_one else liquidity_net
+            if liquidity < 0:
+                return False, calculated, "InsufficientLiquidity"
+            tick = next_tick - 1 if zero_for_one else next_tick
+        else:
+            tick = sqrt_price_x64_to_tick(sqrt_price)
+
+    if iterations >= 100:
+        return False, calculated, "Unknown"
+    return True, calculated, None
+
+
+def get_account_refs_asof(
+    conn: sqlite3.Connection,
+    wanted: Dict[str, set],
+) -> Dict[Tuple[str, int], Optional[Tuple[str, int, int]]]:
+    """
+    As-of lookup for arbitrary accounts: (pubkey, query_slot) -> (table, id,
+    slot) of the latest bootstrap_updates or mainnet_updates row before the
+    slot, or None. Same merge join as get_vault_states_asof, but over ids
+    only, so large accounts are fetched (fetch_account_data) only when a
+    caller actually needs bytes it has not already decoded. Within a slot a
+    mainnet update beats the bootstrap fetch, then the highest id wins.
+    """
+    refs: Dict[Tuple[str, int], Optional[Tuple[str, int, int]]] = {}
     cursor = conn.cursor()
+    for pubkey, slot_set in wanted.items():
+        slots = sorted(slot_set)
+        cursor.execute("""
+            SELECT slot, 0, id FROM bootstrap_updates WHERE pubkey = ? AND slot < ?
+            UNION ALL
+            SELECT slot, 1, id FROM mainnet_updates WHERE pubkey = ? AND slot < ?
+            ORDER BY 1, 2, 3
+        """, (pubkey, slots[-1], pubkey, slots[-1]))
+        current = None
+        row = cursor.fetchone()
+        for query_slot in slots:
+            while row is not None and row[0] < query_slot:
+                current = row
+                row = cursor.fetchone()
+            if current is None:
+                refs[(pubkey, query_slot)] = None
+            else:
+                slot, source, row_id = current
+                refs[(pubkey, query_slot)] = ("mainnet_updates" if source else "bootstrap_updates", row_id, slot)
+    return refs
 
-    if single_swap_only:
-        # Get only swaps from transactions with exactly 1 swap
-        query = """
-            WITH single_swap_txs AS (
-                SELECT signature
-                FROM parsed_swaps
-                WHERE venue = ?
-                GROUP BY signature
-                HAVING COUNT(*) = 1
+
+def fetch_account_data(conn: sqlite3.Connection, ref: Tuple[str, int, int]) -> Optional[bytes]:
+    table, row_id, _ = ref
+    row = conn.execute(f"SELECT data_b64 FROM {table} WHERE id = ?", (row_id,)).fetchone()
+    if row is None or row[0] is None:
+        return None
+    try:
+        return base64.b64decode(row[0])
+    except Exception as e:
+        print(f"Error decoding account data ({table} id {row_id}): {e}", file=sys.stderr)
+        return None
+
+
+def get_clmm_topologies(conn: sqlite3.Connection, pools: set) -> Dict[str, List[Tuple[int, List[int]]]]:
+    """pool -> [(frozen_at_slot, required tick-array start indexes)], in freeze order."""
+    topologies: Dict[str, List[Tuple[int, List[int]]]] = defaultdict(list)
+    for pool, frozen_at_slot, required in conn.execute("""
+        SELECT pool_pubkey, frozen_at_slot, required_tick_arrays
+        FROM frozen_topologies
+        WHERE venue = 2
+        ORDER BY frozen_at_slot, id
+    """):
+        if pool not in pools:
+            continue
+        try:
+            starts = [int(s) for s in json.loads(required or "[]")]
+        except (ValueError, TypeError):
+            starts = []
+        topologies[pool].append((frozen_at_slot or 0, starts))
+    return topologies
+
+
+def find_clmm_tick_arrays(conn: sqlite3.Connection, pools: set, use_index: bool = False) -> Dict[Tuple[str, int], str]:
+    """
+    Map (pool, startTickIndex) -> tick-array pubkey for the given pools.
+
+    Tick-array addresses are PDAs; rather than re-deriving them, the pool id
+    and start index are read from the 44-byte header (the first 60 base64
+    characters) of every CLMM-owned account of tick-array size. With
+    use_index they come from array_headers (see refresh_array_headers)
+    instead of a scan over every update.
+    """
+    if use_index:
+        return read_array_headers(conn, "tick", pools)
+    b64_len = 4 * ((TICK_ARRAY_SIZE + 2) // 3)
+    arrays: Dict[Tuple[str, int], str] = {}
+    rows = conn.execute("""
+        SELECT pubkey, MIN(substr(data_b64, 1, 60)) FROM bootstrap_updates
+        WHERE account_type = 'tick' GROUP BY pubkey
+        UNION ALL
+        SELECT pubkey, MIN(substr(data_b64, 1, 60)) FROM mainnet_updates
+        WHERE owner = ? AND length(data_b64) = ? GROUP BY pubkey
+    """, (RAYDIUM_CLMM_PROGRAM_HEX, b64_len))
+    for pubkey, head in rows:
+        decoded = decode_array_header(head)
+        if decoded is not None and decoded[0] == "tick" and decoded[1] in pools:
+            arrays[(decoded[1], decoded[2])] = pubkey
+    return arrays
+
+
+def evaluate_clmm_swap(
+    swap: SwapData,
+    pool: Optional[ClmmPoolState],
+    tick_arrays: Dict[int, Dict[int, int]],
+    fee_bps: int,
+) -> ValidationResult:
+    """Run simulate_clmm for a swap against the given pool and tick-array states."""
+    missing = []
+    if pool is None:
+        missing.append("pool")
+    if not tick_arrays:
+        missing.append("tick_arrays")
+    if missing:
+        return ValidationResult(
+            swap=swap,
+            base_vault_state=None,
+            quote_vault_state=None,
+            calculated_output=None,
+            actual_output=swap.actual_output,
+            error_bps=None,
+            match=False,
+            failure_reason=f"Missing pool state: {', '.join(missing)}",
+            pool_state=pool,
+        )
+
+    try:
+        success, calculated_output, sim_error = simulate_clmm(
+            pool, tick_arrays, swap.input_amount, swap.direction == 0, fee_bps
+        )
+    except ValueError as e:
+        success, calculated_output, sim_error = False, 0, str(e)
+
+    if swap.actual_output > 0:
+        error_bps = abs(calculated_output - swap.actual_output) * 10000 / swap.actual_output
+    else:
+        error_bps = None
+    match = success and error_bps is not None and error_bps <= 1
+
+    failure_reason = None
+    if not success:
+        failure_reason = f"Simulation failed: {sim_error}"
+    elif not match:
+        if error_bps is not None:
+            failure_reason = f"Error {error_bps:.2f} bps"
+        else:
+            failure_reason = "Cannot calculate error (zero actual output)"
+
+    return ValidationResult(
+        swap=swap,
+        base_vault_state=None,
+        quote_vault_state=None,
+        calculated_output=calculated_output,
+        actual_output=swap.actual_output,
+        error_bps=error_bps,
+        match=match,
+        failure_reason=failure_reason,
+        pool_state=pool,
+    )
+
+
+def validate_clmm_swaps(
+    conn: sqlite3.Connection,
+    swaps: List[SwapData],
+    tick_cache: Optional[TickArrayCache] = None,
+    use_index: bool = False,
+) -> List[ValidationResult]:
+    """
+    Validate Raydium CLMM swaps against cache state as of each swap slot.
+
+    The pool account (sqrt price, liquidity, tick, ammConfig) and every
+    tick array of the latest frozen topology at or before the swap slot are
+    resolved as of the slot with get_account_refs_asof, then simulate_clmm
+    runs with the ammConfig trade fee (25 bps when the config is unknown,
+    as in simulateClmm). Decoded tick arrays come from tick_cache.
+    """
+    if tick_cache is None:
+        tick_cache = TickArrayCache()
+    pools = {swap.pool_pubkey for swap in swaps}
+    topologies = get_clmm_topologies(conn, pools)
+    array_keys = find_clmm_tick_arrays(conn, pools, use_index=use_index)
+
+    def required_arrays(swap: SwapData) -> List[str]:
+        frozen = topologies.get(swap.pool_pubkey)
+        if not frozen:
+            return []
+        starts = frozen[0][1]
+        for frozen_at_slot, required in frozen:
+            if frozen_at_slot > swap.swap_slot:
+                break
+            starts = required
+        return [array_keys[(swap.pool_pubkey, s)] for s in starts if (swap.pool_pubkey, s) in array_keys]
+
+    wanted: Dict[str, set] = defaultdict(set)
+    for swap in swaps:
+        wanted[swap.pool_pubkey].add(swap.swap_slot)
+    pool_refs = get_account_refs_asof(conn, wanted)
+
+    decoded_pools: Dict[Tuple[str, int, int], Optional[ClmmPoolState]] = {}
+    swap_pools: List[Optional[ClmmPoolState]] = []
+    wanted = defaultdict(set)
+    for swap in swaps:
+        ref = pool_refs[(swap.pool_pubkey, swap.swap_slot)]
+        if ref is not None and ref not in decoded_pools:
+            data = fetch_account_data(conn, ref)
+            decoded_pools[ref] = decode_clmm_pool(swap.pool_pubkey, ref[2], data) if data is not None else None
+        pool = decoded_pools[ref] if ref is not None else None
+        swap_pools.append(pool)
+        if pool is not None:
+            wanted[pool.amm_config].add(swap.swap_slot)
+        for pubkey in required_arrays(swap):
+            wanted[pubkey].add(swap.swap_slot)
+    refs = get_account_refs_asof(conn, wanted)
+
+    fees: Dict[Tuple[str, int, int], Optional[int]] = {}
+    results = []
+    for swap, pool in zip(swaps, swap_pools):
+        fee_bps = None
+        if pool is not None:
+            ref = refs.get((pool.amm_config, swap.swap_slot))
+            if ref is not None:
+                if ref not in fees:
+                    data = fetch_account_data(conn, ref)
+                    fees[ref] = decode_clmm_fee_bps(data) if data is not None else None
+                fee_bps = fees[ref]
+
+        tick_arrays: Dict[int, Dict[int, int]] = {}
+        for pubkey in required_arrays(swap):
+            ref = refs.get((pubkey, swap.swap_slot))
+            if ref is None:
+                continue
+            decoded = tick_cache.get((pubkey, ref[2]), lambda: fetch_account_data(conn, ref))
+            if decoded is not None and decoded[0] == swap.pool_pubkey:
+                tick_arrays[decoded[1]] = decoded[2]
+
+        results.append(evaluate_clmm_swap(swap, pool, tick_arrays, fee_bps if fee_bps is not None else 25))
+    return results
+
+
+# ============================================================================
+# METEORA DLMM
+# ============================================================================
+
+METEORA_DLMM_PROGRAM_HEX = "04e9e12fbc84e826c932cce9e2640cce15590c1c6273b0925708ba3b8520b0bc"  # LBUZKhRx...
+DLMM_POOL_DISC = bytes.fromhex("210b3162b565b10d")
+DLMM_POOL_MIN_SIZE = 904
+BIN_ARRAY_DISC = bytes.fromhex("5c8e5cdc059446b5")
+BIN_ARRAY_SIZE = 10136
+BINS_PER_ARRAY = 70
+BIN_SIZE = 144
+BIN_ARRAY_HEADER_SIZE = 56
+
+DLMM_SCALE = 1 << 64
+DLMM_FEE_PRECISION = 1_000_000_000
+DLMM_MAX_FEE_RATE = 100_000_000  # 10% in 1e9 fee precision
+DLMM_VAR_FEE_SCALE = 100_000_000_000
+DLMM_VAR_FEE_OFFSET = 99_999_999_999
+
+
+@dataclass
+class DlmmPoolState:
+    pubkey: str
+    slot: int
+    bin_step: int
+    active_id: int
+    base_factor: int
+    base_fee_power_factor: int
+    variable_fee_control: int
+    max_volatility_accumulator: int
+    volatility_accumulator: int
+    volatility_reference: int
+
+
+def decode_dlmm_pool(pubkey: str, slot: int, data: bytes) -> Optional[DlmmPoolState]:
+    """Decode the LbPair fields simulateDlmm reads, volatility state included (see decode/programs/meteoraDlmm.ts)."""
+    if len(data) < DLMM_POOL_MIN_SIZE or data[:8] != DLMM_POOL_DISC:
+        return None
+    return DlmmPoolState(
+        pubkey=pubkey,
+        slot=slot,
+        bin_step=struct.unpack_from('<H', data, 80)[0],
+        active_id=struct.unpack_from('<i', data, 76)[0],
+        base_factor=struct.unpack_from('<H', data, 8)[0],
+        base_fee_power_factor=data[34],
+        variable_fee_control=struct.unpack_from('<I', data, 16)[0],
+        max_volatility_accumulator=struct.unpack_from('<I', data, 20)[0],
+        volatility_accumulator=struct.unpack_from('<I', data, 40)[0],
+        volatility_reference=struct.unpack_from('<I', data, 44)[0],
+    )
+
+
+def decode_bin_array(data: bytes) -> Optional[Tuple[str, int, List[Tuple[int, int]]]]:
+    """Decode a BinArray into (lbPair, index, [(amountX, amountY)] * 70)."""
+    if len(data) < BIN_ARRAY_SIZE or data[:8] != BIN_ARRAY_DISC:
+        return None
+    bins = [
+        struct.unpack_from('<QQ', data, BIN_ARRAY_HEADER_SIZE + i * BIN_SIZE)
+        for i in range(BINS_PER_ARRAY)
+    ]
+    return data[24:56].hex(), struct.unpack_from('<q', data, 8)[0], bins
+
+
+def _pow_q64(base_q64: int, exp: int) -> int:
+    if exp == 0:
+        return DLMM_SCALE
+    if exp == 1:
+        return base_q64
+    result = DLMM_SCALE
+    while exp > 0:
+        if exp & 1:
+            result = result * base_q64 // DLMM_SCALE
+        base_q64 = base_q64 * base_q64 // DLMM_SCALE
+        exp >>= 1
+    return result
+
+
+@lru_cache(maxsize=65536)
+def get_price_from_bin_id(bin_id: int, bin_step: int) -> int:
+    """Q64 price of a bin, (1 + binStep/10000)^binId, as getPriceFromBinId computes it."""
+    if bin_id == 0:
+        return DLMM_SCALE
+    base_q64 = DLMM_SCALE + DLMM_SCALE * bin_step // 10000
+    if bin_id < 0:
+        denominator = _pow_q64(base_q64, -bin_id)
+        return DLMM_SCALE * DLMM_SCALE // denominator if denominator else DLMM_SCALE
+    return _pow_q64(base_q64, bin_id)
+
+
+def compute_dynamic_fee_rate(
+    base_factor: int,
+    bin_step: int,
+    variable_fee_control: int,
+    volatility_accumulator: int,
+    max_volatility_accumulator: Optional[int] = None,
+    base_fee_power_factor: int = 0,
+) -> int:
+    """Base + variable fee rate in 1e9 precision, capped at 10%."""
+    fee_power = max(base_fee_power_factor, 0)
+    if fee_power > 9:
+        base_fee_rate = DLMM_MAX_FEE_RATE
+    else:
+        base_fee_rate = base_factor * bin_step * 10 * 10 ** fee_power
+    if max_volatility_accumulator is not None:
+        volatility_accumulator = min(volatility_accumulator, max_volatility_accumulator)
+    volatility_step = volatility_accumulator * bin_step
+    variable_fee_rate = 0
+    if variable_fee_control > 0:
+        variable_fee_rate = (variable_fee_control * volatility_step * volatility_step + DLMM_VAR_FEE_OFFSET) // DLMM_VAR_FEE_SCALE
+    return min(base_fee_rate + variable_fee_rate, DLMM_MAX_FEE_RATE)
+
+
+def calculate_dynamic_fee(
+    base_factor: int,
+    bin_step: int,
+    variable_fee_control: int,
+    volatility_accumulator: int,
+    max_volatility_accumulator: Optional[int] = None,
+    base_fee_power_factor: int = 0,
+) -> int:
+    """compute_dynamic_fee_rate in basis points (calculateDynamicFee)."""
+    fee_rate = compute_dynamic_fee_rate(
+        base_factor, bin_step, variable_fee_control, volatility_accumulator,
+        max_volatility_accumulator, base_fee_power_factor,
+    )
+    return fee_rate * 10000 // DLMM_FEE_PRECISION
+
+
+def dlmm_pool_fee_rate(pool: DlmmPoolState) -> int:
+    return compute_dynamic_fee_rate(
+        pool.base_factor, pool.bin_step, pool.variable_fee_control, pool.volatility_accumulator,
+        pool.max_volatility_accumulator, pool.base_fee_power_factor,
+    )
+
+
+def _get_bin(bin_arrays: Dict[int, List[Tuple[int, int]]], bin_id: int) -> Optional[Tuple[int, int]]:
+    bins = bin_arrays.get(bin_id // BINS_PER_ARRAY)
+    return bins[bin_id % BINS_PER_ARRAY] if bins is not None else None
+
+
+def simulate_dlmm(
+    pool: DlmmPoolState,
+    bin_arrays: Dict[int, List[Tuple[int, int]]],
+    amount_in: int,
+    swap_for_y: bool,
+) -> Tuple[bool, int, Optional[str]]:
+    """
+    Port of simulateDlmm (yogurt/src/sim/math/dlmm.ts), exact input.
+
+    bin_arrays maps bin-array index -> [(amountX, amountY)]. The dynamic fee
+    is taken off the input up front, then bins are consumed from activeId in
+    the swap direction. Returns (success, output_amount, error).
+    """
+    amount_remaining = amount_in - amount_in * dlmm_pool_fee_rate(pool) // DLMM_FEE_PRECISION
+    calculated = 0
+    bin_id = pool.active_id
+    current = _get_bin(bin_arrays, bin_id)
+    if current is None:
+        return False, 0, "InsufficientLiquidity"
+    step = -1 if swap_for_y else 1
+
+    iterations = 0
+    while amount_remaining > 0 and iterations < 100:
+        iterations += 1
+        price = get_price_from_bin_id(bin_id, pool.bin_step)
+        amount_x, amount_y = current
+
+        if (amount_y if swap_for_y else amount_x) > 0:
+            if swap_for_y:
+                max_out = amount_remaining * price // DLMM_SCALE
+                if max_out <= amount_y:
+                    out, consumed, depleted = max_out, amount_remaining, max_out == amount_y
+                else:
+                    out, consumed, depleted = amount_y, (amount_y * DLMM_SCALE // price if price > 0 else 0), True
+            else:
+                max_out = amount_remaining * DLMM_SCALE // price if price > 0 else 0
+                if max_out <= amount_x:
+                    out, consumed, depleted = max_out, amount_remaining, max_out == amount_x
+                else:
+                    out, consumed, depleted = amount_x, amount_x * price // DLMM_SCALE, True
+            amount_remaining -= consumed
+            calculated += out
+            if not depleted:
+                break
+
+        next_bin = None
+        search = bin_id
+        for _ in range(1000):
+            search += step
+            candidate = _get_bin(bin_arrays, search)
+            if candidate is not None and candidate[1 if swap_for_y else 0] > 0:
+                next_bin = candidate
+                break
+        if next_bin is None:
+            if amount_remaining > 0:
+                return False, calculated, "InsufficientLiquidity"
+            break
+        bin_id, current = search, next_bin
+
+    if iterations >= 100:
+        return False, calculated, "Unknown"
+    return True, calculated, None
+
+
+class VersionedStateCache:
+    """
+    Replay-side account cache for DLMM: pubkey -> raw data plus its decoded
+    form, both tagged with the (slot, write_version) they belong to.
+
+    apply() follows the live cache staleness rule and only swaps in the raw
+    bytes; read() decodes on first use per version, so an LbPair or bin
+    array is parsed once per update however many swaps read it in between.
+    """
+
+    def __init__(self):
+        # pubkey -> [slot, write_version, data_b64, decoded | _UNDECODED]
+        self.entries: Dict[str, list] = {}
+        self.applied = 0
+        self.stale = 0
+        self.decoded = 0
+        self.reused = 0
+
+    def apply(self, slot: int, write_version: int, pubkey: str, data_b64: str) -> None:
+        existing = self.entries.get(pubkey)
+        if existing is not None and (slot, write_version) <= (existing[0], existing[1]):
+            self.stale += 1
+            return
+        self.entries[pubkey] = [slot, write_version, data_b64, _UNDECODED]
+        self.applied += 1
+
+    def read(self, pubkey: str, decode):
+        """Decoded state of pubkey via decode(pubkey, slot, data), or None."""
+        entry = self.entries.get(pubkey)
+        if entry is None:
+            return None
+        if entry[3] is _UNDECODED:
+            try:
+                entry[3] = decode(pubkey, entry[0], base64.b64decode(entry[2]))
+            except Exception as e:
+                print(f"Error decoding {pubkey}: {e}", file=sys.stderr)
+                entry[3] = None
+            self.decoded += 1
+        else:
+            self.reused += 1
+        return entry[3]
+
+
+def get_dlmm_topologies(conn: sqlite3.Connection, pools: set) -> Dict[str, List[Tuple[int, List[int], Optional[int], Optional[int]]]]:
+    """pool -> [(frozen_at_slot, required bin-array indexes, bin_range_min, bin_range_max)], in freeze order."""
+    topologies: Dict[str, List[Tuple[int, List[int], Optional[int], Optional[int]]]] = defaultdict(list)
+    for pool, frozen_at_slot, required, range_min, range_max in conn.execute("""
+        SELECT pool_pubkey, frozen_at_slot, required_bin_arrays, bin_range_min, bin_range_max
+        FROM frozen_topologies
+        WHERE venue = 3
+        ORDER BY frozen_at_slot, id
+    """):
+        if pool not in pools:
+            continue
+        try:
+            indexes = [int(i) for i in json.loads(required or "[]")]
+        except (ValueError, TypeError):
+            indexes = []
+        topologies[pool].append((frozen_at_slot or 0, indexes, range_min, range_max))
+    return topologies
+
+
+def find_dlmm_bin_arrays(conn: sqlite3.Connection, pools: set, use_index: bool = False) -> Dict[Tuple[str, int], str]:
+    """Map (lbPair, bin-array index) -> pubkey from the 56-byte BinArray headers, like find_clmm_tick_arrays."""
+    if use_index:
+        return read_array_headers(conn, "bin", pools)
+    b64_len = 4 * ((BIN_ARRAY_SIZE + 2) // 3)
+    arrays: Dict[Tuple[str, int], str] = {}
+    rows = conn.execute("""
+        SELECT pubkey, MIN(substr(data_b64, 1, 76)) FROM bootstrap_updates
+        WHERE account_type = 'bin' GROUP BY pubkey
+        UNION ALL
+        SELECT pubkey, MIN(substr(data_b64, 1, 76)) FROM mainnet_updates
+        WHERE owner = ? AND length(data_b64) = ? GROUP BY pubkey
+    """, (METEORA_DLMM_PROGRAM_HEX, b64_len))
+    for pubkey, head in rows:
+        decoded = decode_array_header(head)
+        if decoded is not None and decoded[0] == "bin" and decoded[1] in pools:
+            arrays[(decoded[1], decoded[2])] = pubkey
+    return arrays
+
+
+ARRAY_HEADERS_SCHEMA = """
+CREATE TABLE IF NOT EXISTS array_headers (
+    pubkey TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    pool TEXT NOT NULL,
+    array_index INTEGER NOT NULL
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS derived_watermarks (
+    table_name TEXT PRIMARY KEY,
+    last_id INTEGER NOT NULL
+);
+"""
+
+
+def decode_array_header(head_b64: str) -> Optional[Tuple[str, str, int]]:
+    """("tick" | "bin", pool, index) from the base64 head of a CLMM TickArray or DLMM BinArray."""
+    try:
+        header = base64.b64decode(head_b64)
+    except Exception:
+        return None
+    if len(header) >= 44 and header[:8] == TICK_ARRAY_DISC:
+        return "tick", header[8:40].hex(), struct.unpack_from('<i', header, 40)[0]
+    if len(header) >= BIN_ARRAY_HEADER_SIZE and header[:8] == BIN_ARRAY_DISC:
+        return "bin", header[24:56].hex(), struct.unpack_from('<q', header, 8)[0]
+    return None
+
+
+def refresh_array_headers(conn: sqlite3.Connection, batch_size: int = 50000) -> Dict[str, int]:
+    """
+    Incrementally maintain array_headers: pubkey -> (kind, pool, index) for
+    every CLMM tick array and DLMM bin array in bootstrap_updates and
+    mainnet_updates. Array addresses are PDAs whose header never changes, so
+    each pubkey is decoded once, and like refresh_vault_amounts only rows
+    past each table's high-water id are read on later runs.
+    """
+    conn.executescript(ARRAY_HEADERS_SCHEMA)
+    sources = (
+        ("bootstrap_updates", "account_type IN ('tick', 'bin')", ()),
+        ("mainnet_updates", "((owner = ? AND length(data_b64) = ?) OR (owner = ? AND length(data_b64) = ?))", (
+            RAYDIUM_CLMM_PROGRAM_HEX, 4 * ((TICK_ARRAY_SIZE + 2) // 3),
+            METEORA_DLMM_PROGRAM_HEX, 4 * ((BIN_ARRAY_SIZE + 2) // 3),
+        )),
+    )
+    insert = "INSERT OR IGNORE INTO array_headers (pubkey, kind, pool, array_index) VALUES (?, ?, ?, ?)"
+    stats = {}
+    changes = conn.total_changes
+    with conn:
+        for table, where, params in sources:
+            mark = f"array_headers:{table}"
+            row = conn.execute("SELECT last_id FROM derived_watermarks WHERE table_name = ?", (mark,)).fetchone()
+            last_id = row[0] if row else 0
+            max_id = conn.execute(f"SELECT COALESCE(MAX(id), 0) FROM {table}").fetchone()[0]
+            if max_id > last_id:
+                cursor = conn.execute(f"""
+                    SELECT pubkey, substr(data_b64, 1, 76) FROM {table}
+                    WHERE id > ? AND id <= ? AND {where}
+                    AND pubkey NOT IN (SELECT pubkey FROM array_headers)
+                """, (last_id, max_id, *params))
+                while True:
+                    rows = cursor.fetchmany(batch_size)
+                    if not rows:
+                        break
+                    out = []
+                    for pubkey, head in rows:
+                        decoded = decode_array_header(head)
+                        if decoded is not None:
+                            out.append((pubkey, *decoded))
+                    conn.executemany(insert, out)
+            conn.execute(
+                "INSERT OR REPLACE INTO derived_watermarks (table_name, last_id) VALUES (?, ?)",
+                (mark, max_id),
             )
-            SELECT
-                s.pool_pubkey,
-                s.slot,
-                s.input_amount,
-                s.actual_output_amount,
-                s.direction,
-                f.vault_base,
-                f.vault_quote,
-                s.signature
-            FROM parsed_swaps s
-            INNER JOIN frozen_topologies f ON s.pool_pubkey = f.pool_pubkey
-            INNER JOIN single_swap_txs sst ON s.signature = sst.signature
-            WHERE s.venue = ?
-            AND f.venue = 0  -- PumpSwap venue code
-            AND s.actual_output_amount IS NOT NULL
-            AND CAST(s.actual_output_amount AS INTEGER) > 0
-            ORDER BY s.slot
-        """
-        params = (venue, venue)
+            stats[table] = max_id
+    # Repeated updates of a new array in one batch are ignored, so count actual inserts
+    stats["rows"] = conn.total_changes - changes - len(sources)
+    return stats
+
+
+def array_headers_current(conn: sqlite3.Connection) -> bool:
+    """True if array_headers has been refreshed up to the current high-water ids of both update tables."""
+    try:
+        for table in ("bootstrap_updates", "mainnet_updates"):
+            row = conn.execute(
+                "SELECT last_id FROM derived_watermarks WHERE table_name = ?", (f"array_headers:{table}",)
+            ).fetchone()
+            max_id = conn.execute(f"SELECT COALESCE(MAX(id), 0) FROM {table}").fetchone()[0]
+            if row is None or row[0] != max_id:
+                return False
+        conn.execute("SELECT 1 FROM array_headers LIMIT 1")
+    except sqlite3.OperationalError:
+        return False
+    return True
+
+
+def read_array_headers(conn: sqlite3.Connection, kind: str, pools: set) -> Dict[Tuple[str, int], str]:
+    """(pool, index) -> pubkey for the given pools from array_headers."""
+    arrays: Dict[Tuple[str, int], str] = {}
+    for pubkey, pool, index in conn.execute(
+        "SELECT pubkey, pool, array_index FROM array_headers WHERE kind = ?", (kind,)
+    ):
+        if pool in pools:
+            arrays[(pool, index)] = pubkey
+    return arrays
+
+
+def evaluate_dlmm_swap(
+    swap: SwapData,
+    pool: Optional[DlmmPoolState],
+    bin_arrays: Dict[int, List[Tuple[int, int]]],
+) -> ValidationResult:
+    """Run simulate_dlmm for a swap against the given LbPair and bin-array states."""
+    missing = []
+    if pool is None:
+        missing.append("lb_pair")
+    if not bin_arrays:
+        missing.append("bin_arrays")
+    if missing:
+        return ValidationResult(
+            swap=swap,
+            base_vault_state=None,
+            quote_vault_state=None,
+            calculated_output=None,
+            actual_output=swap.actual_output,
+            error_bps=None,
+            match=False,
+            failure_reason=f"Missing pool state: {', '.join(missing)}",
+            pool_state=pool,
+        )
+
+    success, calculated_output, sim_error = simulate_dlmm(pool, bin_arrays, swap.input_amount, swap.direction == 0)
+
+    if swap.actual_output > 0:
+        error_bps = abs(calculated_output - swap.actual_output) * 10000 / swap.actual_output
     else:
-        query = """
-            SELECT
-                s.pool_pubkey,
-                s.slot,
-                s.input_amount,
-                s.actual_output_amount,
-                s.direction,
-                f.vault_base,
-                f.vault_quote,
-                s.signature
-            FROM parsed_swaps s
-            INNER JOIN frozen_topologies f ON s.pool_pubkey = f.pool_pubkey
-            WHERE s.venue = ?
-            AND f.venue = 0  -- PumpSwap venue code
-            AND s.actual_output_amount IS NOT NULL
-            AND CAST(s.actual_output_amount AS INTEGER) > 0
-            ORDER BY s.slot
-        """
-        params = (venue,)
+        error_bps = None
+    match = success and error_bps is not None and error_bps <= 1
+
+    failure_reason = None
+    if not success:
+        failure_reason = f"Simulation failed: {sim_error}"
+    elif not match:
+        if error_bps is not None:
+            failure_reason = f"Error {error_bps:.2f} bps"
+        else:
+            failure_reason = "Cannot calculate error (zero actual output)"
+
+    return ValidationResult(
+        swap=swap,
+        base_vault_state=None,
+        quote_vault_state=None,
+        calculated_output=calculated_output,
+        actual_output=swap.actual_output,
+        error_bps=error_bps,
+        match=match,
+        failure_reason=failure_reason,
+        pool_state=pool,
+    )
+
+
+def validate_dlmm_swaps(
+    conn: sqlite3.Connection,
+    swaps: List[SwapData],
+    stats: Optional[Dict[str, int]] = None,
+    use_index: bool = False,
+) -> List[ValidationResult]:
+    """
+    Validate Meteora DLMM swaps by slot-ordered replay.
+
+    LbPair and bin-array updates (bootstrap + mainnet) for the swaps' pools
+    are replayed into a VersionedStateCache exactly as replay_vault_states
+    does for vaults, so each swap sees the LbPair (active bin, volatility
+    accumulator) and the frozen topology's bin arrays the live cache held.
+    Arrays outside the topology's [bin_range_min, bin_range_max] are left
+    out, as the bot would not have them; swaps whose active bin falls
+    outside that range are counted in stats["out_of_range"].
+    """
+    pools = {swap.pool_pubkey for swap in swaps}
+    topologies = get_dlmm_topologies(conn, pools)
+    array_keys = find_dlmm_bin_arrays(conn, pools, use_index=use_index)
+
+    def frozen_arrays(swap: SwapData) -> Tuple[List[Tuple[int, str]], Optional[int], Optional[int]]:
+        frozen = topologies.get(swap.pool_pubkey)
+        if not frozen:
+            return [], None, None
+        _, indexes, range_min, range_max = frozen[0]
+        for frozen_at_slot, required, lo, hi in frozen:
+            if frozen_at_slot > swap.swap_slot:
+                break
+            indexes, range_min, range_max = required, lo, hi
+        arrays = [
+            (i, array_keys[(swap.pool_pubkey, i)]) for i in indexes
+            if (swap.pool_pubkey, i) in array_keys
+            and (range_min is None or i >= range_min)
+            and (range_max is None or i <= range_max)
+        ]
+        return arrays, range_min, range_max
+
+    cache = VersionedStateCache()
+    stream = _replay_stream(conn, list(pools) + list(array_keys.values()))
+    pending = next(stream, None)
+    out_of_range = 0
+    results = []
+    last_slot = None
+    for swap in swaps:
+        if last_slot is not None and swap.swap_slot < last_slot:
+            raise ValueError("validate_dlmm_swaps requires swaps sorted by slot")
+        last_slot = swap.swap_slot
+        while pending is not None and pending[0] < swap.swap_slot:
+            cache.apply(*pending)
+            pending = next(stream, None)
+
+        pool = cache.read(swap.pool_pubkey, decode_dlmm_pool)
+        arrays, range_min, range_max = frozen_arrays(swap)
+        if pool is not None and range_min is not None:
+            active_index = pool.active_id // BINS_PER_ARRAY
+            if not range_min <= active_index <= range_max:
+                out_of_range += 1
+        bin_arrays: Dict[int, List[Tuple[int, int]]] = {}
+        for index, pubkey in arrays:
+            decoded = cache.read(pubkey, lambda _pubkey, _slot, data: decode_bin_array(data))
+            if decoded is not None and decoded[0] == swap.pool_pubkey and decoded[1] == index:
+                bin_arrays[index] = decoded[2]
+        results.append(evaluate_dlmm_swap(swap, pool, bin_arrays))
+
+    if stats is not None:
+        stats.update({
+            "applied": cache.applied, "stale": cache.stale,
+            "decoded": cache.decoded, "reused": cache.reused, "out_of_range": out_of_range,
+        })
+    return results
+
+
+VALIDATION_METHODS = ("asof", "per-swap", "replay")
+
+
+def validate_swaps(
+    conn: sqlite3.Connection,
+    swaps: List[SwapData],
+    method: str = "asof",
+    use_index: bool = False,
+    venue: str = "pumpswap",
+) -> List[ValidationResult]:
+    """
+    Validate swaps in order. method is "asof" (batched merge join, default),
+    "per-swap" (point queries) or "replay" (slot-ordered cache replay).
+    Raydium CLMM swaps are always resolved as-of (validate_clmm_swaps),
+    Meteora DLMM swaps always by replay (validate_dlmm_swaps); for both,
+    use_index reads tick/bin-array addresses from array_headers.
+    """
+    if venue == "meteoraDlmm":
+        ordered = sorted(range(len(swaps)), key=lambda i: swaps[i].swap_slot)
+        stats: Dict[str, int] = {}
+        results = [None] * len(swaps)
+        for i, result in zip(ordered, validate_dlmm_swaps(conn, [swaps[i] for i in ordered], stats, use_index)):
+            results[i] = result
+        print(f"  LbPair/bin-array states: {stats['applied']} applied, {stats['stale']} stale, "
+              f"{stats['decoded']} decoded, {stats['reused']} reused; "
+              f"{stats['out_of_range']} swaps with active bin outside the frozen range")
+        return results
+    if venue == "raydiumClmm":
+        tick_cache = TickArrayCache()
+        results = validate_clmm_swaps(conn, swaps, tick_cache, use_index)
+        print(f"  Tick arrays: {tick_cache.misses} decoded, {tick_cache.hits} cache hits")
+        return results
+
+    if method == "replay":
+        ordered = sorted(range(len(swaps)), key=lambda i: swaps[i].swap_slot)
+        in_order = [swaps[i] for i in ordered]
+        bases, quotes = replay_vault_states(conn, in_order)
+        results: List[Optional[ValidationResult]] = [None] * len(swaps)
+        for i, result in zip(ordered, evaluate_swaps_batch(in_order, bases, quotes)):
+            results[i] = result
+        return results
+
+    if method == "per-swap":
+        results = []
+        for i, swap in enumerate(swaps):
+            results.append(validate_swap(conn, swap))
+            if (i + 1) % 10000 == 0:
+                print(f"  Processed {i + 1}/{len(swaps)} swaps...")
+        return results
+
+    states = get_vault_states_asof(conn, swaps, use_index=use_index)
+    return evaluate_swaps_batch(
+        swaps,
+        [states[(swap.vault_base, swap.swap_slot)] for swap in swaps],
+        [states[(swap.vault_quote, swap.swap_slot)] for swap in swaps],
+    )
+
+
+# parsed_swaps.venue name -> frozen_topologies.venue code (VenueId in yogurt/src/types.ts)
+VENUE_IDS = {"pumpswap": 0, "raydiumClmm": 2, "meteoraDlmm": 3}
+
+
+def get_swaps_with_topologies(conn: sqlite3.Connection, venue: str = 'pumpswap', single_swap_only: bool = False, limit: int = None) -> list[SwapData]:
+    """
+    Get swaps joined with their frozen topologies.
+
+    Every swap is tagged with is_single_swap (its transaction has exactly one
+    swap of this venue), computed from a GROUP BY on signature, so one load
+    serves every report mode.
+    """
+    cursor = conn.cursor()
+
+    query = """
+        WITH swap_counts AS (
+            SELECT signature, COUNT(*) AS n
+            FROM parsed_swaps
+            WHERE venue = ?
+            GROUP BY signature
+        )
+        SELECT
+            s.pool_pubkey,
+            s.slot,
+            s.input_amount,
+            s.actual_output_amount,
+            s.direction,
+            f.vault_base,
+            f.vault_quote,
+            s.signature,
+            sc.n = 1,
+            s.id
+        FROM parsed_swaps s
+        INNER JOIN frozen_topologies f ON s.pool_pubkey = f.pool_pubkey
+        INNER JOIN swap_counts sc ON s.signature = sc.signature
+        WHERE s.venue = ?
+        AND f.venue = ?  -- VenueId code
+        AND s.actual_output_amount IS NOT NULL
+        AND CAST(s.actual_output_amount AS INTEGER) > 0
+    """
+    if single_swap_only:
+        query += " AND sc.n = 1"
+    query += " ORDER BY s.slot, s.id"
+    params = (venue, venue, VENUE_IDS[venue])
 
     if limit:
         query += f" LIMIT {limit}"
@@ -238,7 +1852,7 @@ def get_swaps_with_topologies(conn: sqlite3.Connection, venue: str = 'pumpswap',
 
     swaps = []
     for row in cursor.fetchall():
-        pool_pubkey, slot, input_amount, actual_output, direction, vault_base, vault_quote, signature = row
+        pool_pubkey, slot, input_amount, actual_output, direction, vault_base, vault_quote, signature, is_single, swap_id = row
         try:
             swaps.append(SwapData(
                 pool_pubkey=pool_pubkey,
@@ -249,7 +1863,8 @@ def get_swaps_with_topologies(conn: sqlite3.Connection, venue: str = 'pumpswap',
                 vault_base=vault_base,
                 vault_quote=vault_quote,
                 signature=signature,
-                is_single_swap=single_swap_only
+                is_single_swap=bool(is_single),
+                swap_id=swap_id
             ))
         except (ValueError, TypeError) as e:
             print(f"Skipping malformed swap: {e}", file=sys.stderr)
@@ -257,113 +1872,468 @@ def get_swaps_with_topologies(conn: sqlite3.Connection, venue: str = 'pumpswap',
     return swaps
 
 
-def main():
-    conn = sqlite3.connect(DB_PATH)
+# Report modes: (metric key, name, predicate over ValidationResult, show sample
+# mismatches). Every mode is a view over the same validated result set.
+REPORT_MODES = [
+    ("single_swap", "SINGLE-SWAP TRANSACTIONS ONLY", lambda r: r.swap.is_single_swap, True),
+    ("all_swaps", "ALL SWAPS (including multi-swap TXs)", lambda r: True, False),
+]
+
+
+ERROR_BUCKET_EDGES = [1, 10, 100, 1000, 10000]
+ERROR_BUCKET_LABELS = ["1-10 bps", "10-100 bps", "100-1000 bps", "1000-10000 bps", ">10000 bps"]
+
+
+def error_buckets(errors: List[float]) -> Dict[str, int]:
+    """Count errors into the (lo, hi] bps buckets; errors <= 1 bps are not counted."""
+    if np is not None:
+        idx = np.searchsorted(np.array(ERROR_BUCKET_EDGES, dtype=np.float64), np.asarray(errors, dtype=np.float64), side="left")
+        counts = np.bincount(idx, minlength=len(ERROR_BUCKET_EDGES) + 1)[1:]
+        return dict(zip(ERROR_BUCKET_LABELS, counts.tolist()))
+    counts = [0] * len(ERROR_BUCKET_LABELS)
+    for e in errors:
+        for j, hi in enumerate(ERROR_BUCKET_EDGES[1:] + [float("inf")]):
+            if ERROR_BUCKET_EDGES[j] < e <= hi:
+                counts[j] += 1
+                break
+    return dict(zip(ERROR_BUCKET_LABELS, counts))
+
+
+def mode_counts(results: List[ValidationResult]) -> Dict[str, int]:
+    matches = missing_state = mismatches = 0
+    for result in results:
+        if result.match:
+            matches += 1
+        elif result.failure_reason and result.failure_reason.startswith("Missing"):
+            missing_state += 1
+        else:
+            mismatches += 1
+    return {"matches": matches, "missing_state": missing_state, "mismatches": mismatches}
 
+
+def print_mode_report(mode_name: str, results: List[ValidationResult], show_samples: bool) -> None:
+    print()
     print("="*80)
-    print("END-TO-END CACHE VALIDATION")
-    print("Using LOCAL CACHE STATE as input, running CPMM math, comparing to ON-CHAIN output")
+    print(f"MODE: {mode_name}")
     print("="*80)
     print()
 
-    # Run analysis for both single-swap only and all swaps
-    for mode_name, single_swap_only in [("SINGLE-SWAP TRANSACTIONS ONLY", True), ("ALL SWAPS (including multi-swap TXs)", False)]:
+    counts = mode_counts(results)
+    matches = counts["matches"]
+    missing_state = counts["missing_state"]
+    mismatches = counts["mismatches"]
+
+    print("-"*60)
+    print("RESULTS SUMMARY")
+    print("-"*60)
+    print()
+
+    total = len(results)
+    with_state = total - missing_state
+
+    print(f"Total swaps evaluated:         {total}")
+    print(f"Swaps with prior vault state:  {with_state}")
+    print(f"Swaps missing vault state:     {missing_state}")
+    print()
+
+    if with_state > 0:
+        match_rate = matches / with_state * 100
+        mismatch_rate = mismatches / with_state * 100
+        print(f"MATCH RATE (cache state as input): {matches}/{with_state} = {match_rate:.2f}%")
+        print(f"MISMATCH RATE:                     {mismatches}/{with_state} = {mismatch_rate:.2f}%")
+
+    # Error distribution for this mode
+    errors = [r.error_bps for r in results if r.error_bps is not None and not r.match]
+    if errors:
+        errors.sort()
         print()
-        print("="*80)
-        print(f"MODE: {mode_name}")
-        print("="*80)
+        print(f"Error distribution (n={len(errors)}):")
+        print(f"  Min: {min(errors):.2f} bps")
+        print(f"  P50: {errors[len(errors)//2]:.2f} bps")
+        print(f"  P95: {errors[int(len(errors)*0.95)]:.2f} bps")
+        print(f"  Max: {max(errors):.2f} bps")
+
+        buckets = error_buckets(errors)
         print()
+        print("Error buckets:")
+        for bucket, count in buckets.items():
+            pct = count / len(errors) * 100 if errors else 0
+            print(f"  {bucket}: {count} ({pct:.1f}%)")
 
-        print("Loading swaps with frozen topologies...")
-        swaps = get_swaps_with_topologies(conn, venue='pumpswap', single_swap_only=single_swap_only)
-        print(f"Total swaps: {len(swaps)}")
+    if show_samples and mismatches > 0:
         print()
+        print("-"*60)
+        print(f"SAMPLE MISMATCHES ({mode_name.lower()})")
+        print("-"*60)
 
-        # Validate each swap
-        results = []
-        matches = 0
-        missing_state = 0
-        mismatches = 0
+        mismatch_samples = [r for r in results if not r.match and r.calculated_output is not None][:10]
+
+        for r in mismatch_samples:
+            print()
+            print(f"Pool: {r.swap.pool_pubkey}")
+            print(f"Swap slot: {r.swap.swap_slot}, Direction: {'base->quote' if r.swap.direction == 0 else 'quote->base'}")
+            print(f"Input amount: {r.swap.input_amount:,}")
+            if r.base_vault_state and r.quote_vault_state:
+                print(f"Cache state slot: base={r.base_vault_state.slot}, quote={r.quote_vault_state.slot}")
+                print(f"Cache reserves: base={r.base_vault_state.amount:,}, quote={r.quote_vault_state.amount:,}")
+            elif isinstance(r.pool_state, ClmmPoolState):
+                print(f"Cache state slot: pool={r.pool_state.slot}")
+                print(f"Cache pool: sqrtPriceX64={r.pool_state.sqrt_price_x64}, liquidity={r.pool_state.liquidity}, tick={r.pool_state.tick_current}")
+            elif isinstance(r.pool_state, DlmmPoolState):
+                p = r.pool_state
+                fee_bps = calculate_dynamic_fee(
+                    p.base_factor, p.bin_step, p.variable_fee_control, p.volatility_accumulator,
+                    p.max_volatility_accumulator, p.base_fee_power_factor,
+                )
+                print(f"Cache state slot: lb_pair={p.slot}")
+                print(f"Cache pool: activeId={p.active_id}, binStep={p.bin_step}, volatilityAccumulator={p.volatility_accumulator}, fee={fee_bps} bps")
+            print(f"Calculated output: {r.calculated_output:,}")
+            print(f"Actual output:     {r.actual_output:,}")
+            print(f"Error: {r.error_bps:.2f} bps")
+
+
+VALIDATION_RESULTS_SCHEMA = """
+CREATE TABLE IF NOT EXISTS validation_results (
+    swap_id INTEGER NOT NULL,
+    venue TEXT NOT NULL,
+    method TEXT NOT NULL,
+    state_version TEXT NOT NULL,
+    validated_at INTEGER,
+    signature TEXT,
+    pool_pubkey TEXT,
+    swap_slot INTEGER,
+    is_single_swap INTEGER,
+    base_state_slot INTEGER,
+    quote_state_slot INTEGER,
+    pool_state_slot INTEGER,
+    base_amount TEXT,
+    quote_amount TEXT,
+    calculated_output TEXT,
+    actual_output TEXT,
+    error_bps REAL,
+    match INTEGER,
+    failure_reason TEXT,
+    PRIMARY KEY (swap_id, venue, method)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_validation_results_match ON validation_results(venue, method, match);
+"""
+
+RESULTS_BATCH = 50000
 
-        print("Validating swaps...")
-        for i, swap in enumerate(swaps):
-            result = validate_swap(conn, swap)
-            results.append(result)
 
-            if result.match:
-                matches += 1
-            elif result.failure_reason and "Missing vault state" in result.failure_reason:
-                missing_state += 1
+def capture_state_version(conn: sqlite3.Connection) -> str:
+    """High-water ids of mainnet_updates, bootstrap_updates and frozen_topologies, as "m:b:t"."""
+    return ":".join(
+        str(conn.execute(f"SELECT COALESCE(MAX(id), 0) FROM {table}").fetchone()[0])
+        for table in ("mainnet_updates", "bootstrap_updates", "frozen_topologies")
+    )
+
+
+def load_saved_results(
+    conn: sqlite3.Connection,
+    swaps: List[SwapData],
+    venue: str,
+    method: str,
+) -> Dict[int, ValidationResult]:
+    """
+    Saved results still valid for the current capture, by index into swaps.
+
+    A result saved at state version m:b:t stands if no topology was frozen
+    since, and every mainnet/bootstrap row added after m/b is at or after the
+    swap's slot: a swap only reads state from slots before its own, so such
+    rows cannot change what it saw.
+    """
+    try:
+        rows = conn.execute("""
+            SELECT swap_id, state_version, base_state_slot, quote_state_slot, base_amount, quote_amount,
+                   calculated_output, error_bps, match, failure_reason
+            FROM validation_results
+            WHERE venue = ? AND method = ?
+        """, (venue, method)).fetchall()
+    except sqlite3.OperationalError:
+        return {}
+
+    current = capture_state_version(conn)
+    topology_id = current.split(":")[2]
+    horizons: Dict[str, float] = {}
+
+    def horizon(version: str) -> float:
+        """Lowest slot among rows added since version (inf if none, -inf if not reusable)."""
+        if version not in horizons:
+            parts = version.split(":")
+            if len(parts) != 3 or parts[2] != topology_id:
+                horizons[version] = float("-inf")
             else:
-                mismatches += 1
+                slots = [
+                    conn.execute(f"SELECT MIN(slot) FROM {table} WHERE id > ?", (int(last_id),)).fetchone()[0]
+                    for table, last_id in (("mainnet_updates", parts[0]), ("bootstrap_updates", parts[1]))
+                ]
+                slots = [slot for slot in slots if slot is not None]
+                horizons[version] = min(slots) if slots else float("inf")
+        return horizons[version]
 
-            if (i + 1) % 10000 == 0:
-                print(f"  Processed {i + 1}/{len(swaps)} swaps...")
+    by_id = {row[0]: row for row in rows}
+    saved: Dict[int, ValidationResult] = {}
+    for i, swap in enumerate(swaps):
+        row = by_id.get(swap.swap_id)
+        if row is None or swap.swap_slot > horizon(row[1]):
+            continue
+        _, _, base_slot, quote_slot, base_amount, quote_amount, calculated, error_bps, match, failure_reason = row
+        saved[i] = ValidationResult(
+            swap=swap,
+            base_vault_state=VaultState(swap.vault_base, base_slot, int(base_amount)) if base_amount is not None else None,
+            quote_vault_state=VaultState(swap.vault_quote, quote_slot, int(quote_amount)) if quote_amount is not None else None,
+            calculated_output=int(calculated) if calculated is not None else None,
+            actual_output=swap.actual_output,
+            error_bps=error_bps,
+            match=bool(match),
+            failure_reason=failure_reason,
+        )
+    return saved
 
-        print()
-        print("-"*60)
-        print("RESULTS SUMMARY")
-        print("-"*60)
-        print()
 
-        total = len(results)
-        with_state = total - missing_state
+def save_results(
+    conn: sqlite3.Connection,
+    results: List[ValidationResult],
+    venue: str,
+    method: str,
+    state_version: str,
+) -> int:
+    """Upsert per-swap results with executemany, RESULTS_BATCH rows per statement, in one transaction."""
+    conn.executescript(VALIDATION_RESULTS_SCHEMA)
+    now = int(time.time() * 1000)
 
-        print(f"Total swaps evaluated:         {total}")
-        print(f"Swaps with prior vault state:  {with_state}")
-        print(f"Swaps missing vault state:     {missing_state}")
-        print()
+    def text(value: Optional[int]) -> Optional[str]:
+        return str(value) if value is not None else None
+
+    rows = []
+    with conn:
+        for r in results:
+            base, quote = r.base_vault_state, r.quote_vault_state
+            rows.append((
+                r.swap.swap_id, venue, method, state_version, now,
+                r.swap.signature, r.swap.pool_pubkey, r.swap.swap_slot, int(r.swap.is_single_swap),
+                base.slot if base else None, quote.slot if quote else None,
+                r.pool_state.slot if r.pool_state is not None else None,
+                text(base.amount if base else None), text(quote.amount if quote else None),
+                text(r.calculated_output), str(r.actual_output), r.error_bps, int(r.match), r.failure_reason,
+            ))
+            if len(rows) >= RESULTS_BATCH:
+                conn.executemany("INSERT OR REPLACE INTO validation_results VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", rows)
+                rows = []
+        if rows:
+            conn.executemany("INSERT OR REPLACE INTO validation_results VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", rows)
+    return len(results)
 
-        if with_state > 0:
-            match_rate = matches / with_state * 100
-            mismatch_rate = mismatches / with_state * 100
-            print(f"MATCH RATE (cache state as input): {matches}/{with_state} = {match_rate:.2f}%")
-            print(f"MISMATCH RATE:                     {mismatches}/{with_state} = {mismatch_rate:.2f}%")
 
-        # Error distribution for this mode
-        errors = [r.error_bps for r in results if r.error_bps is not None and not r.match]
+def save_summary(conn: sqlite3.Connection, results: List[ValidationResult], venue: str, method: str) -> None:
+    """
+    Write one set of metrics per report mode into validation_summary (the
+    table capture-evidence.ts fills), under the session of the latest
+    parsed swap and category 'e2e_validation'.
+    """
+    row = conn.execute("SELECT session_id FROM parsed_swaps ORDER BY id DESC LIMIT 1").fetchone()
+    session_id = row[0] if row else "unknown"
+    now = int(time.time() * 1000)
+    metrics = []
+    for key, _, predicate, _ in REPORT_MODES:
+        subset = [r for r in results if predicate(r)]
+        counts = mode_counts(subset)
+        with_state = len(subset) - counts["missing_state"]
+        errors = sorted(r.error_bps for r in subset if r.error_bps is not None and not r.match)
+        details = {"method": method, "total": len(subset), "missing_state": counts["missing_state"]}
         if errors:
-            errors.sort()
+            details.update({
+                "p50_bps": errors[len(errors) // 2],
+                "p95_bps": errors[int(len(errors) * 0.95)],
+                "max_bps": errors[-1],
+                "buckets": error_buckets(errors),
+            })
+        prefix = f"e2e_{venue}_{key}"
+        for name, count in (("match", counts["matches"]), ("mismatch", counts["mismatches"])):
+            pct = count / with_state * 100 if with_state else None
+            metrics.append((
+                session_id, now, f"{prefix}_{name}", "e2e_validation",
+                f"{count}/{with_state}", count, pct, json.dumps(details),
+            ))
+    with conn:
+        conn.executemany("""
+            INSERT INTO validation_summary (session_id, created_at, metric_name, metric_category, metric_value, metric_count, metric_pct, details)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        """, metrics)
+
+
+def open_readonly(db_path: str, immutable: bool = False, mmap_mb: int = 4096, cache_mb: int = 256) -> sqlite3.Connection:
+    """Open capture.db read-only (mode=ro URI) with a large mmap and a private page cache."""
+    uri = f"file:{urllib.parse.quote(db_path)}?mode=ro"
+    if immutable:
+        uri += "&immutable=1"
+    conn = sqlite3.connect(uri, uri=True)
+    conn.execute(f"PRAGMA mmap_size = {mmap_mb * 1024 * 1024}")
+    conn.execute(f"PRAGMA cache_size = {-cache_mb * 1024}")
+    return conn
+
+
+def _validate_shard(
+    db_path: str,
+    shard: List[Tuple[int, SwapData]],
+    method: str,
+    use_index: bool,
+    immutable: bool,
+    venue: str = "pumpswap",
+) -> List[Tuple[int, ValidationResult]]:
+    """Worker entry point: validate one pool shard on its own read-only connection."""
+    conn = open_readonly(db_path, immutable=immutable)
+    try:
+        results = validate_swaps(conn, [swap for _, swap in shard], method=method, use_index=use_index, venue=venue)
+    finally:
+        conn.close()
+    return [(idx, result) for (idx, _), result in zip(shard, results)]
+
+
+def validate_swaps_parallel(
+    db_path: str,
+    swaps: List[SwapData],
+    workers: int,
+    method: str = "asof",
+    use_index: bool = False,
+    immutable: bool = False,
+    venue: str = "pumpswap",
+) -> List[ValidationResult]:
+    """
+    Validate swaps across worker processes, partitioned by crc32(pool_pubkey).
+
+    A pool's swaps always land in one shard, so each worker's as-of scans
+    touch a disjoint set of vaults. Shards outnumber workers 4:1 to smooth out
+    hot pools. Results come back in the input order.
+    """
+    n_shards = max(1, workers * 4)
+    shards: List[List[Tuple[int, SwapData]]] = [[] for _ in range(n_shards)]
+    for idx, swap in enumerate(swaps):
+        shards[zlib.crc32(swap.pool_pubkey.encode("utf-8")) % n_shards].append((idx, swap))
+
+    results: List[Optional[ValidationResult]] = [None] * len(swaps)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [
+            pool.submit(_validate_shard, db_path, shard, method, use_index, immutable, venue)
+            for shard in sorted(shards, key=len, reverse=True)
+            if shard
+        ]
+        for future in futures:
+            for idx, result in future.result():
+                results[idx] = result
+    return results
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="End-to-end cache validation against capture.db")
+    parser.add_argument("--db", default=DB_PATH, help=f"Path to capture.db (default {DB_PATH})")
+    parser.add_argument("--venue", choices=sorted(VENUE_IDS), default="pumpswap", help="Venue to validate (default pumpswap)")
+    parser.add_argument("--per-swap", action="store_true", help="Use one point query per vault per swap (legacy path)")
+    parser.add_argument("--replay", action="store_true", help="Replay bootstrap + mainnet updates in slot order like the live cache")
+    parser.add_argument("--no-vault-index", action="store_true", help="Do not build/read the vault_amounts / array_headers tables")
+    parser.add_argument("--workers", type=int, default=1, help="Validate pool-hash shards in N worker processes")
+    parser.add_argument("--immutable", action="store_true", help="Open every connection with immutable=1 and never write the capture (it must not be written by others either)")
+    parser.add_argument("--no-save", action="store_true", help="Do not write validation_results / validation_summary")
+    parser.add_argument("--revalidate", action="store_true", help="Validate every swap even if a saved result is still valid")
+    add_profile_args(parser)
+    args = parser.parse_args()
+    if args.venue != "pumpswap" and (args.per_swap or args.replay):
+        parser.error(f"--per-swap/--replay only apply to pumpswap; {args.venue} has a single validation path")
+    return args
+
+
+def main():
+    args = parse_args()
+    prof = StageProfiler.from_args(args, "validate-cache-e2e")
+    if args.immutable:
+        # Workers open the capture with immutable=1, which ignores the -wal file: read it the same
+        # way here so every connection sees one state, and never write to it
+        if os.path.exists(args.db + "-wal") and os.path.getsize(args.db + "-wal") > 0:
+            print(f"warning: {args.db}-wal is not empty; --immutable readers ignore uncheckpointed rows", file=sys.stderr)
+        conn = open_readonly(args.db, immutable=True)
+    else:
+        conn = sqlite3.connect(args.db)
+
+    print("="*80)
+    print("END-TO-END CACHE VALIDATION")
+    model = {"raydiumClmm": "CLMM", "meteoraDlmm": "DLMM"}.get(args.venue, "CPMM")
+    print(f"Using LOCAL CACHE STATE as input, running {model} math, comparing to ON-CHAIN output")
+    print("="*80)
+    print()
+
+    print("Loading swaps with frozen topologies...")
+    with prof.stage("read") as st:
+        swaps = get_swaps_with_topologies(conn, venue=args.venue)
+        st.add(records_out=len(swaps))
+    single = sum(1 for s in swaps if s.is_single_swap)
+    print(f"Total swaps: {len(swaps)} ({single} in single-swap transactions)")
+    print()
+
+    with prof.stage("group") as st:
+        method = "per-swap" if args.per_swap else "replay" if args.replay else "asof"
+        use_index = method == "asof" and not args.no_vault_index
+        if use_index and args.immutable:
+            # The derived tables can't be refreshed here, so only use them if already current
+            table, current = (
+                ("vault_amounts", vault_amounts_current(conn)) if args.venue == "pumpswap"
+                else ("array_headers", array_headers_current(conn))
+            )
+            if current:
+                print(f"{table}: up to date (not refreshed under --immutable)")
+            else:
+                print(f"{table} missing or stale and --immutable forbids refreshing it; reading updates directly", file=sys.stderr)
+                use_index = False
+            print()
+        elif use_index and args.venue == "pumpswap":
+            try:
+                stats = refresh_vault_amounts(conn)
+                print(f"vault_amounts: +{stats['rows']} rows, {stats['new_vaults']} new vaults, high-water id {stats['last_id']}")
+            except sqlite3.OperationalError as e:
+                print(f"vault_amounts unavailable ({e}); decoding mainnet_updates directly", file=sys.stderr)
+                use_index = False
             print()
-            print(f"Error distribution (n={len(errors)}):")
-            print(f"  Min: {min(errors):.2f} bps")
-            print(f"  P50: {errors[len(errors)//2]:.2f} bps")
-            print(f"  P95: {errors[int(len(errors)*0.95)]:.2f} bps")
-            print(f"  Max: {max(errors):.2f} bps")
-
-            buckets = {
-                "1-10 bps": len([e for e in errors if 1 < e <= 10]),
-                "10-100 bps": len([e for e in errors if 10 < e <= 100]),
-                "100-1000 bps": len([e for e in errors if 100 < e <= 1000]),
-                "1000-10000 bps": len([e for e in errors if 1000 < e <= 10000]),
-                ">10000 bps": len([e for e in errors if e > 10000]),
-            }
+        elif use_index:
+            try:
+                stats = refresh_array_headers(conn)
+                print(f"array_headers: +{stats['rows']} arrays, high-water id {stats['mainnet_updates']}")
+            except sqlite3.OperationalError as e:
+                print(f"array_headers unavailable ({e}); scanning updates for array headers", file=sys.stderr)
+                use_index = False
             print()
-            print("Error buckets:")
-            for bucket, count in buckets.items():
-                pct = count / len(errors) * 100 if errors else 0
-                print(f"  {bucket}: {count} ({pct:.1f}%)")
 
-        # Show sample mismatches only for single-swap mode
-        if single_swap_only and mismatches > 0:
+        save = not args.no_save and not args.immutable
+        state_version = capture_state_version(conn)
+        saved = {} if args.revalidate else load_saved_results(conn, swaps, args.venue, method)
+        if saved:
+            print(f"Reusing {len(saved)} saved results still valid at state version {state_version}")
             print()
-            print("-"*60)
-            print("SAMPLE MISMATCHES (single-swap only)")
-            print("-"*60)
-
-            mismatch_samples = [r for r in results if not r.match and r.calculated_output is not None][:10]
-
-            for r in mismatch_samples:
-                print()
-                print(f"Pool: {r.swap.pool_pubkey}")
-                print(f"Swap slot: {r.swap.swap_slot}, Direction: {'base->quote' if r.swap.direction == 0 else 'quote->base'}")
-                print(f"Input amount: {r.swap.input_amount:,}")
-                if r.base_vault_state and r.quote_vault_state:
-                    print(f"Cache state slot: base={r.base_vault_state.slot}, quote={r.quote_vault_state.slot}")
-                    print(f"Cache reserves: base={r.base_vault_state.amount:,}, quote={r.quote_vault_state.amount:,}")
-                print(f"Calculated output: {r.calculated_output:,}")
-                print(f"Actual output:     {r.actual_output:,}")
-                print(f"Error: {r.error_bps:.2f} bps")
+        pending = [swap for i, swap in enumerate(swaps) if i not in saved]
+        st.add(records_in=len(swaps), records_out=len(pending))
+
+    # Validate every swap once; each mode below is a partition of these results
+    print("Validating swaps...")
+    with prof.stage("analyze") as st:
+        if args.workers > 1:
+            fresh = validate_swaps_parallel(
+                args.db, pending, args.workers,
+                method=method, use_index=use_index, immutable=args.immutable, venue=args.venue,
+            )
+        else:
+            fresh = validate_swaps(conn, pending, method=method, use_index=use_index, venue=args.venue)
+        fresh_iter = iter(fresh)
+        results = [saved[i] if i in saved else next(fresh_iter) for i in range(len(swaps))]
+        st.add(records_in=len(pending), records_out=len(fresh))
+
+    with prof.stage("report") as st:
+        if save:
+            saved_rows = save_results(conn, fresh, args.venue, method, state_version)
+            save_summary(conn, results, args.venue, method)
+            print(f"validation_results: {saved_rows} rows written ({len(saved)} reused), summary metrics in validation_summary")
+
+        for _, mode_name, predicate, show_samples in REPORT_MODES:
+            print_mode_report(mode_name, [r for r in results if predicate(r)], show_samples)
+        st.add(records_in=len(results))
 
     # Final conclusion
     print()
@@ -19,18 +19,26 @@
  *  HELIUS_RPC_URL (required)  - e.g. https://mainnet.helius-rpc.com/?api-key=...
  *  HELIUS_WSS_URL (required)  - e.g. wss://mainnet.helius-rpc.com/?api-key=...
  *  HELIUS_API_KEY (required for enhanced) - api key value only (NOT the full URL)
+ *  HELIUS_ENHANCED_URL=https://api-mainnet.helius-rpc.com  # http:// allowed (mock_helius_enhanced.cjs)
  *
  *  RUN_SECONDS=3600
  *  COMMITMENT=confirmed
  *  OUT_FILE=alpha_mev_surface_<ts>.jsonl
  *  SUMMARY_FILE=alpha_mev_surface_summary_<ts>.json
  *  SUMMARY_EVERY_SECONDS=30
+ *  OUT_COMPRESS=none|gzip|zstd  # zstd needs a Node build with zlib.createZstdCompress
+ *  OUT_ROTATE_MB=0            # start a new part after this many uncompressed MB (0 = never)
+ *  OUT_ROTATE_MINUTES=0       # start a new part after this many minutes (0 = never)
  *
  *  BATCH_SIZE=100
  *  BATCH_INTERVAL_MS=500
  *  INITIAL_DELAY_MS=1500
  *  MAX_MISSING_RETRIES=6
  *  MAX_PENDING=50000
+ *  MAX_CONCURRENCY=8          # AIMD ceiling on Enhanced batches in flight (<= 32 sockets)
+ *  SEEN_WINDOW_SECONDS=60     # signatures are deduped for 1-2 windows after first sight
+ *  SEEN_CAPACITY=250000       # signatures per window before an early rotation
+ *  FP_CACHE_MAX=1000000       # interned ids + trie nodes before fingerprint caches are pruned
  *
  *  INGRESS_SAMPLE_PCT=1.0     # 1.0 = keep all, 0.25 keeps 25%
  *  STORE_ENHANCED=0|1         # store raw enhanced object (can be large)
@@ -39,7 +47,9 @@
 const fs = require("fs");
 const path = require("path");
 const crypto = require("crypto");
+const http = require("http");
 const https = require("https");
+const zlib = require("zlib");
 const { Connection, PublicKey } = require("@solana/web3.js");
 
 // -----------------------------
@@ -48,6 +58,7 @@ const { Connection, PublicKey } = require("@solana/web3.js");
 const HELIUS_RPC_URL = (process.env.HELIUS_RPC_URL || "").trim();
 const HELIUS_WSS_URL = (process.env.HELIUS_WSS_URL || "").trim();
 const HELIUS_API_KEY = (process.env.HELIUS_API_KEY || "").trim(); // key only
+const HELIUS_ENHANCED_URL = (process.env.HELIUS_ENHANCED_URL || "https://api-mainnet.helius-rpc.com").trim().replace(/\/+$/, "");
 
 const COMMITMENT = (process.env.COMMITMENT || "confirmed").trim();
 const RUN_SECONDS = Number(process.env.RUN_SECONDS || "3600");
@@ -60,6 +71,10 @@ const SUMMARY_FILE =
   (process.env.SUMMARY_FILE || "").trim() ||
   path.resolve(process.cwd(), `alpha_mev_surface_summary_${new Date().toISOString().replace(/[:.]/g, "-")}.json`);
 
+const OUT_COMPRESS = (process.env.OUT_COMPRESS || "none").trim().toLowerCase();
+const OUT_ROTATE_MB = Math.max(0, Number(process.env.OUT_ROTATE_MB || "0"));
+const OUT_ROTATE_MINUTES = Math.max(0, Number(process.env.OUT_ROTATE_MINUTES || "0"));
+
 const SUMMARY_EVERY_SECONDS = Number(process.env.SUMMARY_EVERY_SECONDS || "60");
 
 const BATCH_SIZE = Math.max(1, Math.min(250, Number(process.env.BATCH_SIZE || "100")));
@@ -67,6 +82,10 @@ const BATCH_INTERVAL_MS = Math.max(100, Number(process.env.BATCH_INTERVAL_MS ||
 const INITIAL_DELAY_MS = Math.max(0, Number(process.env.INITIAL_DELAY_MS || "1500"));
 const MAX_MISSING_RETRIES = Math.max(0, Number(process.env.MAX_MISSING_RETRIES || "6"));
 const MAX_PENDING = Math.max(1000, Number(process.env.MAX_PENDING || "50000"));
+const MAX_CONCURRENCY = Math.max(1, Math.min(32, Number(process.env.MAX_CONCURRENCY || "8")));
+const SEEN_WINDOW_SECONDS = Math.max(1, Number(process.env.SEEN_WINDOW_SECONDS || "60"));
+const SEEN_CAPACITY = Math.max(10_000, Number(process.env.SEEN_CAPACITY || "250000"));
+const FP_CACHE_MAX = Math.max(10_000, Number(process.env.FP_CACHE_MAX || "1000000"));
 
 const INGRESS_SAMPLE_PCT = Math.max(0, Math.min(1, Number(process.env.INGRESS_SAMPLE_PCT || "1.0")));
 const STORE_ENHANCED = (process.env.STORE_ENHANCED || "0").trim() === "1";
@@ -83,6 +102,14 @@ if (!HELIUS_API_KEY) {
   console.error("Missing HELIUS_API_KEY (required for Enhanced Transactions batching).");
   process.exit(1);
 }
+if (!["none", "gzip", "zstd"].includes(OUT_COMPRESS)) {
+  console.error(`Invalid OUT_COMPRESS=${OUT_COMPRESS} (none|gzip|zstd)`);
+  process.exit(1);
+}
+if (OUT_COMPRESS === "zstd" && typeof zlib.createZstdCompress !== "function") {
+  console.error(`OUT_COMPRESS=zstd needs zlib zstd support (Node ${process.version} lacks it); use gzip`);
+  process.exit(1);
+}
 
 const connection = new Connection(HELIUS_RPC_URL, {
   commitment: COMMITMENT,
@@ -90,6 +117,7 @@ const connection = new Connection(HELIUS_RPC_URL, {
 });
 
 const httpsAgent = new https.Agent({ keepAlive: true, maxSockets: 32 });
+const httpAgent = new http.Agent({ keepAlive: true, maxSockets: 32 });
 
 // -----------------------------
 // Jito tip accounts (mainnet) & tip payment program
@@ -128,8 +156,105 @@ const USDT_MINT = "Es9vMFrzaCERmJfrF4H2FYD4KCoNkY11McCe8BenwNYB";
 // -----------------------------
 // Output streams
 // -----------------------------
+/**
+ * JSONL records go to OUT_FILE, or to numbered parts of it
+ * (<name>.part0001.jsonl, ...) when rotation is enabled, optionally through
+ * a gzip/zstd compressor (.gz/.zst suffix). When a write() returns false the
+ * output is marked paused and the batcher stops dispatching until that
+ * stream drains (or finishes, for a part closed by rotation while backed
+ * up); batches already in flight still write, so buffering stays bounded by
+ * MAX_CONCURRENCY * BATCH_SIZE records.
+ */
+const OUT_ROTATE_BYTES = OUT_ROTATE_MB * 1024 * 1024;
+const OUT_ROTATE_MS = OUT_ROTATE_MINUTES * 60_000;
+const OUT_SUFFIX = { none: "", gzip: ".gz", zstd: ".zst" }[OUT_COMPRESS];
+
 fs.mkdirSync(path.dirname(OUT_FILE), { recursive: true });
-const outStream = fs.createWriteStream(OUT_FILE, { flags: "a" });
+
+let outStream = null; // compressor, or the file stream itself
+let outFileStream = null;
+let outPath = null;
+let outPart = 0;
+let outPartBytes = 0;
+let outPartOpenedAtMs = 0;
+let outPaused = false;
+const outBackedUp = new Set(); // streams whose write() returned false, until 'drain'/'finish'
+let outBytes = 0;
+let outDrainWaits = 0;
+const outClosing = new Set();
+
+function outPartPath(part) {
+  if (OUT_ROTATE_BYTES === 0 && OUT_ROTATE_MS === 0) return OUT_FILE + OUT_SUFFIX;
+  const ext = path.extname(OUT_FILE);
+  const base = ext ? OUT_FILE.slice(0, -ext.length) : OUT_FILE;
+  return `${base}.part${String(part).padStart(4, "0")}${ext}${OUT_SUFFIX}`;
+}
+
+function openOutPart() {
+  outPart += 1;
+  outPath = outPartPath(outPart);
+  outPartBytes = 0;
+  outPartOpenedAtMs = nowMs();
+
+  const partPath = outPath;
+  outFileStream = fs.createWriteStream(partPath, { flags: "a" });
+  outFileStream.on("error", (e) => console.warn(`[out] ${partPath}: ${String((e && e.message) || e)}`));
+  if (OUT_COMPRESS === "none") {
+    outStream = outFileStream;
+  } else {
+    outStream = OUT_COMPRESS === "gzip" ? zlib.createGzip() : zlib.createZstdCompress();
+    outStream.pipe(outFileStream);
+  }
+  const stream = outStream;
+  const release = () => {
+    outBackedUp.delete(stream);
+    outPaused = outBackedUp.size > 0;
+  };
+  stream.on("drain", release);
+  stream.once("finish", release);
+  stream.once("close", release);
+}
+
+/** End the current part; resolves once the file (and compressor trailer) is flushed. */
+function closeOutPart() {
+  const stream = outStream;
+  const file = outFileStream;
+  outStream = null;
+  outFileStream = null;
+  const done = new Promise((resolve) => {
+    file.once("close", resolve);
+    file.once("error", resolve);
+  });
+  stream.end();
+  outClosing.add(done);
+  done.then(() => outClosing.delete(done));
+  return done;
+}
+
+function writeRecord(line) {
+  if (
+    outStream &&
+    ((OUT_ROTATE_BYTES > 0 && outPartBytes >= OUT_ROTATE_BYTES) ||
+      (OUT_ROTATE_MS > 0 && nowMs() - outPartOpenedAtMs >= OUT_ROTATE_MS))
+  ) {
+    closeOutPart();
+  }
+  if (!outStream) openOutPart();
+
+  const n = Buffer.byteLength(line);
+  outPartBytes += n;
+  outBytes += n;
+  if (!outStream.write(line) && !outBackedUp.has(outStream)) {
+    outBackedUp.add(outStream);
+    outPaused = true;
+    outDrainWaits += 1;
+  }
+}
+
+async function closeOutput() {
+  if (outStream) closeOutPart();
+  await Promise.all(Array.from(outClosing));
+}
 
 // -----------------------------
 // Helpers
@@ -148,10 +273,6 @@ function sortUnique(arr) {
   return Array.from(new Set(arr)).sort();
 }
 
-function clampInt(n, lo, hi) {
-  return Math.max(lo, Math.min(hi, n));
-}
-
 function stableRaw(usdc, usdt) {
   return usdc + usdt; // both 6 decimals on mainnet
 }
@@ -173,11 +294,11 @@ function postJson(urlStr, payload, { timeoutMs = 15_000 } = {}) {
       "Content-Type": "application/json",
       "Content-Length": body.length,
     },
-    agent: httpsAgent,
+    agent: url.protocol === "https:" ? httpsAgent : httpAgent,
   };
 
   return new Promise((resolve, reject) => {
-    const req = https.request(opts, (res) => {
+    const req = (url.protocol === "https:" ? https : http).request(opts, (res) => {
       const chunks = [];
       res.on("data", (d) => chunks.push(d));
       res.on("end", () => {
@@ -216,18 +337,43 @@ function postJson(urlStr, payload, { timeoutMs = 15_000 } = {}) {
   });
 }
 
+// -----------------------------
+// Adaptive batch concurrency (AIMD)
+// -----------------------------
+/**
+ * Number of Enhanced batches allowed in flight. Each healthy response adds
+ * 1/limit (about +1 per round of responses); a 429 or timeout halves it,
+ * at most once per CONGESTION_HOLD_MS so a burst of 429s from batches that
+ * were already in flight counts as one congestion event.
+ */
+const CONGESTION_HOLD_MS = 1000;
+let concurrencyLimit = 1;
+let lastCongestionAtMs = 0;
+
+function onBatchHealthy() {
+  concurrencyLimit = Math.min(MAX_CONCURRENCY, concurrencyLimit + 1 / concurrencyLimit);
+}
+
+function onBatchCongested() {
+  const t = nowMs();
+  if (t - lastCongestionAtMs < CONGESTION_HOLD_MS) return;
+  lastCongestionAtMs = t;
+  concurrencyLimit = Math.max(1, concurrencyLimit / 2);
+}
+
 // -----------------------------
 // Enhanced Transactions batch fetch with retry/backoff
 // Docs: /v0/transactions parses multiple signatures; missing txs can be retried.
 // -----------------------------
 async function fetchEnhancedBatch(signatures) {
-  const url = `https://api-mainnet.helius-rpc.com/v0/transactions?api-key=${encodeURIComponent(HELIUS_API_KEY)}`;
+  const url = `${HELIUS_ENHANCED_URL}/v0/transactions?api-key=${encodeURIComponent(HELIUS_API_KEY)}`;
   const payload = { transactions: signatures };
 
   let backoff = 250;
   for (let attempt = 0; attempt < 6; attempt++) {
     try {
       const res = await postJson(url, payload, { timeoutMs: 20_000 });
+      onBatchHealthy();
       if (!Array.isArray(res)) return [];
       return res;
     } catch (e) {
@@ -236,6 +382,8 @@ async function fetchEnhancedBatch(signatures) {
 
       // backoff on 429/timeout
       if (code === 429 || msg.toLowerCase().includes("timeout")) {
+        enhancedCongested += 1;
+        onBatchCongested();
         await sleep(backoff);
         backoff = Math.min(10_000, backoff * 2);
         continue;
@@ -251,12 +399,16 @@ async function fetchEnhancedBatch(signatures) {
 // Pending signature buffer
 // -----------------------------
 /**
- * pending: sig -> { seenAtMs, hintSlot, attempts, nextAttemptAtMs, source }
+ * pending: sig -> { seenAtMs, hintSlot, attempts, nextAttemptAtMs, source, timer }
+ *
+ * Map iteration order is insertion order, so the first key is always the
+ * oldest live entry (O(1) eviction). Retry scheduling is a binary min-heap
+ * of { at, sig } timers keyed by nextAttemptAtMs; a timer is live only while
+ * it is still meta.timer for a pending sig, so rescheduling and deletion
+ * just orphan the old timer and it is discarded when it reaches the top.
  */
 const pending = new Map();
-const pendingOrder = []; // append-only, used for scanning/eviction
-let evictIdx = 0;
-let scanIdx = 0;
+const retryHeap = [];
 
 // Counters
 let ingested = 0;
@@ -265,13 +417,139 @@ let evicted = 0;
 let processed = 0;
 let droppedMissing = 0;
 let enhancedMissing = 0;
-let enhancedRateLimited = 0;
+let enhancedRateLimited = 0; // batches that failed outright on a 429
+let enhancedCongested = 0; // individual 429/timeout attempts, retried with backoff
 let enhancedOtherErrors = 0;
+let seenHits = 0;
+let seenRotations = 0;
+
+// -----------------------------
+// Recently seen signatures (rotating Bloom filter)
+// -----------------------------
+/**
+ * Two Bloom filter generations: signatures are added to the current one and
+ * checked against both. The current generation becomes the previous one
+ * every SEEN_WINDOW_SECONDS (or after SEEN_CAPACITY adds), so a signature is
+ * remembered for one to two windows after it was first seen, whether it was
+ * processed, dropped or evicted since. Sized for ~0.1% false positives at
+ * capacity (14.4 bits and 10 probes per entry); a false positive drops a new
+ * signature, which the counters make visible.
+ */
+const SEEN_BITS = Math.ceil((SEEN_CAPACITY * 14.4) / 32) * 32;
+const SEEN_PROBES = 10;
+
+let seenCurrent = new Uint32Array(SEEN_BITS / 32);
+let seenPrevious = new Uint32Array(SEEN_BITS / 32);
+let seenCurrentCount = 0;
+let seenRotateAtMs = 0;
+
+function sigHashes(sig) {
+  let h1 = 0x811c9dc5;
+  let h2 = 0x9747b28c;
+  for (let i = 0; i < sig.length; i++) {
+    const c = sig.charCodeAt(i);
+    h1 = Math.imul(h1 ^ c, 0x01000193);
+    h2 = Math.imul(h2 ^ c, 0x5bd1e995);
+    h2 ^= h2 >>> 13;
+  }
+  return [h1 >>> 0, (h2 | 1) >>> 0];
+}
+
+function bloomHas(bits, h1, h2) {
+  for (let i = 0; i < SEEN_PROBES; i++) {
+    const b = (h1 + i * h2) % SEEN_BITS;
+    if ((bits[b >>> 5] & (1 << (b & 31))) === 0) return false;
+  }
+  return true;
+}
+
+function bloomAdd(bits, h1, h2) {
+  for (let i = 0; i < SEEN_PROBES; i++) {
+    const b = (h1 + i * h2) % SEEN_BITS;
+    bits[b >>> 5] |= 1 << (b & 31);
+  }
+}
+
+/** Returns true if sig was seen recently; otherwise records it and returns false. */
+function checkAndMarkSeen(sig, t) {
+  if (t >= seenRotateAtMs || seenCurrentCount >= SEEN_CAPACITY) {
+    const recycled = seenPrevious;
+    recycled.fill(0);
+    seenPrevious = seenCurrent;
+    seenCurrent = recycled;
+    seenCurrentCount = 0;
+    seenRotateAtMs = t + SEEN_WINDOW_SECONDS * 1000;
+    seenRotations += 1;
+  }
+
+  const [h1, h2] = sigHashes(sig);
+  if (bloomHas(seenCurrent, h1, h2) || bloomHas(seenPrevious, h1, h2)) return true;
+  bloomAdd(seenCurrent, h1, h2);
+  seenCurrentCount += 1;
+  return false;
+}
+
+function heapPush(heap, entry) {
+  heap.push(entry);
+  let i = heap.length - 1;
+  while (i > 0) {
+    const parent = (i - 1) >> 1;
+    if (heap[parent].at <= entry.at) break;
+    heap[i] = heap[parent];
+    i = parent;
+  }
+  heap[i] = entry;
+}
+
+function heapPop(heap) {
+  const top = heap[0];
+  const last = heap.pop();
+  if (heap.length > 0) {
+    let i = 0;
+    const n = heap.length;
+    while (true) {
+      let child = 2 * i + 1;
+      if (child >= n) break;
+      if (child + 1 < n && heap[child + 1].at < heap[child].at) child += 1;
+      if (heap[child].at >= last.at) break;
+      heap[i] = heap[child];
+      i = child;
+    }
+    heap[i] = last;
+  }
+  return top;
+}
+
+function isLiveTimer(entry) {
+  const meta = pending.get(entry.sig);
+  return meta !== undefined && meta.timer === entry;
+}
+
+function scheduleAttempt(sig, meta, atMs) {
+  meta.nextAttemptAtMs = atMs;
+  meta.timer = { at: atMs, sig };
+  heapPush(retryHeap, meta.timer);
+
+  // Orphaned timers from evictions normally drain within one max backoff;
+  // rebuild if they ever dominate the heap
+  if (retryHeap.length > 2 * pending.size + 10_000) {
+    const live = retryHeap.filter(isLiveTimer);
+    retryHeap.length = 0;
+    for (const entry of live) heapPush(retryHeap, entry);
+  }
+}
 
 function tryIngestSignature(sig, hintSlot, source) {
   if (!sig) return;
   if (pending.has(sig)) return;
 
+  // processed, dropped or evicted recently (another subscription saw it)
+  const t = nowMs();
+  if (checkAndMarkSeen(sig, t)) {
+    seenHits += 1;
+    return;
+  }
+
   // optional sampling
   if (INGRESS_SAMPLE_PCT < 1.0) {
     if (Math.random() > INGRESS_SAMPLE_PCT) {
@@ -280,52 +558,38 @@ function tryIngestSignature(sig, hintSlot, source) {
     }
   }
 
-  // bounded buffer
+  // bounded buffer: evict the oldest live entry (its timer is orphaned)
   if (pending.size >= MAX_PENDING) {
-    // evict oldest live entry using evictIdx
-    while (evictIdx < pendingOrder.length) {
-      const old = pendingOrder[evictIdx++];
-      if (pending.delete(old)) {
-        evicted += 1;
-        break;
-      }
-    }
-    // periodic compaction
-    if (evictIdx > 50_000 && evictIdx > pendingOrder.length / 2) {
-      pendingOrder.splice(0, evictIdx);
-      scanIdx = Math.max(0, scanIdx - evictIdx);
-      evictIdx = 0;
-    }
+    const oldest = pending.keys().next().value;
+    pending.delete(oldest);
+    evicted += 1;
   }
 
-  const t = nowMs();
-  pending.set(sig, {
+  const meta = {
     seenAtMs: t,
     hintSlot: hintSlot || null,
     attempts: 0,
     nextAttemptAtMs: t + INITIAL_DELAY_MS,
     source: source || null,
-  });
-  pendingOrder.push(sig);
+    timer: null,
+  };
+  pending.set(sig, meta);
+  scheduleAttempt(sig, meta, meta.nextAttemptAtMs);
   ingested += 1;
 }
 
+/**
+ * Pop up to BATCH_SIZE signatures whose nextAttemptAtMs has passed.
+ * Popped sigs have no live timer while in flight; batcherTick either
+ * deletes them or reschedules them with scheduleAttempt.
+ */
 function selectReadyBatch(now) {
   const out = [];
-  const maxScan = clampInt(BATCH_SIZE * 50, 500, 20_000); // controls CPU
-
-  let scanned = 0;
-  while (out.length < BATCH_SIZE && scanned < maxScan && pendingOrder.length > 0) {
-    if (scanIdx >= pendingOrder.length) scanIdx = 0;
-
-    const sig = pendingOrder[scanIdx++];
-    scanned += 1;
-
-    const meta = pending.get(sig);
-    if (!meta) continue;
-    if (meta.nextAttemptAtMs > now) continue;
-
-    out.push(sig);
+  while (out.length < BATCH_SIZE && retryHeap.length > 0 && retryHeap[0].at <= now) {
+    const entry = heapPop(retryHeap);
+    if (!isLiveTimer(entry)) continue;
+    pending.get(entry.sig).timer = null;
+    out.push(entry.sig);
   }
   return out;
 }
@@ -453,12 +717,179 @@ function bestStableDelta(ownerMintDeltas) {
   return { bestOwner, bestUsdc, bestUsdt, bestStable };
 }
 
+// -----------------------------
+// Fingerprinting
+// -----------------------------
+/**
+ * The hot path fingerprint is a 64-bit non-cryptographic hash (two 32-bit
+ * lanes) over interned ids. The hash state after type, source and the first
+ * 32 interesting programs is memoised in a trie keyed by interned id, so a
+ * tx costs one intern lookup per program/mint plus hashing its mint ids.
+ * The two lanes are folded into a 53-bit integer key (a number Map key is
+ * far cheaper than a hex string). The exported fingerprint is still sha256
+ * of the JSON payload, computed once per distinct fast key.
+ *
+ * Every processed tx interns its mints, so the intern table, the trie and
+ * the sha256 cache are bounded: once ids + trie nodes pass FP_CACHE_MAX
+ * they are cleared and the fpStats entries re-keyed from their stored
+ * payloads, keeping only what aggregated fingerprints reference. The sha256
+ * cache is cleared at FP_CACHE_MAX entries (aggregated ones are still found
+ * on their fpStats entry).
+ */
+const FP_MAX_PROGRAMS = 32;
+const FP_MAX_MINTS = 32;
+const FP_SEPARATOR = 0xffffffff;
+
+const internedIds = new Map();
+const programSetRoot = { next: new Map(), h1: 0x811c9dc5, h2: 0x9747b28c };
+const fingerprintSha256 = new Map(); // fast key -> sha256 hex
+let trieNodes = 0;
+let fpCacheLimit = FP_CACHE_MAX;
+let fpCachePrunes = 0;
+
+function internId(s) {
+  let id = internedIds.get(s);
+  if (id === undefined) {
+    id = internedIds.size;
+    internedIds.set(s, id);
+  }
+  return id;
+}
+
+function hashMix(h, id, mul) {
+  h = Math.imul(h ^ id, mul);
+  return h ^ (h >>> 15);
+}
+
+function hashFinal(h) {
+  h = Math.imul(h ^ (h >>> 16), 0x85ebca6b);
+  h = Math.imul(h ^ (h >>> 13), 0xc2b2ae35);
+  return (h ^ (h >>> 16)) >>> 0;
+}
+
+function trieChild(node, id) {
+  let child = node.next.get(id);
+  if (child === undefined) {
+    child = { next: new Map(), h1: hashMix(node.h1, id, 0x01000193), h2: hashMix(node.h2, id, 0x5bd1e995) };
+    node.next.set(id, child);
+    trieNodes += 1;
+  }
+  return child;
+}
+
+function fingerprintKey(type, source, programs, mints) {
+  const nProgs = Math.min(programs.length, FP_MAX_PROGRAMS);
+  const nMints = Math.min(mints.length, FP_MAX_MINTS);
+
+  let node = trieChild(trieChild(programSetRoot, internId(type)), internId(source));
+  for (let i = 0; i < nProgs; i++) node = trieChild(node, internId(programs[i]));
+  node = trieChild(node, FP_SEPARATOR);
+
+  let h1 = node.h1;
+  let h2 = node.h2;
+  for (let i = 0; i < nMints; i++) {
+    const id = internId(mints[i]);
+    h1 = hashMix(h1, id, 0x01000193);
+    h2 = hashMix(h2, id, 0x5bd1e995);
+  }
+  return hashFinal(h1) * 0x200000 + (hashFinal(h2 ^ nMints) >>> 11);
+}
+
+function pruneFingerprintCaches() {
+  internedIds.clear();
+  programSetRoot.next.clear();
+  trieNodes = 0;
+  fingerprintSha256.clear();
+  const entries = Array.from(fpStats.values());
+  fpStats.clear();
+  for (const s of entries) {
+    const [type, source, programs, mints] = s.fpInput;
+    fpStats.set(fingerprintKey(type, source, programs, mints), s);
+  }
+  // Don't thrash when the aggregated fingerprints alone fill most of the budget
+  fpCacheLimit = Math.max(FP_CACHE_MAX, 2 * (internedIds.size + trieNodes));
+  fpCachePrunes += 1;
+}
+
+/**
+ * Returns { key, sha256 }: key is the fast fingerprint used for
+ * aggregation, sha256 the exported form of the same payload.
+ */
+function computeFingerprint(type, source, programs, mints) {
+  if (internedIds.size + trieNodes > fpCacheLimit) pruneFingerprintCaches();
+  const key = fingerprintKey(type, source, programs, mints);
+
+  let sha256 = fingerprintSha256.get(key) ?? fpStats.get(key)?.fingerprint;
+  if (sha256 === undefined) {
+    sha256 = sha256Hex(
+      JSON.stringify({
+        type,
+        source,
+        programs: programs.slice(0, FP_MAX_PROGRAMS),
+        mints: mints.slice(0, FP_MAX_MINTS),
+      })
+    );
+    if (fingerprintSha256.size >= FP_CACHE_MAX) fingerprintSha256.clear();
+    fingerprintSha256.set(key, sha256);
+  }
+  return { key, sha256 };
+}
+
 // -----------------------------
 // Aggregation for "alpha surface map"
 // -----------------------------
 const fpStats = new Map();
 const programStats = new Map();
 
+/**
+ * Bounded leaderboards, kept sorted as stats are bumped. Every ranking key
+ * (max/total stable, count) only grows, so an entry outside the top K can
+ * only enter by beating the current last place and entries already on the
+ * board only move up: the board stays exact without rescanning the maps.
+ */
+const LEADERBOARD_SIZE = 50;
+
+function byMaxStable(a, b) {
+  if (a.maxStableRaw !== b.maxStableRaw) return a.maxStableRaw > b.maxStableRaw ? -1 : 1;
+  return b.count - a.count;
+}
+
+function byTotalStable(a, b) {
+  if (a.totalStableRaw !== b.totalStableRaw) return a.totalStableRaw > b.totalStableRaw ? -1 : 1;
+  return b.count - a.count;
+}
+
+function makeLeaderboard(cmp) {
+  return { cmp, rows: [], members: new Set() };
+}
+
+function leaderboardUpdate(board, s) {
+  const { cmp, rows, members } = board;
+  let i;
+  if (members.has(s)) {
+    i = rows.indexOf(s);
+  } else if (rows.length < LEADERBOARD_SIZE) {
+    rows.push(s);
+    members.add(s);
+    i = rows.length - 1;
+  } else {
+    i = rows.length - 1;
+    if (cmp(s, rows[i]) >= 0) return;
+    members.delete(rows[i]);
+    rows[i] = s;
+    members.add(s);
+  }
+  while (i > 0 && cmp(rows[i], rows[i - 1]) < 0) {
+    const tmp = rows[i - 1];
+    rows[i - 1] = rows[i];
+    rows[i] = tmp;
+    i -= 1;
+  }
+}
+
+const topFingerprints = makeLeaderboard(byMaxStable);
+const topPrograms = makeLeaderboard(byTotalStable);
+
 function bumpProgram(pid, delta) {
   const s = programStats.get(pid) || {
     programId: pid,
@@ -474,11 +905,12 @@ function bumpProgram(pid, delta) {
   s.totalStableRaw += delta.stable;
   if (delta.stable > s.maxStableRaw) s.maxStableRaw = delta.stable;
   programStats.set(pid, s);
+  leaderboardUpdate(topPrograms, s);
 }
 
-function bumpFingerprint(fp, feePayer, delta, examples) {
+function bumpFingerprint(fpKey, fp, feePayer, delta, examples) {
   const t = nowMs();
-  const s = fpStats.get(fp) || {
+  const s = fpStats.get(fpKey) || {
     fingerprint: fp,
     firstSeenMs: t,
     lastSeenMs: t,
@@ -492,6 +924,13 @@ function bumpFingerprint(fp, feePayer, delta, examples) {
     examplePrograms: [],
     exampleMints: [],
     exampleTypeSource: examples.typeSource || null,
+    // Full fingerprint payload, to re-key the entry when the caches are pruned
+    fpInput: [
+      examples.type,
+      examples.source,
+      examples.programs.slice(0, FP_MAX_PROGRAMS),
+      examples.mints.slice(0, FP_MAX_MINTS),
+    ],
   };
   s.lastSeenMs = t;
   s.count += 1;
@@ -505,11 +944,14 @@ function bumpFingerprint(fp, feePayer, delta, examples) {
   if (s.examplePrograms.length === 0) s.examplePrograms = examples.programs.slice(0, 16);
   if (s.exampleMints.length === 0) s.exampleMints = examples.mints.slice(0, 16);
 
-  fpStats.set(fp, s);
+  fpStats.set(fpKey, s);
+  leaderboardUpdate(topFingerprints, s);
 }
 
-function writeSummary() {
-  const fps = Array.from(fpStats.values()).map((s) => ({
+let summaryWrite = null;
+
+function buildSummary() {
+  const fps = topFingerprints.rows.map((s) => ({
     fingerprint: s.fingerprint,
     firstSeen: new Date(s.firstSeenMs).toISOString(),
     lastSeen: new Date(s.lastSeenMs).toISOString(),
@@ -525,14 +967,7 @@ function writeSummary() {
     exampleMints: s.exampleMints,
   }));
 
-  fps.sort((a, b) => {
-    const A = BigInt(a.maxStableRaw);
-    const B = BigInt(b.maxStableRaw);
-    if (A === B) return b.count - a.count;
-    return B > A ? 1 : -1;
-  });
-
-  const progs = Array.from(programStats.values()).map((p) => ({
+  const progs = topPrograms.rows.map((p) => ({
     programId: p.programId,
     count: p.count,
     totalFeeLamports: p.totalFeeLamports.toString(),
@@ -541,14 +976,7 @@ function writeSummary() {
     maxStableRaw: p.maxStableRaw.toString(),
   }));
 
-  progs.sort((a, b) => {
-    const A = BigInt(a.totalStableRaw);
-    const B = BigInt(b.totalStableRaw);
-    if (A === B) return b.count - a.count;
-    return B > A ? 1 : -1;
-  });
-
-  const summary = {
+  return {
     schema: "alpha_mev_surface_summary_v2",
     generatedAt: new Date().toISOString(),
     config: {
@@ -559,9 +987,15 @@ function writeSummary() {
       initialDelayMs: INITIAL_DELAY_MS,
       maxMissingRetries: MAX_MISSING_RETRIES,
       maxPending: MAX_PENDING,
+      maxConcurrency: MAX_CONCURRENCY,
+      seenWindowSeconds: SEEN_WINDOW_SECONDS,
+      seenCapacity: SEEN_CAPACITY,
       ingressSamplePct: INGRESS_SAMPLE_PCT,
       storeEnhanced: STORE_ENHANCED,
       outFile: OUT_FILE,
+      outCompress: OUT_COMPRESS,
+      outRotateMb: OUT_ROTATE_MB,
+      outRotateMinutes: OUT_ROTATE_MINUTES,
     },
     counters: {
       ingested,
@@ -571,33 +1005,70 @@ function writeSummary() {
       droppedMissing,
       enhancedMissing,
       enhancedRateLimited,
+      enhancedCongested,
       enhancedOtherErrors,
+      seenHits,
+      seenRotations,
+      outFiles: outPart,
+      outBytes,
+      outDrainWaits,
       pending: pending.size,
+      concurrencyLimit: Math.floor(concurrencyLimit),
+      inFlight,
+      fingerprints: fpStats.size,
+      fingerprintCachePrunes: fpCachePrunes,
+      internedIds: internedIds.size,
+      programs: programStats.size,
     },
-    topFingerprintsByMaxStable: fps.slice(0, 50),
-    topProgramsByTotalStable: progs.slice(0, 50),
+    topFingerprintsByMaxStable: fps,
+    topProgramsByTotalStable: progs,
   };
+}
 
-  fs.writeFileSync(SUMMARY_FILE, JSON.stringify(summary, null, 2));
+/**
+ * Write the summary to a temp file and rename it over SUMMARY_FILE, so
+ * readers never see a partial file. A write still in progress is awaited
+ * instead of starting a second one.
+ */
+function writeSummary() {
+  if (summaryWrite) return summaryWrite;
+  const tmp = `${SUMMARY_FILE}.tmp`;
+  summaryWrite = fs.promises
+    .writeFile(tmp, JSON.stringify(buildSummary(), null, 2))
+    .then(() => fs.promises.rename(tmp, SUMMARY_FILE))
+    .finally(() => {
+      summaryWrite = null;
+    });
+  return summaryWrite;
 }
 
 // -----------------------------
 // Main processing loop (batcher)
 // -----------------------------
-let inFlight = false;
-
-async function batcherTick(stopAtMs) {
-  if (inFlight) return;
-  if (pending.size === 0) return;
-
-  const now = nowMs();
-  if (now >= stopAtMs) return;
+let inFlight = 0;
 
-  const sigs = selectReadyBatch(now);
-  if (sigs.length === 0) return;
-
-  inFlight = true;
+/**
+ * Dispatch ready batches until floor(concurrencyLimit) are in flight.
+ * Throughput is then about limit * BATCH_SIZE per max(round-trip, interval).
+ */
+function batcherTick(stopAtMs) {
+  while (!outPaused && inFlight < Math.floor(concurrencyLimit) && pending.size > 0) {
+    const now = nowMs();
+    if (now >= stopAtMs) return;
+
+    const sigs = selectReadyBatch(now);
+    if (sigs.length === 0) return;
+
+    inFlight += 1;
+    processBatch(sigs)
+      .catch((e) => console.warn(`[batcher] ${String((e && e.message) || e)}`))
+      .finally(() => {
+        inFlight -= 1;
+      });
+  }
+}
 
+async function processBatch(sigs) {
   try {
     const enhanced = await fetchEnhancedBatch(sigs);
 
@@ -625,8 +1096,7 @@ async function batcherTick(stopAtMs) {
         }
         // exponential-ish retry scheduling
         const backoff = Math.min(20_000, 500 * Math.pow(2, meta.attempts));
-        meta.nextAttemptAtMs = nowMs() + backoff;
-        pending.set(sig, meta);
+        scheduleAttempt(sig, meta, nowMs() + backoff);
         continue;
       }
 
@@ -648,22 +1118,18 @@ async function batcherTick(stopAtMs) {
       const source = String(enh?.source || "");
       const typeSource = `${type}:${source}`;
 
-      const fpPayload = JSON.stringify({
-        type,
-        source,
-        programs: programsInteresting.slice(0, 32),
-        mints: changedMints.slice(0, 32),
-      });
-      const fingerprint = sha256Hex(fpPayload);
+      const fp = computeFingerprint(type, source, programsInteresting, changedMints);
+      const fingerprint = fp.sha256;
 
       // Update aggregates only if there's evidence of value or tip
       const stable = best.bestStable;
       if (stable > 0n || tip.totalLamports > 0n) {
         bumpFingerprint(
+          fp.key,
           fingerprint,
           feePayer,
           { fee: feeLamports, tip: tip.totalLamports, stable },
-          { sig, programs: programsInteresting, mints: changedMints, typeSource }
+          { sig, programs: programsInteresting, mints: changedMints, type, source, typeSource }
         );
         for (const pid of programsInteresting) {
           bumpProgram(pid, { fee: feeLamports, tip: tip.totalLamports, stable });
@@ -710,7 +1176,7 @@ async function batcherTick(stopAtMs) {
         ...(STORE_ENHANCED ? { enhanced: enh } : {}),
       };
 
-      outStream.write(JSON.stringify(record) + "\n");
+      writeRecord(JSON.stringify(record) + "\n");
       processed += 1;
 
       // Remove from pending
@@ -730,12 +1196,9 @@ async function batcherTick(stopAtMs) {
     const t = nowMs() + delay;
     for (const sig of sigs) {
       const meta = pending.get(sig);
-      if (!meta) continue;
-      meta.nextAttemptAtMs = Math.max(meta.nextAttemptAtMs, t);
-      pending.set(sig, meta);
+      if (!meta || meta.timer) continue;
+      scheduleAttempt(sig, meta, Math.max(meta.nextAttemptAtMs, t));
     }
-  } finally {
-    inFlight = false;
   }
 }
 
@@ -780,10 +1243,11 @@ async function main() {
   console.log(`[alpha_mev_edge_research_v2] Starting...`);
   console.log(`  RPC: ${HELIUS_RPC_URL}`);
   console.log(`  WSS: ${HELIUS_WSS_URL}`);
+  console.log(`  Enhanced: ${HELIUS_ENHANCED_URL}`);
   console.log(`  commitment=${COMMITMENT} runSeconds=${RUN_SECONDS}`);
   console.log(`  batchSize=${BATCH_SIZE} batchIntervalMs=${BATCH_INTERVAL_MS} initialDelayMs=${INITIAL_DELAY_MS}`);
-  console.log(`  maxPending=${MAX_PENDING} ingressSamplePct=${INGRESS_SAMPLE_PCT}`);
-  console.log(`  out=${OUT_FILE}`);
+  console.log(`  maxPending=${MAX_PENDING} ingressSamplePct=${INGRESS_SAMPLE_PCT} maxConcurrency=${MAX_CONCURRENCY}`);
+  console.log(`  out=${OUT_FILE} compress=${OUT_COMPRESS} rotateMb=${OUT_ROTATE_MB} rotateMinutes=${OUT_ROTATE_MINUTES}`);
   console.log(`  summary=${SUMMARY_FILE} every=${SUMMARY_EVERY_SECONDS}s`);
   console.log(`  storeEnhanced=${STORE_ENHANCED}`);
 
@@ -793,11 +1257,17 @@ async function main() {
   console.log(`[subscriptions] active=${subs.length} (tipAccounts=${JITO_TIP_ACCOUNTS.length} + tipProgram=1)`);
 
   // Summary interval
+  let lastSummaryAtMs = nowMs();
+  let lastSummaryProcessed = 0;
   const summaryInterval = setInterval(() => {
+    writeSummary().catch((e) => console.warn(`[summary] write failed: ${String((e && e.message) || e)}`));
     try {
-      writeSummary();
+      const t = nowMs();
+      const sigPerSec = ((processed - lastSummaryProcessed) * 1000) / Math.max(1, t - lastSummaryAtMs);
+      lastSummaryAtMs = t;
+      lastSummaryProcessed = processed;
       console.log(
-        `[summary] ingested=${ingested} processed=${processed} pending=${pending.size} evicted=${evicted} missingRetry=${enhancedMissing} droppedMissing=${droppedMissing} rateLimited=${enhancedRateLimited}`
+        `[summary] ingested=${ingested} processed=${processed} pending=${pending.size} evicted=${evicted} missingRetry=${enhancedMissing} droppedMissing=${droppedMissing} rateLimited=${enhancedRateLimited} dupSeen=${seenHits} congested=${enhancedCongested} concurrency=${Math.floor(concurrencyLimit)} inFlight=${inFlight} sigPerSec=${sigPerSec.toFixed(1)}`
       );
     } catch (e) {
       console.warn(`[summary] failed: ${String((e && e.message) || e)}`);
@@ -805,20 +1275,27 @@ async function main() {
   }, SUMMARY_EVERY_SECONDS * 1000);
 
   // Batcher interval
-  const batchInterval = setInterval(() => {
-    batcherTick(stopAtMs).catch((e) => console.warn(`[batcher] ${String((e && e.message) || e)}`));
-  }, BATCH_INTERVAL_MS);
+  const batchInterval = setInterval(() => batcherTick(stopAtMs), BATCH_INTERVAL_MS);
 
   const stop = async () => {
     clearInterval(summaryInterval);
     clearInterval(batchInterval);
 
-    try { writeSummary(); } catch {}
+    // let in-flight batches finish writing before the stream is closed
+    const drainUntilMs = nowMs() + 30_000;
+    while (inFlight > 0 && nowMs() < drainUntilMs) {
+      await sleep(50);
+    }
+
+    try {
+      if (summaryWrite) await summaryWrite;
+      await writeSummary();
+    } catch {}
 
     for (const id of subs) {
       try { await connection.removeOnLogsListener(id); } catch {}
     }
-    outStream.end();
+    await closeOutput();
   };
 
   process.on("SIGINT", async () => {
@@ -835,7 +1312,7 @@ async function main() {
   await stop();
 
   console.log(`[alpha_mev_edge_research_v2] Done.`);
-  console.log(`  JSONL: ${OUT_FILE}`);
+  console.log(`  JSONL: ${outPart > 1 ? `${outPart} parts, last ${outPath}` : outPath || outPartPath(1)}`);
   console.log(`  Summary: ${SUMMARY_FILE}`);
 }
 
@@ -1,10 +1,13 @@
 #!/usr/bin/env python3
+import os
 import sys
 import json
 from decimal import Decimal, getcontext
 from collections import defaultdict
 from typing import Any, Dict, Optional, List
 
+from stage_profile import StageProfiler, profiler_from_argv
+
 getcontext().prec = 28
 
 # Program IDs
@@ -218,7 +221,8 @@ def canonical_pair(m1: str, m2: str) -> tuple[str, str]:
     return (m1, m2) if m1 <= m2 else (m2, m1)
 
 
-def main(path: str) -> None:
+def main(path: str, prof: Optional[StageProfiler] = None) -> None:
+    prof = prof or StageProfiler("analyze_cross_venue_spreads_v2")
     swaps = []
 
     skipped_parse = 0
@@ -226,8 +230,8 @@ def main(path: str) -> None:
     skipped_no_prog = 0
     skipped_no_swap = 0
 
-    with open(path, "r") as f:
-        for line_no, line in enumerate(f, 1):
+    with open(path, "r") as f, prof.stage("parse") as st:
+        for line_no, line in enumerate(prof.iter("read", f), 1):
             line = line.strip()
             if not line:
                 continue
@@ -261,113 +265,125 @@ def main(path: str) -> None:
             swap["venue"] = venue
             swaps.append(swap)
 
+        skipped = skipped_parse + skipped_no_enh + skipped_no_prog + skipped_no_swap
+        st.add(records_in=len(swaps) + skipped, records_out=len(swaps))
+    prof.add("read", bytes_in=os.path.getsize(path))
+
     print(f"Loaded swaps: {len(swaps)}")
     print(f"Skipped parse errors: {skipped_parse}")
     print(f"Skipped no enhanced-like payload: {skipped_no_enh}")
     print(f"Skipped no program match: {skipped_no_prog}")
     print(f"Skipped no simple 2-token swap: {skipped_no_swap}")
 
-    # === Cross-venue spread aggregation ===
-    # key: (pair0, pair1, direction, bucket) -> venue -> [prices]
-    table: Dict[tuple[str, str, str, int], Dict[str, List[Decimal]]] = defaultdict(
-        lambda: defaultdict(list)
-    )
-
-    for s in swaps:
-        venue = s["venue"]
-        if venue not in ENABLE_VENUES:
-            continue
-
-        in_mint = s["in_mint"]
-        out_mint = s["out_mint"]
-        ts = s.get("timestamp")
-        slot = s.get("slot")
+    with prof.stage("group") as st:
+        # === Cross-venue spread aggregation ===
+        # key: (pair0, pair1, direction, bucket) -> venue -> [prices]
+        table: Dict[tuple[str, str, str, int], Dict[str, List[Decimal]]] = defaultdict(
+            lambda: defaultdict(list)
+        )
 
-        if ts is None:
-            if slot is None:
+        for s in swaps:
+            venue = s["venue"]
+            if venue not in ENABLE_VENUES:
                 continue
-            bucket = int(slot)
-        else:
-            bucket = int(ts) // BUCKET_SECONDS
 
-        pair = canonical_pair(in_mint, out_mint)
-        direction = f"{in_mint}->{out_mint}"
-        key = (pair[0], pair[1], direction, bucket)
+            in_mint = s["in_mint"]
+            out_mint = s["out_mint"]
+            ts = s.get("timestamp")
+            slot = s.get("slot")
 
-        table[key][venue].append(s["price"])
+            if ts is None:
+                if slot is None:
+                    continue
+                bucket = int(slot)
+            else:
+                bucket = int(ts) // BUCKET_SECONDS
 
-    events = []
+            pair = canonical_pair(in_mint, out_mint)
+            direction = f"{in_mint}->{out_mint}"
+            key = (pair[0], pair[1], direction, bucket)
 
-    for key, venue_prices in table.items():
-        if len(venue_prices) < MIN_VENUES:
-            continue
+            table[key][venue].append(s["price"])
 
-        # median per venue
-        med_prices: Dict[str, Decimal] = {}
-        for venue, prices in venue_prices.items():
-            m = median_decimal(prices)
-            if m is not None and m > 0:
-                med_prices[venue] = m
+        st.add(records_in=len(swaps), records_out=len(table))
 
-        if len(med_prices) < MIN_VENUES:
-            continue
+    with prof.stage("analyze") as st:
+        events = []
 
-        venues = list(med_prices.keys())
-        prices = [med_prices[v] for v in venues]
+        for key, venue_prices in table.items():
+            if len(venue_prices) < MIN_VENUES:
+                continue
 
-        max_idx = max(range(len(prices)), key=lambda i: prices[i])
-        min_idx = min(range(len(prices)), key=lambda i: prices[i])
+            # median per venue
+            med_prices: Dict[str, Decimal] = {}
+            for venue, prices in venue_prices.items():
+                m = median_decimal(prices)
+                if m is not None and m > 0:
+                    med_prices[venue] = m
 
-        max_venue, max_price = venues[max_idx], prices[max_idx]
-        min_venue, min_price = venues[min_idx], prices[min_idx]
+            if len(med_prices) < MIN_VENUES:
+                continue
 
-        spread_bps = (max_price / min_price - Decimal(1)) * Decimal(10000)
+            venues = list(med_prices.keys())
+            prices = [med_prices[v] for v in venues]
 
-        if spread_bps < MIN_SPREAD_BPS:
-            continue
+            max_idx = max(range(len(prices)), key=lambda i: prices[i])
+            min_idx = min(range(len(prices)), key=lambda i: prices[i])
 
-        pair0, pair1, direction, bucket = key
-
-        events.append(
-            {
-                "pair0": pair0,
-                "pair1": pair1,
-                "direction": direction,
-                "bucket": bucket,
-                "max_venue": max_venue,
-                "min_venue": min_venue,
-                "max_price": max_price,
-                "min_price": min_price,
-                "spread_bps": spread_bps,
-                "venue_counts": {v: len(prs) for v, prs in venue_prices.items()},
-            }
-        )
+            max_venue, max_price = venues[max_idx], prices[max_idx]
+            min_venue, min_price = venues[min_idx], prices[min_idx]
+
+            spread_bps = (max_price / min_price - Decimal(1)) * Decimal(10000)
 
-    events.sort(key=lambda e: e["spread_bps"], reverse=True)
+            if spread_bps < MIN_SPREAD_BPS:
+                continue
 
-    print()
-    print(
-        f"Cross-venue spread events (>= {MIN_SPREAD_BPS} bps), "
-        f"top {TOP_N_EVENTS}:"
-    )
-    for e in events[:TOP_N_EVENTS]:
-        p0 = e["pair0"]
-        p1 = e["pair1"]
+            pair0, pair1, direction, bucket = key
+
+            events.append(
+                {
+                    "pair0": pair0,
+                    "pair1": pair1,
+                    "direction": direction,
+                    "bucket": bucket,
+                    "max_venue": max_venue,
+                    "min_venue": min_venue,
+                    "max_price": max_price,
+                    "min_price": min_price,
+                    "spread_bps": spread_bps,
+                    "venue_counts": {v: len(prs) for v, prs in venue_prices.items()},
+                }
+            )
+
+        events.sort(key=lambda e: e["spread_bps"], reverse=True)
+
+        st.add(records_in=len(table), records_out=len(events))
+
+    with prof.stage("report"):
+        print()
         print(
-            f"{p0[:6]}..{p0[-4:]} / {p1[:6]}..{p1[-4:]} "
-            f"{e['direction']} bucket={e['bucket']} "
-            f"spread={e['spread_bps']:.1f} bps "
-            f"{e['min_venue']}->{e['max_venue']} "
-            f"prices={e['min_price']:.8f}->{e['max_price']:.8f} "
-            f"counts={e['venue_counts']}"
+            f"Cross-venue spread events (>= {MIN_SPREAD_BPS} bps), "
+            f"top {TOP_N_EVENTS}:"
         )
+        for e in events[:TOP_N_EVENTS]:
+            p0 = e["pair0"]
+            p1 = e["pair1"]
+            print(
+                f"{p0[:6]}..{p0[-4:]} / {p1[:6]}..{p1[-4:]} "
+                f"{e['direction']} bucket={e['bucket']} "
+                f"spread={e['spread_bps']:.1f} bps "
+                f"{e['min_venue']}->{e['max_venue']} "
+                f"prices={e['min_price']:.8f}->{e['max_price']:.8f} "
+                f"counts={e['venue_counts']}"
+            )
 
 
 if __name__ == "__main__":
+    prof = profiler_from_argv(sys.argv, "analyze_cross_venue_spreads_v2")
     if len(sys.argv) != 2:
         print(
-            "Usage: analyze_cross_venue_spreads_v2.py <helius_alpha_swaps.ndjson>",
+            "Usage: analyze_cross_venue_spreads_v2.py <helius_alpha_swaps.ndjson> [--profile] [--profile-json PATH]",
             file=sys.stderr,
         )
         sys.exit(1)
-    main(sys.argv[1])
+    main(sys.argv[1], prof)
@@ -0,0 +1,346 @@
+#!/usr/bin/env python3
+"""
+bench_analyzers.py
+
+Benchmarks the offline analyzers on synthetic Helius tapes
+(gen_helius_tape.py), end-to-end and per function, so parse rate, group-by
+rate and memory can be tracked as the code evolves.
+
+End-to-end: each analyzer script runs in its own process with
+--profile-json (stage_profile.py); reported are wall MB/s and records/s, the
+parse and group/analyze stage rates, and peak RSS.
+
+Per function: the first --func-records records of each tape are loaded once
+and every parse / group-by function is timed (best of --repeat), with its
+tracemalloc peak from one extra run. This runs in a spawned process so the
+records never inflate this process, whose peak RSS Linux carries into every
+script it launches.
+
+Tapes are generated per --sizes entry (10MB .. 5GB) and cached in --tape-dir
+by shape, size and generator options, so large tapes are built once. --json-out writes an
+analyzer_bench_v1 document; --compare prints the change against a previous one.
+
+Usage:
+    python3 bench_analyzers.py --sizes 10MB,100MB --json-out bench.json
+    python3 bench_analyzers.py --sizes 1GB --tape-dir /data/tapes --compare bench.json
+    python3 bench_analyzers.py --analyzers extract_alpha --no-e2e --zipf-s 1.4
+"""
+
+import argparse
+import hashlib
+import importlib
+import json
+import multiprocessing
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from itertools import islice
+from typing import Callable, Dict, List, Optional, Tuple
+
+from gen_helius_tape import add_generator_args, generate_tape, generator_options, parse_size
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+VALIDATOR_DIR = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, VALIDATOR_DIR)
+
+# analyzer -> tape shape it reads
+ANALYZERS = {
+    "extract_alpha": "tx",
+    "validate_cross_venue": "tx",
+    "validate_cross_venue_v2": "tx",
+    "analyze_alpha_swaps": "dex",
+    "analyze_cross_venue_spreads_v2": "enhanced",
+}
+
+Case = Tuple[str, Callable[[], object], int]
+
+
+def _each(fn: Callable, items: List) -> Callable[[], int]:
+    def run() -> int:
+        return sum(1 for x in items if fn(x) is not None)
+    return run
+
+
+def _metas(records: List[dict]) -> List[dict]:
+    return [r.get("tx", {}).get("meta", {}) for r in records]
+
+
+def cases_extract_alpha(mod, records: List[dict], lines: List[str]) -> List[Case]:
+    events = [e for e in map(mod.parse_swap_event, records) if e]
+    return [
+        ("parse_swap_event", _each(mod.parse_swap_event, records), len(records)),
+        ("extract_balance_deltas", _each(mod.extract_balance_deltas, _metas(records)), len(records)),
+        ("find_real_cross_venue_arb", lambda: mod.find_real_cross_venue_arb(events), len(events)),
+        ("analyze_jito_bundle_patterns", lambda: mod.analyze_jito_bundle_patterns(events), len(events)),
+        ("analyze_large_trade_patterns", lambda: mod.analyze_large_trade_patterns(events), len(events)),
+        ("analyze_venue_competition", lambda: mod.analyze_venue_competition(events), len(events)),
+    ]
+
+
+def cases_validate_cross_venue(mod, records: List[dict], lines: List[str]) -> List[Case]:
+    swaps = [s for s in map(mod.parse_swap, records) if s]
+    return [
+        ("parse_swap", _each(mod.parse_swap, records), len(records)),
+        ("extract_token_balances", _each(mod.extract_token_balances, _metas(records)), len(records)),
+        ("find_exact_same_slot_opportunities", lambda: mod.find_exact_same_slot_opportunities(swaps), len(swaps)),
+        ("find_adjacent_slot_opportunities", lambda: mod.find_adjacent_slot_opportunities(swaps, max_slot_gap=1), len(swaps)),
+        ("analyze_data_quality", lambda: mod.analyze_data_quality(swaps), len(swaps)),
+    ]
+
+
+def cases_validate_cross_venue_v2(mod, records: List[dict], lines: List[str]) -> List[Case]:
+    swaps = [s for s in map(mod.parse_swap, records) if s]
+    return [
+        ("parse_swap", _each(mod.parse_swap, records), len(records)),
+        ("extract_balance_changes", _each(mod.extract_balance_changes, _metas(records)), len(records)),
+        ("find_same_slot_opportunities", lambda: mod.find_same_slot_opportunities(swaps), len(swaps)),
+        ("analyze_quality", lambda: mod.analyze_quality(swaps), len(swaps)),
+    ]
+
+
+def cases_analyze_alpha_swaps(mod, records: List[dict], lines: List[str]) -> List[Case]:
+    return [
+        ("load_records", lambda: sum(1 for _ in mod.load_records(lines)), len(lines)),
+        ("group_swaps", lambda: mod.group_swaps(records, mod.new_swap_groups()), len(records)),
+    ]
+
+
+def cases_analyze_cross_venue_spreads_v2(mod, records: List[dict], lines: List[str]) -> List[Case]:
+    pairs = [(r, mod.extract_enhanced(r)) for r in records]
+    enhanced = [e for _, e in pairs if e is not None]
+    return [
+        ("extract_enhanced", _each(mod.extract_enhanced, records), len(records)),
+        ("get_program_id", lambda: sum(1 for r, e in pairs if e is not None and mod.get_program_id(r, e)), len(pairs)),
+        ("extract_swap_from_enhanced", _each(mod.extract_swap_from_enhanced, enhanced), len(enhanced)),
+    ]
+
+
+FUNCTION_CASES = {
+    "extract_alpha": cases_extract_alpha,
+    "validate_cross_venue": cases_validate_cross_venue,
+    "validate_cross_venue_v2": cases_validate_cross_venue_v2,
+    "analyze_alpha_swaps": cases_analyze_alpha_swaps,
+    "analyze_cross_venue_spreads_v2": cases_analyze_cross_venue_spreads_v2,
+}
+
+
+def run_e2e(analyzer: str, tape: str, tape_bytes: int, records: int, workdir: str) -> Dict[str, object]:
+    """Run one analyzer script on the tape with --profile-json; stdout is discarded."""
+    profile_path = os.path.join(workdir, f"{analyzer}.profile.json")
+    cmd = [sys.executable, os.path.join(VALIDATOR_DIR, f"{analyzer}.py"), tape, "--profile-json", profile_path]
+    t0 = time.perf_counter()
+    proc = subprocess.run(cmd, cwd=VALIDATOR_DIR, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+    wall = time.perf_counter() - t0
+    if proc.returncode != 0:
+        return {"error": f"exit {proc.returncode}: {proc.stderr.strip().splitlines()[-1:]}", "wall_s": round(wall, 3)}
+    with open(profile_path) as f:
+        profile = json.load(f)
+    stages = {s["name"]: s for s in profile["stages"]}
+    group = stages.get("group") or stages.get("analyze") or {}
+    return {
+        "wall_s": round(wall, 3),
+        "mb_per_s": round(tape_bytes / 1e6 / wall, 2) if wall > 0 else None,
+        "records_per_s": round(records / wall, 1) if wall > 0 else None,
+        "parse_records_per_s": stages.get("parse", {}).get("records_per_s"),
+        "group_records_per_s": group.get("records_per_s"),
+        "peak_rss_mb": profile["peak_rss_mb"],
+        "stages": profile["stages"],
+    }
+
+
+def run_functions(analyzer: str, tape: str, limit: int, repeat: int, measure_mem: bool) -> Dict[str, Dict[str, object]]:
+    with open(tape, encoding="utf-8") as f:
+        lines = list(islice(f, limit))
+    records = [json.loads(line) for line in lines]
+    mod = importlib.import_module(analyzer)
+    results: Dict[str, Dict[str, object]] = {}
+    for label, fn, n in FUNCTION_CASES[analyzer](mod, records, lines):
+        best = float("inf")
+        for _ in range(repeat):
+            t0 = time.perf_counter()
+            fn()
+            best = min(best, time.perf_counter() - t0)
+        peak_kb = None
+        if measure_mem:
+            tracemalloc.start()
+            fn()
+            peak_kb = round(tracemalloc.get_traced_memory()[1] / 1024, 1)
+            tracemalloc.stop()
+        results[label] = {
+            "items": n,
+            "best_s": round(best, 6),
+            "items_per_s": round(n / best, 1) if best > 0 else None,
+            "peak_kb": peak_kb,
+        }
+    return results
+
+
+def tape_for(shape: str, size: int, args: argparse.Namespace, tape_dir: str, cache: Dict[str, dict]) -> dict:
+    """Generate (or reuse) the tape for shape/size; the file name hashes every generator option."""
+    options = json.dumps(generator_options(args), sort_keys=True)
+    name = f"tape_{shape}_{size}_{hashlib.sha1(options.encode()).hexdigest()[:10]}.ndjson"
+    path = os.path.join(tape_dir, name)
+    if path in cache:
+        return cache[path]
+    meta_path = path + ".meta.json"
+    if os.path.exists(path) and os.path.exists(meta_path):
+        with open(meta_path) as f:
+            stats = json.load(f)
+        print(f"  reusing {path}", file=sys.stderr)
+    else:
+        print(f"  generating {shape} tape, {size / 1024 ** 2:,.0f} MB -> {path}", file=sys.stderr)
+        stats = generate_tape(path, shape, size_bytes=size, progress=True, **generator_options(args))
+        with open(meta_path, "w") as f:
+            json.dump(stats, f)
+    cache[path] = stats
+    return stats
+
+
+def git_revision() -> Optional[str]:
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=BENCH_DIR, capture_output=True, text=True)
+    except OSError:
+        return None
+    return out.stdout.strip() or None
+
+
+def print_run(run: dict) -> None:
+    print()
+    print(f"=== {run['size']} ===")
+    tapes = run["tapes"]
+    for shape, t in tapes.items():
+        print(f"  {shape:<9} {t['records']:>10,} records {t['bytes'] / 1e6:>9.1f} MB  "
+              f"collisions={t['same_slot_collisions']:,} generated in {t['seconds']:.1f}s")
+    if run["e2e"]:
+        print()
+        header = f"  {'analyzer':<32} {'wall s':>8} {'MB/s':>7} {'rec/s':>10} {'parse rec/s':>12} {'group rec/s':>12} {'peak MB':>8}"
+        print(header)
+        print("  " + "-" * (len(header) - 2))
+        for name, r in run["e2e"].items():
+            if "error" in r:
+                print(f"  {name:<32} {r['error']}")
+                continue
+            fmt = lambda v: f"{v:,.0f}" if v is not None else "-"
+            print(f"  {name:<32} {r['wall_s']:>8.2f} {r['mb_per_s']:>7.1f} {fmt(r['records_per_s']):>10} "
+                  f"{fmt(r['parse_records_per_s']):>12} {fmt(r['group_records_per_s']):>12} {r['peak_rss_mb']:>8.1f}")
+    if run["functions"]:
+        print()
+        header = f"  {'function':<60} {'items':>8} {'best ms':>9} {'items/s':>12} {'peak KB':>10}"
+        print(header)
+        print("  " + "-" * (len(header) - 2))
+        for name, funcs in run["functions"].items():
+            for label, r in funcs.items():
+                peak = f"{r['peak_kb']:,.0f}" if r["peak_kb"] is not None else "-"
+                rate = f"{r['items_per_s']:,.0f}" if r["items_per_s"] is not None else "-"
+                print(f"  {name + '.' + label:<60} {r['items']:>8} {r['best_s'] * 1000:>9.2f} {rate:>12} {peak:>10}")
+
+
+def compare(current: dict, baseline: dict) -> None:
+    """Print relative change of the tracked rates/memory against a previous --json-out."""
+    def pct(new, old):
+        if new is None or not old:
+            return "-"
+        return f"{(new - old) / old * 100:+.1f}%"
+
+    base_runs = {r["size"]: r for r in baseline.get("runs", [])}
+    print()
+    print(f"=== vs {baseline.get('git_rev') or '?'} ({baseline.get('generated_at', '?')}) ===")
+    for run in current["runs"]:
+        base = base_runs.get(run["size"])
+        if base is None:
+            print(f"  {run['size']}: no baseline run")
+            continue
+        for name, r in run["e2e"].items():
+            b = base["e2e"].get(name)
+            if not b or "error" in r or "error" in b:
+                continue
+            print(f"  {run['size']} {name:<32} MB/s {pct(r['mb_per_s'], b['mb_per_s']):>8}  "
+                  f"parse {pct(r['parse_records_per_s'], b['parse_records_per_s']):>8}  "
+                  f"group {pct(r['group_records_per_s'], b['group_records_per_s']):>8}  "
+                  f"peak RSS {pct(r['peak_rss_mb'], b['peak_rss_mb']):>8}")
+        for name, funcs in run["functions"].items():
+            for label, r in funcs.items():
+                b = base["functions"].get(name, {}).get(label)
+                if not b:
+                    continue
+                print(f"  {run['size']} {name + '.' + label:<52} items/s {pct(r['items_per_s'], b['items_per_s']):>8}  "
+                      f"peak {pct(r['peak_kb'], b['peak_kb']):>8}")
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmark the offline analyzers on synthetic Helius tapes")
+    parser.add_argument("--sizes", default="10MB", help="Comma-separated tape sizes, e.g. 10MB,100MB,1GB,5GB (default 10MB)")
+    parser.add_argument("--analyzers", default=",".join(ANALYZERS), help=f"Comma-separated analyzers (default all: {','.join(ANALYZERS)})")
+    parser.add_argument("--tape-dir", help="Keep and reuse tapes here (default: a temp dir, removed at exit)")
+    parser.add_argument("--no-e2e", action="store_true", help="Skip end-to-end script runs")
+    parser.add_argument("--no-func", action="store_true", help="Skip per-function timings")
+    parser.add_argument("--func-records", type=int, default=20000, help="Records loaded for per-function timings (default 20000)")
+    parser.add_argument("--repeat", type=int, default=3, help="Per-function repetitions, best is reported (default 3)")
+    parser.add_argument("--no-func-mem", action="store_true", help="Skip the tracemalloc pass for per-function peaks")
+    parser.add_argument("--json-out", help="Write results as JSON")
+    parser.add_argument("--compare", help="Previous --json-out to compare against")
+    add_generator_args(parser)
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    analyzers = [a.strip() for a in args.analyzers.split(",") if a.strip()]
+    unknown = [a for a in analyzers if a not in ANALYZERS]
+    if unknown:
+        sys.exit(f"Unknown analyzer(s): {', '.join(unknown)} (choose from {', '.join(ANALYZERS)})")
+    sizes = [(s.strip(), parse_size(s)) for s in args.sizes.split(",") if s.strip()]
+
+    tmpdir = tempfile.TemporaryDirectory(prefix="bench-analyzers-")
+    tape_dir = args.tape_dir or tmpdir.name
+    os.makedirs(tape_dir, exist_ok=True)
+
+    results = {
+        "schema": "analyzer_bench_v1",
+        "generated_at": datetime.now(timezone.utc).isoformat(),
+        "git_rev": git_revision(),
+        "python": sys.version.split()[0],
+        "generator": generator_options(args),
+        "func_records": args.func_records,
+        "runs": [],
+    }
+    cache: Dict[str, dict] = {}
+    try:
+        for label, size in sizes:
+            print(f"[bench] {label}", file=sys.stderr)
+            run = {"size": label, "bytes": size, "tapes": {}, "e2e": {}, "functions": {}}
+            for name in analyzers:
+                shape = ANALYZERS[name]
+                tape = tape_for(shape, size, args, tape_dir, cache)
+                run["tapes"][shape] = tape
+                if not args.no_e2e:
+                    print(f"  e2e {name}", file=sys.stderr)
+                    run["e2e"][name] = run_e2e(name, tape["path"], tape["bytes"], tape["records"], tmpdir.name)
+                # Per-function numbers only depend on the first --func-records records
+                if not args.no_func and label == sizes[0][0]:
+                    print(f"  functions {name}", file=sys.stderr)
+                    with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn")) as pool:
+                        run["functions"][name] = pool.submit(
+                            run_functions, name, tape["path"], args.func_records, args.repeat, not args.no_func_mem,
+                        ).result()
+            results["runs"].append(run)
+            print_run(run)
+    finally:
+        tmpdir.cleanup()
+
+    if args.json_out:
+        with open(args.json_out, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"\nWrote {args.json_out}")
+    if args.compare:
+        with open(args.compare) as f:
+            compare(results, json.load(f))
+
+
+if __name__ == "__main__":
+    main()
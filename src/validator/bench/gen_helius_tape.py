@@ -0,0 +1,503 @@
+#!/usr/bin/env python3
+"""
+gen_helius_tape.py
+
+Synthetic Helius swap tapes (NDJSON) in the record shapes the analyzers read:
+
+  tx        {venue, program, signature, slot, blockTime, tx:{slot, blockTime,
+            meta:{err, fee, pre/postTokenBalances, ...}, transaction:{...}}}
+            as written by helius_comprehensive_ingest.cjs; read by
+            extract_alpha.py and validate_cross_venue*.py
+  dex       Helius DEX-parser swaps {signature, slot, blockTime, program,
+            programId, source, type, input, output, accountRoles}; read by
+            analyze_alpha_swaps.py
+  enhanced  {program, signature, slot, timestamp, source, type,
+            transactionError, tx:<enhanced tx with accountData>} as written
+            by helius_alpha_ingest.cjs; read by analyze_cross_venue_spreads_v2.py
+
+Token popularity is Zipf(--zipf-s) over --tokens mints (per venue, so the
+venue mix is exact), fee payers are Zipf over --wallets, and with
+probability --same-slot-rate a swap repeats a token already traded in the
+current slot on another native venue at a price within --spread-bps, which
+is what the cross-venue analyzers look for. Only the trader's token
+accounts appear in pre/postTokenBalances (pool vaults would cancel the
+per-mint net the analyzers compute). Output is deterministic for a seed.
+
+Usage:
+    python3 gen_helius_tape.py tape.ndjson --shape tx --size 100MB
+    python3 gen_helius_tape.py tape.ndjson --shape dex --records 200000 --zipf-s 1.3
+    python3 gen_helius_tape.py tape.ndjson --venues PumpSwap=0.6,Raydium_V4=0.3,Jupiter=0.1
+"""
+
+import argparse
+import json
+import math
+import random
+import sys
+import time
+from bisect import bisect_left
+from itertools import accumulate
+from typing import Dict, List, Optional, Tuple
+
+# name -> (program id, DEX-parser program label, Helius source, native venue)
+VENUES = {
+    "PumpSwap": ("pAMMBay6oceH9fJKBRHGP5D4bD4sWpmSwMn52FMfXEA", "PUMPSWAP", "PUMP_AMM", True),
+    "Raydium_V4": ("675kPX9MHTjS2zt1qfr1NYHuzeLXfQM9H24wFSUt1Mp8", "RAYDIUM_V4", "RAYDIUM", True),
+    "Raydium_CLMM": ("CAMMCzo5YL8w4VFF8KVHrK22GGUsp5VTaW7grrKgrWqK", "RAYDIUM_CLMM", "RAYDIUM", True),
+    "Meteora_DLMM": ("LBUZKhRxPF3XUpBCjp4YzTKgLccjZhTSDM9YuVaPwxo", "METEORA_DLMM", "METEORA", True),
+    "Jupiter": ("JUP6LkbZbjS1jKKwapdHNy74zcZ3tLUZoi5QNyVTaV4", "JUPITER_V6", "JUPITER", False),
+}
+DEFAULT_VENUE_MIX = "PumpSwap=0.45,Raydium_V4=0.2,Raydium_CLMM=0.1,Meteora_DLMM=0.1,Jupiter=0.15"
+SHAPES = ("tx", "dex", "enhanced")
+
+WSOL = "So11111111111111111111111111111111111111112"
+USDC = "EPjFWdd5AufqSSqeM2qN1xzybapC8G4wEGGkZwyTDt1v"
+TOKEN_PROGRAM = "TokenkegQfeZyiNwAJbNbGKPFXCWuBvf9Ss623VQ5DA"
+SOL_USDC = 150.0
+BASE_FEE = 5000
+START_SLOT = 385_000_000
+START_TIME = 1_765_000_000
+SLOT_SECONDS = 0.4
+
+_B58 = "123456789ABCDEFGHJKLMNPQRSTUVWXYZabcdefghijkmnopqrstuvwxyz"
+_SIZE_UNITS = {"": 1, "B": 1, "KB": 1024, "MB": 1024 ** 2, "GB": 1024 ** 3}
+
+
+def parse_size(text: str) -> int:
+    """'10MB' / '5GB' / '512KB' / '1000' -> bytes."""
+    s = text.strip().upper()
+    num = s.rstrip("KMGB")
+    unit = s[len(num):]
+    if unit not in _SIZE_UNITS or not num:
+        raise argparse.ArgumentTypeError(f"bad size {text!r} (e.g. 10MB, 5GB)")
+    return int(float(num) * _SIZE_UNITS[unit])
+
+
+def parse_venue_mix(text: str) -> Dict[str, float]:
+    """'PumpSwap=0.5,Jupiter=0.5' -> {name: weight}."""
+    mix = {}
+    for part in text.split(","):
+        if not part.strip():
+            continue
+        name, _, weight = part.partition("=")
+        name = name.strip()
+        if name not in VENUES:
+            raise argparse.ArgumentTypeError(f"unknown venue {name!r} (choose from {', '.join(VENUES)})")
+        mix[name] = float(weight or 1)
+    if not any(w > 0 for w in mix.values()):
+        raise argparse.ArgumentTypeError("venue mix needs a positive weight")
+    return mix
+
+
+def zipf_cum_weights(n: int, s: float) -> List[float]:
+    return list(accumulate(1.0 / (rank ** s) for rank in range(1, n + 1)))
+
+
+class Token:
+    __slots__ = ("mint", "decimals", "price", "venues")
+
+    def __init__(self, mint: str, decimals: int, price: float, venues: List[str]):
+        self.mint = mint
+        self.decimals = decimals
+        self.price = price  # SOL per token (ui units)
+        self.venues = venues
+
+
+class TapeGenerator:
+    """Stateful swap stream; swap() returns one normalized swap dict, render() a shape."""
+
+    def __init__(
+        self,
+        tokens: int = 2000,
+        wallets: int = 5000,
+        zipf_s: float = 1.1,
+        venue_mix: Optional[Dict[str, float]] = None,
+        same_slot_rate: float = 0.1,
+        spread_bps: float = 50.0,
+        tx_per_slot: float = 4.0,
+        fail_rate: float = 0.05,
+        jito_rate: float = 0.3,
+        usdc_rate: float = 0.05,
+        seed: int = 7,
+    ):
+        self.rng = random.Random(seed)
+        self.same_slot_rate = same_slot_rate
+        self.spread = spread_bps / 10_000
+        self.slot_advance = 1.0 / max(tx_per_slot, 1e-9)
+        self.fail_rate = fail_rate
+        self.jito_rate = jito_rate
+        self.usdc_rate = usdc_rate
+
+        mix = venue_mix or parse_venue_mix(DEFAULT_VENUE_MIX)
+        self.venue_names = [v for v, w in mix.items() if w > 0]
+        self.venue_cum = list(accumulate(mix[v] for v in self.venue_names))
+        natives = [v for v in self.venue_names if VENUES[v][3]] or [v for v in VENUES if VENUES[v][3]]
+        native_cum = list(accumulate(mix.get(v, 0) or 1e-9 for v in natives))
+
+        # Popular tokens list on more native venues, so they are the ones that collide
+        rng = self.rng
+        self.tokens: List[Token] = []
+        for rank in range(tokens):
+            listings = 1 + (rng.randint(1, 3) if rank < tokens // 5 else int(rng.random() < 0.2))
+            venues = []
+            while len(venues) < min(listings, len(natives)):
+                v = natives[bisect_left(native_cum, rng.random() * native_cum[-1])]
+                if v not in venues:
+                    venues.append(v)
+            self.tokens.append(Token(self.address(), rng.choice((6, 6, 9)), 10 ** rng.uniform(-8, -2), venues))
+
+        # Per venue: listed tokens in global rank order with their Zipf weights
+        self.venue_tokens: Dict[str, Tuple[List[Token], List[float]]] = {}
+        for v in self.venue_names:
+            listed = [(r, t) for r, t in enumerate(self.tokens) if not VENUES[v][3] or v in t.venues]
+            if not listed:
+                listed = [(0, self.tokens[0])]
+            self.venue_tokens[v] = (
+                [t for _, t in listed],
+                list(accumulate(1.0 / ((r + 1) ** zipf_s) for r, _ in listed)),
+            )
+
+        self.wallets = [self.address() for _ in range(wallets)]
+        self.wallet_cum = zipf_cum_weights(wallets, 1.0)
+        self.pools = {(t.mint, v): self.address() for t in self.tokens for v in t.venues}
+
+        self.slot = START_SLOT
+        self.slot_swaps: List[Tuple[Token, str]] = []
+        self.collisions = 0
+
+    def address(self, length: int = 44) -> str:
+        return "".join(self.rng.choices(_B58, k=length))
+
+    def _pick(self, cum: List[float]) -> int:
+        return bisect_left(cum, self.rng.random() * cum[-1])
+
+    def swap(self) -> dict:
+        rng = self.rng
+        if rng.random() < self.slot_advance:
+            self.slot += 1 + int(rng.expovariate(4.0))
+            self.slot_swaps = []
+
+        token = venue = None
+        price_factor = 1.0 + rng.gauss(0, 0.0005)
+        if self.slot_swaps and rng.random() < self.same_slot_rate:
+            prev_token, prev_venue = rng.choice(self.slot_swaps)
+            others = [v for v in prev_token.venues if v != prev_venue]
+            if others:
+                token, venue = prev_token, rng.choice(others)
+                price_factor = 1.0 + rng.uniform(-self.spread, self.spread)
+                self.collisions += 1
+        if token is None:
+            venue = self.venue_names[self._pick(self.venue_cum)]
+            listed, cum = self.venue_tokens[venue]
+            token = listed[self._pick(cum)]
+            token.price *= math.exp(rng.gauss(0, 0.002))
+        if VENUES[venue][3]:
+            self.slot_swaps.append((token, venue))
+
+        quote_mint, quote_dec, quote_per_sol = WSOL, 9, 1.0
+        if rng.random() < self.usdc_rate:
+            quote_mint, quote_dec, quote_per_sol = USDC, 6, SOL_USDC
+        quote_ui = min(10 ** rng.gauss(-0.6, 0.7), 500.0) * quote_per_sol
+        token_ui = quote_ui / (token.price * quote_per_sol * price_factor)
+        priority = 0 if rng.random() < self.jito_rate else int(10 ** rng.uniform(3, 6))
+        return {
+            "signature": self.address(88),
+            "slot": self.slot,
+            "block_time": START_TIME + int((self.slot - START_SLOT) * SLOT_SECONDS),
+            "venue": venue,
+            "fee_payer": self.wallets[self._pick(self.wallet_cum)],
+            "pool": self.pools.get((token.mint, venue)) or self.address(),
+            "token": token,
+            "token_raw": max(1, int(token_ui * 10 ** token.decimals)),
+            "quote_mint": quote_mint,
+            "quote_dec": quote_dec,
+            "quote_raw": max(1, int(quote_ui * 10 ** quote_dec)),
+            "buy": rng.random() < 0.5,
+            "fee": BASE_FEE + priority,
+            "failed": rng.random() < self.fail_rate,
+            "compute": rng.randint(40_000, 250_000),
+        }
+
+    def render(self, s: dict, shape: str) -> dict:
+        if shape == "tx":
+            return self._render_tx(s)
+        if shape == "dex":
+            return self._render_dex(s)
+        return self._render_enhanced(s)
+
+    def _render_tx(self, s: dict) -> dict:
+        rng = self.rng
+        pid = VENUES[s["venue"]][0]
+        token = s["token"]
+        fp = s["fee_payer"]
+        token_ata, quote_ata, vault_t, vault_q = (self.address() for _ in range(4))
+        # Balance the side that shrinks so nothing goes negative; buys into a new ATA have no pre entry
+        hold_t = rng.randint(0, 10) * s["token_raw"]
+        hold_q = rng.randint(1, 20) * s["quote_raw"]
+        if s["buy"]:
+            t_pre, t_post = hold_t, hold_t + s["token_raw"]
+            q_pre, q_post = hold_q + s["quote_raw"], hold_q
+        else:
+            t_pre, t_post = hold_t + s["token_raw"], hold_t
+            q_pre, q_post = hold_q, hold_q + s["quote_raw"]
+        if s["failed"]:
+            t_post, q_post = t_pre, q_pre
+        pre = [] if t_pre == 0 else [_ui_balance(1, token.mint, fp, t_pre, token.decimals)]
+        pre.append(_ui_balance(2, s["quote_mint"], fp, q_pre, s["quote_dec"]))
+        post = [
+            _ui_balance(1, token.mint, fp, t_post, token.decimals),
+            _ui_balance(2, s["quote_mint"], fp, q_post, s["quote_dec"]),
+        ]
+        lamports = [rng.randint(10**7, 10**11), 2039280, 2039280, 6124800, 2039280, 2039280, 1141440, 934087680]
+        tx = {
+            "slot": s["slot"],
+            "blockTime": s["block_time"],
+            "meta": {
+                "err": {"InstructionError": [2, {"Custom": 6001}]} if s["failed"] else None,
+                "fee": s["fee"],
+                "computeUnitsConsumed": s["compute"],
+                "preBalances": lamports,
+                "postBalances": [lamports[0] - s["fee"]] + lamports[1:],
+                "preTokenBalances": pre,
+                "postTokenBalances": post,
+                "innerInstructions": [],
+                "logMessages": [
+                    "Program ComputeBudget111111111111111111111111111111 invoke [1]",
+                    "Program ComputeBudget111111111111111111111111111111 success",
+                    f"Program {pid} invoke [1]",
+                    "Program log: Instruction: " + ("Buy" if s["buy"] else "Sell"),
+                    f"Program {TOKEN_PROGRAM} invoke [2]",
+                    "Program log: Instruction: TransferChecked",
+                    f"Program {TOKEN_PROGRAM} success",
+                    f"Program {pid} consumed {s['compute']} of 1400000 compute units",
+                    f"Program {pid} " + ("failed: custom program error: 0x1771" if s["failed"] else "success"),
+                ],
+            },
+            "transaction": {
+                "signatures": [s["signature"]],
+                "message": {
+                    "accountKeys": [
+                        {"pubkey": fp, "signer": True, "writable": True, "source": "transaction"},
+                        {"pubkey": token_ata, "signer": False, "writable": True, "source": "transaction"},
+                        {"pubkey": quote_ata, "signer": False, "writable": True, "source": "transaction"},
+                        {"pubkey": s["pool"], "signer": False, "writable": True, "source": "transaction"},
+                        {"pubkey": vault_t, "signer": False, "writable": True, "source": "transaction"},
+                        {"pubkey": vault_q, "signer": False, "writable": True, "source": "transaction"},
+                        {"pubkey": pid, "signer": False, "writable": False, "source": "transaction"},
+                        {"pubkey": TOKEN_PROGRAM, "signer": False, "writable": False, "source": "transaction"},
+                    ],
+                    "recentBlockhash": self.address(),
+                },
+            },
+        }
+        return {
+            "venue": s["venue"],
+            "program": pid,
+            "signature": s["signature"],
+            "slot": s["slot"],
+            "blockTime": s["block_time"],
+            "tx": tx,
+        }
+
+    def _render_dex(self, s: dict) -> dict:
+        pid, label, source, _ = VENUES[s["venue"]]
+        token = s["token"]
+        tok = {"mint": token.mint, "amount": str(s["token_raw"]), "decimals": token.decimals, "tokenAccount": self.address()}
+        quote = {"mint": s["quote_mint"], "amount": str(s["quote_raw"]), "decimals": s["quote_dec"], "tokenAccount": self.address()}
+        inp, outp = (quote, tok) if s["buy"] else (tok, quote)
+        return {
+            "signature": s["signature"],
+            "slot": s["slot"],
+            "blockTime": s["block_time"],
+            "program": label,
+            "programId": pid,
+            "source": source,
+            "type": "SWAP",
+            "feePayer": s["fee_payer"],
+            "fee": s["fee"],
+            "input": inp,
+            "output": outp,
+            "accountRoles": {
+                s["fee_payer"]: "fee_payer",
+                inp["tokenAccount"]: "user_token_in",
+                outp["tokenAccount"]: "user_token_out",
+                s["pool"]: "pool",
+            },
+        }
+
+    def _render_enhanced(self, s: dict) -> dict:
+        pid, _, source, _ = VENUES[s["venue"]]
+        token = s["token"]
+        fp = s["fee_payer"]
+        sign = 1 if s["buy"] else -1
+        error = {"InstructionError": [2, {"Custom": 6001}]} if s["failed"] else None
+        token_ata, quote_ata, vault_t, vault_q = (self.address() for _ in range(4))
+
+        def change(owner: str, account: str, mint: str, delta: int, decimals: int) -> dict:
+            return {
+                "userAccount": owner,
+                "tokenAccount": account,
+                "rawTokenAmount": {"tokenAmount": str(delta), "decimals": decimals},
+                "mint": mint,
+            }
+
+        user_changes = [] if s["failed"] else [
+            change(fp, token_ata, token.mint, sign * s["token_raw"], token.decimals),
+            change(fp, quote_ata, s["quote_mint"], -sign * s["quote_raw"], s["quote_dec"]),
+        ]
+        pool_changes = [] if s["failed"] else [
+            change(s["pool"], vault_t, token.mint, -sign * s["token_raw"], token.decimals),
+            change(s["pool"], vault_q, s["quote_mint"], sign * s["quote_raw"], s["quote_dec"]),
+        ]
+        t_from, t_to = (s["pool"], fp) if s["buy"] else (fp, s["pool"])
+        tx = {
+            "description": "",
+            "type": "SWAP",
+            "source": source,
+            "fee": s["fee"],
+            "feePayer": fp,
+            "signature": s["signature"],
+            "slot": s["slot"],
+            "timestamp": s["block_time"],
+            "nativeTransfers": [],
+            "tokenTransfers": [] if s["failed"] else [
+                {"fromUserAccount": t_from, "toUserAccount": t_to, "fromTokenAccount": vault_t if s["buy"] else token_ata,
+                 "toTokenAccount": token_ata if s["buy"] else vault_t, "tokenAmount": s["token_raw"] / 10 ** token.decimals,
+                 "mint": token.mint, "tokenStandard": "Fungible"},
+                {"fromUserAccount": t_to, "toUserAccount": t_from, "fromTokenAccount": quote_ata if s["buy"] else vault_q,
+                 "toTokenAccount": vault_q if s["buy"] else quote_ata, "tokenAmount": s["quote_raw"] / 10 ** s["quote_dec"],
+                 "mint": s["quote_mint"], "tokenStandard": "Fungible"},
+            ],
+            "accountData": [
+                {"account": fp, "nativeBalanceChange": -s["fee"], "tokenBalanceChanges": user_changes},
+                {"account": s["pool"], "nativeBalanceChange": 0, "tokenBalanceChanges": pool_changes},
+                {"account": pid, "nativeBalanceChange": 0, "tokenBalanceChanges": []},
+            ],
+            "transactionError": error,
+            "instructions": [{"programId": pid, "accounts": [fp, s["pool"], token_ata, quote_ata, vault_t, vault_q],
+                              "data": self.address(32), "innerInstructions": []}],
+            "events": {},
+        }
+        return {
+            "program": pid,
+            "signature": s["signature"],
+            "slot": s["slot"],
+            "timestamp": s["block_time"],
+            "source": source,
+            "type": "SWAP",
+            "transactionError": error,
+            "tx": tx,
+        }
+
+
+def _ui_balance(index: int, mint: str, owner: str, raw: int, decimals: int) -> dict:
+    ui = raw / 10 ** decimals
+    return {
+        "accountIndex": index,
+        "mint": mint,
+        "owner": owner,
+        "programId": TOKEN_PROGRAM,
+        "uiTokenAmount": {"amount": str(raw), "decimals": decimals, "uiAmount": ui, "uiAmountString": repr(ui)},
+    }
+
+
+def generate_tape(
+    path: str,
+    shape: str = "tx",
+    size_bytes: Optional[int] = None,
+    records: Optional[int] = None,
+    progress: bool = False,
+    **options,
+) -> Dict[str, object]:
+    """Write a tape of `shape` until size_bytes or records is reached; returns generator stats."""
+    if shape not in SHAPES:
+        raise ValueError(f"unknown shape {shape!r} (choose from {', '.join(SHAPES)})")
+    if size_bytes is None and records is None:
+        size_bytes = parse_size("10MB")
+    gen = TapeGenerator(**options)
+    dumps = json.JSONEncoder(separators=(",", ":")).encode
+    written = 0
+    count = 0
+    failed = 0
+    venues: Dict[str, int] = {}
+    t0 = time.perf_counter()
+    next_report = 1 << 28
+    with open(path, "w", encoding="utf-8", buffering=1 << 20) as f:
+        while (size_bytes is None or written < size_bytes) and (records is None or count < records):
+            s = gen.swap()
+            # Helius' DEX parser only reports executed swaps
+            if shape == "dex" and s["failed"]:
+                continue
+            line = dumps(gen.render(s, shape)) + "\n"
+            f.write(line)
+            written += len(line)
+            count += 1
+            failed += s["failed"]
+            venues[s["venue"]] = venues.get(s["venue"], 0) + 1
+            if progress and written >= next_report:
+                print(f"  {written / 1024 ** 2:,.0f} MB, {count:,} records", file=sys.stderr)
+                next_report += 1 << 28
+    return {
+        "path": path,
+        "shape": shape,
+        "records": count,
+        "bytes": written,
+        "failed": failed,
+        "same_slot_collisions": gen.collisions,
+        "slots": gen.slot - START_SLOT + 1,
+        "venues": venues,
+        "seconds": round(time.perf_counter() - t0, 3),
+    }
+
+
+def add_generator_args(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("--tokens", type=int, default=2000, help="Distinct token mints (default 2000)")
+    parser.add_argument("--wallets", type=int, default=5000, help="Distinct fee payers (default 5000)")
+    parser.add_argument("--zipf-s", type=float, default=1.1, help="Zipf exponent for token popularity (default 1.1)")
+    parser.add_argument("--venues", type=parse_venue_mix, default=parse_venue_mix(DEFAULT_VENUE_MIX),
+                        help=f"Venue weights (default {DEFAULT_VENUE_MIX})")
+    parser.add_argument("--same-slot-rate", type=float, default=0.1,
+                        help="Chance a swap repeats a token already traded this slot on another venue (default 0.1)")
+    parser.add_argument("--spread-bps", type=float, default=50.0, help="Max price divergence of same-slot repeats (default 50)")
+    parser.add_argument("--tx-per-slot", type=float, default=4.0, help="Mean swaps per slot (default 4)")
+    parser.add_argument("--fail-rate", type=float, default=0.05, help="Failed transaction rate (default 0.05)")
+    parser.add_argument("--jito-rate", type=float, default=0.3, help="Zero priority fee rate (default 0.3)")
+    parser.add_argument("--usdc-rate", type=float, default=0.05, help="USDC-quoted swap rate (default 0.05)")
+    parser.add_argument("--seed", type=int, default=7, help="RNG seed (default 7)")
+
+
+def generator_options(args: argparse.Namespace) -> Dict[str, object]:
+    return {
+        "tokens": args.tokens,
+        "wallets": args.wallets,
+        "zipf_s": args.zipf_s,
+        "venue_mix": args.venues,
+        "same_slot_rate": args.same_slot_rate,
+        "spread_bps": args.spread_bps,
+        "tx_per_slot": args.tx_per_slot,
+        "fail_rate": args.fail_rate,
+        "jito_rate": args.jito_rate,
+        "usdc_rate": args.usdc_rate,
+        "seed": args.seed,
+    }
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Generate a synthetic Helius swap tape (NDJSON)")
+    parser.add_argument("out", help="Output NDJSON path")
+    parser.add_argument("--shape", choices=SHAPES, default="tx", help="Record shape (default tx)")
+    parser.add_argument("--size", type=parse_size, default=None, help="Target size, e.g. 10MB or 5GB (default 10MB)")
+    parser.add_argument("--records", type=int, default=None, help="Stop after N records (with --size, whichever is first)")
+    add_generator_args(parser)
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    stats = generate_tape(args.out, args.shape, size_bytes=args.size, records=args.records,
+                          progress=True, **generator_options(args))
+    print(json.dumps(stats))
+
+
+if __name__ == "__main__":
+    main()
@@ -16,12 +16,15 @@ Real alpha:
 """
 
 import json
+import os
 import sys
 from collections import Counter, defaultdict
 from typing import Dict, List, Optional
 from dataclasses import dataclass
 import statistics
 
+from stage_profile import profiler_from_argv
+
 # Native DEX programs (NOT aggregators)
 NATIVE_DEXES = {
     "pAMMBay6oceH9fJKBRHGP5D4bD4sWpmSwMn52FMfXEA": "PumpSwap",
@@ -404,8 +407,9 @@ def analyze_venue_competition(events: List[SwapEvent]) -> dict:
 
 
 def main():
+    prof = profiler_from_argv(sys.argv, "extract_alpha")
     if len(sys.argv) < 2:
-        print("Usage: python3 extract_alpha_v2.py <ndjson_path>", file=sys.stderr)
+        print("Usage: python3 extract_alpha_v2.py <ndjson_path> [--profile] [--profile-json PATH] [--mem-report]", file=sys.stderr)
         sys.exit(1)
 
     path = sys.argv[1]
@@ -413,20 +417,37 @@ def main():
 
     events = []
     skipped = 0
-    for rec in load_ndjson(path):
-        e = parse_swap_event(rec)
-        if e:
-            events.append(e)
-        else:
-            skipped += 1
+    prof.track("events", events)
+    with prof.stage("parse") as st:
+        for rec in prof.iter("read", load_ndjson(path)):
+            e = parse_swap_event(rec)
+            if e:
+                events.append(e)
+            else:
+                skipped += 1
+        st.add(records_in=len(events) + skipped, records_out=len(events))
+    prof.add("read", bytes_in=os.path.getsize(path))
 
     print(f"Parsed {len(events)} swap events, skipped {skipped}", file=sys.stderr)
 
     # Run analyses
-    arb_opps = find_real_cross_venue_arb(events)
-    jito_patterns = analyze_jito_bundle_patterns(events)
-    large_trades = analyze_large_trade_patterns(events)
-    venue_comp = analyze_venue_competition(events)
+    with prof.stage("analyze") as st:
+        # Per-analysis snapshots: the per-pair and per-signer maps are freed on return
+        with prof.mem_scope("analyze:arb"):
+            arb_opps = find_real_cross_venue_arb(events)
+        with prof.mem_scope("analyze:jito"):
+            jito_patterns = analyze_jito_bundle_patterns(events)
+        with prof.mem_scope("analyze:large_trades"):
+            large_trades = analyze_large_trade_patterns(events)
+        with prof.mem_scope("analyze:venues"):
+            venue_comp = analyze_venue_competition(events)
+        st.add(records_in=len(events), records_out=len(arb_opps))
+
+    with prof.stage("report"):
+        print_report(arb_opps, jito_patterns, large_trades, venue_comp)
+
+
+def print_report(arb_opps: List[dict], jito_patterns: dict, large_trades: dict, venue_comp: dict) -> None:
 
     print()
     print("=" * 80)
@@ -0,0 +1,160 @@
+#!/usr/bin/env node
+/**
+ * load_alpha_swaps_v2.cjs
+ *
+ * Load harness for analyze_alpha_swaps_v2.py: starts mock_helius_enhanced.cjs
+ * in-process, runs the collector against it for --seconds, samples its
+ * [summary] lines and RSS, and reports sustained signatures/s, pending
+ * buffer size, evictions, retries and rate limiting.
+ *
+ * Usage:
+ *  node load_alpha_swaps_v2.cjs --seconds 120 --rate 5000 --max-rps 20
+ *
+ *  Mock flags (see mock_helius_enhanced.cjs): --rate --dup-rate --latency-ms
+ *  --jitter-ms --missing-rate --index-lag-ms --rate-limit --max-rps --mints
+ *
+ *  --seconds N          collector RUN_SECONDS (default 60)
+ *  --summary-every N    collector SUMMARY_EVERY_SECONDS (default 5)
+ *  --collector PATH     script to run (default ./analyze_alpha_swaps_v2.py)
+ *  --out-dir DIR        JSONL/summary output (default a temp dir, removed)
+ *  --verbose            echo the collector's stdout (stderr is always shown)
+ *
+ * Collector env vars (BATCH_SIZE, MAX_PENDING, MAX_CONCURRENCY, ...) are
+ * passed through from this process' environment.
+ */
+
+const fs = require("fs");
+const os = require("os");
+const path = require("path");
+const { spawn } = require("child_process");
+const { DEFAULTS, parseMockArgs, startMock } = require("./mock_helius_enhanced.cjs");
+
+function getArg(flag, defaultValue = undefined) {
+  const idx = process.argv.indexOf(flag);
+  if (idx === -1) return defaultValue;
+  const v = process.argv[idx + 1];
+  return v === undefined ? defaultValue : v;
+}
+
+function parseSummaryLine(line) {
+  const out = {};
+  for (const m of line.matchAll(/(\w+)=([-\d.]+)/g)) out[m[1]] = Number(m[2]);
+  return out;
+}
+
+function readRssMb(pid) {
+  try {
+    const status = fs.readFileSync(`/proc/${pid}/status`, "utf8");
+    const m = status.match(/VmRSS:\s+(\d+) kB/);
+    return m ? Number(m[1]) / 1024 : null;
+  } catch {
+    return null; // not Linux, or the process has exited
+  }
+}
+
+function median(xs) {
+  if (xs.length === 0) return 0;
+  const s = [...xs].sort((a, b) => a - b);
+  return s[Math.floor(s.length / 2)];
+}
+
+async function main() {
+  const seconds = Number(getArg("--seconds", "60"));
+  const summaryEvery = Number(getArg("--summary-every", "5"));
+  const collector = path.resolve(getArg("--collector", path.join(__dirname, "analyze_alpha_swaps_v2.py")));
+  const verbose = process.argv.includes("--verbose");
+  const keepOut = getArg("--out-dir") !== undefined;
+  const outDir = keepOut ? path.resolve(getArg("--out-dir")) : fs.mkdtempSync(path.join(os.tmpdir(), "alpha-load-"));
+  fs.mkdirSync(outDir, { recursive: true });
+
+  const mockOpts = { ...DEFAULTS, ...parseMockArgs(process.argv.slice(2)) };
+  const mock = await startMock(mockOpts);
+  console.log(`[load] mock on ${mock.rpcUrl} ${JSON.stringify(mockOpts)}`);
+  console.log(`[load] collector ${collector} for ${seconds}s`);
+
+  const summaryFile = path.join(outDir, "summary.json");
+  const env = {
+    ...process.env,
+    HELIUS_RPC_URL: mock.rpcUrl,
+    HELIUS_WSS_URL: mock.wssUrl,
+    HELIUS_ENHANCED_URL: mock.enhancedUrl,
+    HELIUS_API_KEY: "mock",
+    RUN_SECONDS: String(seconds),
+    SUMMARY_EVERY_SECONDS: String(summaryEvery),
+    OUT_FILE: path.join(outDir, "surface.jsonl"),
+    SUMMARY_FILE: summaryFile,
+  };
+
+  // The collector is CommonJS with a .py name; require() loads unknown
+  // extensions as CJS, while `node file.py` would refuse it
+  const child = spawn(process.execPath, ["-e", "require(process.argv[1])", collector], {
+    env,
+    stdio: ["ignore", "pipe", "pipe"],
+  });
+
+  const startedAtMs = Date.now();
+  const samples = [];
+  let peakRssMb = 0;
+  const rssTimer = setInterval(() => {
+    const rss = readRssMb(child.pid);
+    if (rss !== null) peakRssMb = Math.max(peakRssMb, rss);
+  }, 500);
+
+  let buf = "";
+  child.stdout.on("data", (d) => {
+    buf += d;
+    let nl;
+    while ((nl = buf.indexOf("\n")) >= 0) {
+      const line = buf.slice(0, nl);
+      buf = buf.slice(nl + 1);
+      if (verbose) console.log(`  | ${line}`);
+      if (line.startsWith("[summary] ")) {
+        const s = parseSummaryLine(line);
+        s.t = (Date.now() - startedAtMs) / 1000;
+        samples.push(s);
+        console.log(
+          `[load] t=${s.t.toFixed(0)}s processed=${s.processed} sigPerSec=${s.sigPerSec} pending=${s.pending} ` +
+            `evicted=${s.evicted} concurrency=${s.concurrency} congested=${s.congested} rateLimited=${s.rateLimited} emitted=${mock.stats.emitted}`
+        );
+      }
+    }
+  });
+  child.stderr.pipe(process.stderr);
+
+  const exitCode = await new Promise((resolve) => child.on("exit", (code) => resolve(code)));
+  clearInterval(rssTimer);
+  const elapsed = (Date.now() - startedAtMs) / 1000;
+  await mock.close();
+
+  let counters = {};
+  try {
+    counters = JSON.parse(fs.readFileSync(summaryFile, "utf8")).counters || {};
+  } catch (e) {
+    console.warn(`[load] could not read ${summaryFile}: ${String((e && e.message) || e)}`);
+  }
+
+  // Skip the first sample (subscriptions + initial delay) for the sustained rate
+  const steady = samples.slice(1).map((s) => s.sigPerSec);
+  const m = mock.stats;
+  console.log();
+  console.log(`[load] collector exit=${exitCode} elapsed=${elapsed.toFixed(1)}s`);
+  console.log(`  mock: emitted=${m.emitted} (${(m.emitted / elapsed).toFixed(0)}/s, +${m.emittedDuplicates} duplicates) ` +
+    `requests=${m.requests} rateLimited=${m.rateLimited} sigsRequested=${m.sigsRequested} missing=${m.sigsMissing} served=${m.sigsServed}`);
+  console.log(`  collector: ingested=${counters.ingested} processed=${counters.processed} ` +
+    `sustainedSigPerSec=${median(steady).toFixed(1)} (median of ${steady.length} samples) ` +
+    `overallSigPerSec=${((counters.processed || 0) / elapsed).toFixed(1)}`);
+  console.log(`  pending: final=${counters.pending} max=${Math.max(0, ...samples.map((s) => s.pending || 0))} ` +
+    `evicted=${counters.evicted} dupSeen=${counters.seenHits}`);
+  console.log(`  retries: missingRetry=${counters.enhancedMissing} droppedMissing=${counters.droppedMissing} ` +
+    `rateLimited=${counters.enhancedRateLimited} otherErrors=${counters.enhancedOtherErrors}`);
+  console.log(`  concurrency: final=${counters.concurrencyLimit} max=${Math.max(0, ...samples.map((s) => s.concurrency || 0))} ` +
+    `congested=${counters.enhancedCongested} peakRssMb=${peakRssMb.toFixed(0)}`);
+
+  if (!keepOut) fs.rmSync(outDir, { recursive: true, force: true });
+  process.exit(exitCode === 0 ? 0 : 1);
+}
+
+main().catch((e) => {
+  console.error(`[fatal] ${String((e && e.message) || e)}`);
+  process.exit(1);
+});
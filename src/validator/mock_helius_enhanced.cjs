@@ -0,0 +1,427 @@
+#!/usr/bin/env node
+/**
+ * mock_helius_enhanced.cjs
+ *
+ * Local stand-in for the Helius endpoints analyze_alpha_swaps_v2.py uses, so
+ * the collector can be load-tested without the network or real rate limits:
+ *  - POST /v0/transactions  Enhanced Transactions batch lookup with
+ *                           configurable latency, 429s and missing signatures
+ *  - WebSocket logsSubscribe / logsNotification feed emitting synthetic
+ *    signatures at a fixed rate across the active subscriptions
+ *
+ * Signatures only resolve once they have been emitted and INDEX_LAG_MS has
+ * passed (like Helius' indexing lag), so retry behaviour is exercised too.
+ * Transactions are generated deterministically from the signature.
+ *
+ * Usage:
+ *  node mock_helius_enhanced.cjs --port 8899 --rate 2000
+ *  then run the collector with
+ *    HELIUS_RPC_URL=http://127.0.0.1:8899 HELIUS_WSS_URL=ws://127.0.0.1:8899
+ *    HELIUS_ENHANCED_URL=http://127.0.0.1:8899 HELIUS_API_KEY=mock
+ *  or use load_alpha_swaps_v2.cjs, which does both.
+ *
+ * Requirements:
+ *  - npm i ws
+ */
+
+const http = require("http");
+const { WebSocketServer } = require("ws");
+
+// -----------------------------
+// Options
+// -----------------------------
+const DEFAULTS = {
+  port: 0, // 0 = ephemeral
+  rate: 2000, // signatures/s emitted on the logs feed
+  dupRate: 0.3, // chance a signature is also emitted on a second subscription
+  latencyMs: 150, // Enhanced response latency
+  jitterMs: 100, // uniform extra latency
+  missingRate: 0.05, // chance an indexed signature is still missing
+  indexLagMs: 800, // signatures younger than this are always missing
+  rateLimit: 0.0, // chance a request is answered with 429
+  maxRps: 0, // requests/s above which requests get 429 (0 = unlimited)
+  mints: 5000, // mint universe (Zipf-popular)
+  slotMs: 400,
+};
+
+const OPTION_FLAGS = {
+  "--port": "port",
+  "--rate": "rate",
+  "--dup-rate": "dupRate",
+  "--latency-ms": "latencyMs",
+  "--jitter-ms": "jitterMs",
+  "--missing-rate": "missingRate",
+  "--index-lag-ms": "indexLagMs",
+  "--rate-limit": "rateLimit",
+  "--max-rps": "maxRps",
+  "--mints": "mints",
+};
+
+/** Parse the --flag value pairs in OPTION_FLAGS; unknown flags are left to the caller. */
+function parseMockArgs(argv) {
+  const opts = {};
+  for (let i = 0; i < argv.length; i++) {
+    const key = OPTION_FLAGS[argv[i]];
+    if (!key) continue;
+    const n = Number(argv[i + 1]);
+    if (!Number.isFinite(n)) throw new Error(`Invalid numeric value for ${argv[i]}: ${argv[i + 1]}`);
+    opts[key] = n;
+    i += 1;
+  }
+  return opts;
+}
+
+// -----------------------------
+// Deterministic synthetic data
+// -----------------------------
+const B58 = "123456789ABCDEFGHJKLMNPQRSTUVWXYZabcdefghijkmnopqrstuvwxyz";
+
+// Same accounts analyze_alpha_swaps_v2.py treats specially
+const JITO_TIP_ACCOUNTS = [
+  "96gYZGLnJYVFmbjzopPSU6QiEV5fGqZNyN9nmNhvrZU5",
+  "HFqU5x63VTqvQss8hp11i4wVV8bD44PvwucfZ2bU7gRe",
+  "Cw8CFyM9FkoMi7K7Crf6HNQqf4uEMzpKw6QNghXLvLkY",
+  "ADaUMid9yfUytqMBgopwjb2DTLSokTSzL1zt6iGPaS49",
+  "DfXygSm4jCyNCybVYYK6DwvWqjKee8pbDmJGcLWNDXjh",
+  "ADuUkR4vqLUMWXxW9gh6D6L8pMSawimctcNZ5pGwDcEt",
+  "DttWaMuVvTiduZRnguLF7jNxTgiMBZ1hyAumKUiL2KRL",
+  "3AVi9Tg9Uo68tJfuvoKvqKNWKkC5wPdSSdeBnizKZ6jT",
+];
+const JITO_TIP_PAYMENT_PROGRAM = "T1pyyaTNZsKv2WcRAB8oVnk93mLJw2XzjtVYqCsaHqt";
+const USDC_MINT = "EPjFWdd5AufqSSqeM2qN1xzybapC8G4wEGGkZwyTDt1v";
+const NOISE_PROGRAMS = ["ComputeBudget111111111111111111111111111111", "11111111111111111111111111111111"];
+const TYPES = ["SWAP", "SWAP", "SWAP", "TRANSFER", "UNKNOWN"];
+const SOURCES = ["JUPITER", "RAYDIUM", "PUMP_AMM", "METEORA", "ORCA"];
+
+function mulberry32(seed) {
+  let a = seed >>> 0;
+  return () => {
+    a = (a + 0x6d2b79f5) >>> 0;
+    let t = a;
+    t = Math.imul(t ^ (t >>> 15), t | 1);
+    t ^= t + Math.imul(t ^ (t >>> 7), t | 61);
+    return ((t ^ (t >>> 14)) >>> 0) / 4294967296;
+  };
+}
+
+function hashString(s) {
+  let h = 0x811c9dc5;
+  for (let i = 0; i < s.length; i++) h = Math.imul(h ^ s.charCodeAt(i), 0x01000193);
+  return h >>> 0;
+}
+
+function randomB58(rand, len) {
+  let out = "";
+  for (let i = 0; i < len; i++) out += B58[Math.floor(rand() * B58.length)];
+  return out;
+}
+
+/** Zipf(1)-distributed index in [0, n) from a uniform draw. */
+function zipfIndex(rand, n) {
+  return Math.min(n - 1, Math.floor(Math.exp(rand() * Math.log(n + 1))) - 1);
+}
+
+function makeUniverse(opts) {
+  const rand = mulberry32(7);
+  return {
+    programs: Array.from({ length: 30 }, () => randomB58(rand, 44)),
+    mints: Array.from({ length: Math.max(1, opts.mints) }, () => randomB58(rand, 44)),
+    wallets: Array.from({ length: 2000 }, () => randomB58(rand, 44)),
+  };
+}
+
+function buildEnhancedTx(universe, sig, slot) {
+  const rand = mulberry32(hashString(sig));
+  const feePayer = universe.wallets[zipfIndex(rand, universe.wallets.length)];
+  const type = TYPES[Math.floor(rand() * TYPES.length)];
+  const source = SOURCES[Math.floor(rand() * SOURCES.length)];
+
+  const instructions = NOISE_PROGRAMS.map((programId) => ({ programId, innerInstructions: [] }));
+  const nProgs = 1 + Math.floor(rand() * 3);
+  for (let i = 0; i < nProgs; i++) {
+    const programId = universe.programs[zipfIndex(rand, universe.programs.length)];
+    instructions.push({ programId, innerInstructions: [{ programId: NOISE_PROGRAMS[1] }] });
+  }
+  instructions.push({ programId: JITO_TIP_PAYMENT_PROGRAM, innerInstructions: [] });
+
+  const tokenBalanceChanges = [];
+  const nMints = 1 + Math.floor(rand() * 2);
+  for (let i = 0; i < nMints; i++) {
+    const mint = universe.mints[zipfIndex(rand, universe.mints.length)];
+    tokenBalanceChanges.push({
+      userAccount: feePayer,
+      mint,
+      rawTokenAmount: { tokenAmount: String(Math.floor((rand() - 0.5) * 1e9)), decimals: 6 },
+    });
+  }
+  if (rand() < 0.3) {
+    tokenBalanceChanges.push({
+      userAccount: feePayer,
+      mint: USDC_MINT,
+      rawTokenAmount: { tokenAmount: String(Math.floor((rand() - 0.4) * 5e7)), decimals: 6 },
+    });
+  }
+
+  const tipAccount = JITO_TIP_ACCOUNTS[Math.floor(rand() * JITO_TIP_ACCOUNTS.length)];
+  return {
+    signature: sig,
+    slot,
+    timestamp: Math.floor(Date.now() / 1000),
+    fee: 5000 + Math.floor(rand() * 100_000),
+    feePayer,
+    type,
+    source,
+    description: "",
+    instructions,
+    accountData: [
+      { account: feePayer, nativeBalanceChange: -5000, tokenBalanceChanges },
+      { account: tipAccount, nativeBalanceChange: 1000 + Math.floor(rand() * 1e6), tokenBalanceChanges: [] },
+    ],
+    tokenTransfers: tokenBalanceChanges.map((c) => ({ mint: c.mint })),
+    events: {},
+  };
+}
+
+// -----------------------------
+// Server
+// -----------------------------
+/**
+ * Start the mock on opts.port (0 = ephemeral). Resolves to
+ * { port, rpcUrl, wssUrl, enhancedUrl, stats, close }.
+ */
+function startMock(options = {}) {
+  const opts = { ...DEFAULTS, ...options };
+  const universe = makeUniverse(opts);
+  const stats = {
+    emitted: 0,
+    emittedDuplicates: 0,
+    subscriptions: 0,
+    requests: 0,
+    rateLimited: 0,
+    sigsRequested: 0,
+    sigsMissing: 0,
+    sigsServed: 0,
+  };
+
+  const startedAtMs = Date.now();
+  const currentSlot = () => 300_000_000 + Math.floor((Date.now() - startedAtMs) / opts.slotMs);
+
+  // sig -> emittedAtMs; pruned once older than any plausible retry window
+  const emitted = new Map();
+  const EMITTED_TTL_MS = 5 * 60_000;
+
+  // Per-second request window for --max-rps
+  let windowStartMs = 0;
+  let windowRequests = 0;
+
+  function handleEnhanced(req, res, body) {
+    stats.requests += 1;
+    const now = Date.now();
+    if (now - windowStartMs >= 1000) {
+      windowStartMs = now;
+      windowRequests = 0;
+    }
+    windowRequests += 1;
+
+    let sigs = [];
+    try {
+      sigs = JSON.parse(body).transactions || [];
+    } catch {
+      res.writeHead(400, { "Content-Type": "application/json" });
+      return res.end(JSON.stringify({ error: "invalid JSON" }));
+    }
+
+    const delay = opts.latencyMs + Math.random() * opts.jitterMs;
+    setTimeout(() => {
+      if ((opts.maxRps > 0 && windowRequests > opts.maxRps) || Math.random() < opts.rateLimit) {
+        stats.rateLimited += 1;
+        res.writeHead(429, { "Content-Type": "application/json" });
+        return res.end(JSON.stringify({ error: "rate limited" }));
+      }
+
+      const t = Date.now();
+      const slot = currentSlot();
+      const out = [];
+      for (const sig of sigs) {
+        stats.sigsRequested += 1;
+        const at = emitted.get(sig);
+        if (at === undefined || t - at < opts.indexLagMs || Math.random() < opts.missingRate) {
+          stats.sigsMissing += 1;
+          continue;
+        }
+        out.push(buildEnhancedTx(universe, sig, slot));
+        stats.sigsServed += 1;
+      }
+      res.writeHead(200, { "Content-Type": "application/json" });
+      res.end(JSON.stringify(out));
+    }, delay);
+  }
+
+  function handleRpc(res, body) {
+    let msg = {};
+    try {
+      msg = JSON.parse(body);
+    } catch {}
+    const reply = { jsonrpc: "2.0", id: msg.id ?? null };
+    if (msg.method === "getSlot") reply.result = currentSlot();
+    else if (msg.method === "getHealth") reply.result = "ok";
+    else reply.error = { code: -32601, message: `mock: method not found: ${msg.method}` };
+    res.writeHead(200, { "Content-Type": "application/json" });
+    res.end(JSON.stringify(reply));
+  }
+
+  const server = http.createServer((req, res) => {
+    const chunks = [];
+    req.on("data", (d) => chunks.push(d));
+    req.on("end", () => {
+      const body = Buffer.concat(chunks).toString("utf8");
+      const { pathname } = new URL(req.url, "http://localhost");
+      if (req.method === "POST" && pathname === "/v0/transactions") return handleEnhanced(req, res, body);
+      if (req.method === "POST") return handleRpc(res, body);
+      res.writeHead(404);
+      res.end();
+    });
+  });
+
+  // -----------------------------
+  // logsSubscribe feed
+  // -----------------------------
+  const wss = new WebSocketServer({ server });
+  const subs = new Map(); // subId -> ws
+  let nextSubId = 1;
+
+  wss.on("connection", (ws) => {
+    const owned = new Set();
+    ws.on("message", (data) => {
+      let msg = {};
+      try {
+        msg = JSON.parse(String(data));
+      } catch {
+        return;
+      }
+      const reply = { jsonrpc: "2.0", id: msg.id ?? null };
+      if (msg.method === "logsSubscribe") {
+        const id = nextSubId++;
+        subs.set(id, ws);
+        owned.add(id);
+        stats.subscriptions = subs.size;
+        reply.result = id;
+      } else if (msg.method === "logsUnsubscribe") {
+        const id = Array.isArray(msg.params) ? msg.params[0] : null;
+        reply.result = subs.delete(id);
+        owned.delete(id);
+        stats.subscriptions = subs.size;
+      } else {
+        reply.error = { code: -32601, message: `mock: method not found: ${msg.method}` };
+      }
+      ws.send(JSON.stringify(reply));
+    });
+    ws.on("close", () => {
+      for (const id of owned) subs.delete(id);
+      stats.subscriptions = subs.size;
+    });
+  });
+
+  function notify(subId, ws, sig, slot) {
+    if (ws.readyState !== ws.OPEN) return;
+    ws.send(
+      JSON.stringify({
+        jsonrpc: "2.0",
+        method: "logsNotification",
+        params: {
+          result: { context: { slot }, value: { signature: sig, err: null, logs: [] } },
+          subscription: subId,
+        },
+      })
+    );
+  }
+
+  // Emit in 10ms steps, carrying the fractional remainder
+  let carry = 0;
+  let lastEmitMs = Date.now();
+  let lastPruneMs = Date.now();
+  const emitRand = mulberry32(11);
+  const emitTimer = setInterval(() => {
+    const now = Date.now();
+    carry += ((now - lastEmitMs) * opts.rate) / 1000;
+    lastEmitMs = now;
+    if (subs.size === 0) {
+      carry = 0;
+      return;
+    }
+
+    const ids = Array.from(subs.keys());
+    const slot = currentSlot();
+    while (carry >= 1) {
+      carry -= 1;
+      const sig = randomB58(emitRand, 88);
+      emitted.set(sig, now);
+      stats.emitted += 1;
+      const first = ids[Math.floor(emitRand() * ids.length)];
+      notify(first, subs.get(first), sig, slot);
+      if (ids.length > 1 && emitRand() < opts.dupRate) {
+        let second = ids[Math.floor(emitRand() * ids.length)];
+        if (second === first) second = ids[(ids.indexOf(first) + 1) % ids.length];
+        notify(second, subs.get(second), sig, slot);
+        stats.emittedDuplicates += 1;
+      }
+    }
+
+    if (now - lastPruneMs >= 10_000) {
+      lastPruneMs = now;
+      for (const [sig, at] of emitted) {
+        if (now - at < EMITTED_TTL_MS) break; // insertion ordered
+        emitted.delete(sig);
+      }
+    }
+  }, 10);
+
+  return new Promise((resolve, reject) => {
+    server.once("error", reject);
+    server.listen(opts.port, "127.0.0.1", () => {
+      const { port } = server.address();
+      resolve({
+        port,
+        rpcUrl: `http://127.0.0.1:${port}`,
+        wssUrl: `ws://127.0.0.1:${port}`,
+        enhancedUrl: `http://127.0.0.1:${port}`,
+        stats,
+        close: () =>
+          new Promise((done) => {
+            clearInterval(emitTimer);
+            for (const ws of wss.clients) ws.terminate();
+            wss.close();
+            server.close(() => done());
+            server.closeAllConnections?.();
+          }),
+      });
+    });
+  });
+}
+
+module.exports = { DEFAULTS, parseMockArgs, startMock };
+
+// -----------------------------
+// Main
+// -----------------------------
+if (require.main === module) {
+  (async () => {
+    const opts = { ...DEFAULTS, ...parseMockArgs(process.argv.slice(2)) };
+    const mock = await startMock(opts);
+    console.log(`[mock_helius_enhanced] listening on ${mock.rpcUrl}`);
+    console.log(`  HELIUS_RPC_URL=${mock.rpcUrl} HELIUS_WSS_URL=${mock.wssUrl}`);
+    console.log(`  HELIUS_ENHANCED_URL=${mock.enhancedUrl} HELIUS_API_KEY=mock`);
+    console.log(`  ${JSON.stringify(opts)}`);
+
+    const statsInterval = setInterval(() => console.log(`[mock] ${JSON.stringify(mock.stats)}`), 10_000);
+    process.on("SIGINT", async () => {
+      clearInterval(statsInterval);
+      await mock.close();
+      console.log(`[mock] final ${JSON.stringify(mock.stats)}`);
+      process.exit(0);
+    });
+  })().catch((e) => {
+    console.error(`[fatal] ${String((e && e.message) || e)}`);
+    process.exit(1);
+  });
+}
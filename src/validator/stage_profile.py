@@ -0,0 +1,451 @@
+#!/usr/bin/env python3
+"""
+stage_profile.py
+
+Shared --profile instrumentation for the analyzer scripts. Scripts time named
+stages (read, parse, group, analyze, report) and count records in/out per
+stage; at exit the profiler prints per-stage seconds, records/s, bytes/s and
+peak RSS to stderr, and optionally dumps the same as JSON for comparing runs.
+
+Stage times are exclusive: entering a stage (or pulling from prof.iter)
+pauses the enclosing one, so the per-stage seconds add up to the profiled
+total. With profiling off every call is a cheap no-op and prof.iter returns
+the iterable unchanged.
+
+--mem-report runs tracemalloc and snapshots it at every prof.stage()
+boundary (and prof.mem_scope() for finer untimed sections). For each it
+reports traced, peak and transient memory (peak above what was live before
+and after) and the allocation sites that grew and are still live. It also
+sizes the structures registered with prof.track() (a sampled deep sizeof)
+and samples RSS from a background thread, so the read loop is covered.
+Snapshot time is excluded from the stage timings, but tracemalloc itself
+slows the run down by several times.
+
+Usage:
+    prof = profiler_from_argv(sys.argv, "extract_alpha")   # strips the flags
+    # or: add_profile_args(parser); prof = StageProfiler.from_args(args, "name")
+
+    with prof.stage("parse") as st:
+        for rec in prof.iter("read", load_ndjson(path)):
+            ...
+        st.add(records_in=n, records_out=len(events))
+    prof.add("read", bytes_in=os.path.getsize(path))
+    prof.track("events", events)
+
+Flags:
+    --profile               print the stage table at exit
+    --profile-json PATH     also write it as JSON (implies --profile)
+    --mem-report            tracemalloc snapshots per stage (implies --profile)
+    --mem-top N             allocation sites listed per stage (default 10)
+"""
+
+import argparse
+import atexit
+import json
+import os
+import resource
+import sys
+import threading
+import time
+import tracemalloc
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from itertools import islice
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
+
+RSS_SAMPLE_SECONDS = 0.5
+SIZEOF_SAMPLE = 1000
+
+
+class Stage:
+    """Accumulated time and record counts for one named stage."""
+
+    __slots__ = ("name", "calls", "seconds", "records_in", "records_out", "bytes_in")
+
+    def __init__(self, name: str):
+        self.name = name
+        self.calls = 0
+        self.seconds = 0.0
+        self.records_in = 0
+        self.records_out = 0
+        self.bytes_in = 0
+
+    def add(self, records_in: int = 0, records_out: int = 0, bytes_in: int = 0) -> None:
+        self.records_in += records_in
+        self.records_out += records_out
+        self.bytes_in += bytes_in
+
+    def to_dict(self) -> dict:
+        records = self.records_in or self.records_out
+        return {
+            "name": self.name,
+            "calls": self.calls,
+            "seconds": round(self.seconds, 6),
+            "records_in": self.records_in,
+            "records_out": self.records_out,
+            "bytes_in": self.bytes_in,
+            "records_per_s": round(records / self.seconds, 1) if self.seconds > 0 else None,
+            "bytes_per_s": round(self.bytes_in / self.seconds, 1) if self.seconds > 0 and self.bytes_in else None,
+        }
+
+
+class _NullStage:
+    __slots__ = ()
+
+    def add(self, records_in: int = 0, records_out: int = 0, bytes_in: int = 0) -> None:
+        pass
+
+
+_NULL_STAGE = _NullStage()
+
+
+def peak_rss_mb() -> float:
+    """Peak resident set size of this process (ru_maxrss is KB on Linux, bytes on macOS)."""
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / (1024 * 1024) if sys.platform == "darwin" else rss / 1024
+
+
+def current_rss_mb() -> float:
+    """Current resident set size; falls back to the peak where /proc is unavailable."""
+    try:
+        with open("/proc/self/statm") as f:
+            pages = int(f.read().split()[1])
+        return pages * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except (OSError, ValueError, IndexError):
+        return peak_rss_mb()
+
+
+def deep_sizeof(obj: Any, sample: int = SIZEOF_SAMPLE) -> int:
+    """Approximate retained bytes of obj; containers larger than `sample` are extrapolated from their first items."""
+    seen = set()
+
+    def size(o: Any) -> int:
+        if id(o) in seen:
+            return 0
+        seen.add(id(o))
+        n = sys.getsizeof(o)
+        if o is None or isinstance(o, (str, bytes, int, float, bool)):
+            return n
+        if isinstance(o, dict):
+            items = list(islice(o.items(), sample))
+            inner = sum(size(k) + size(v) for k, v in items)
+            return n + (inner * len(o) // len(items) if items else 0)
+        if isinstance(o, (list, tuple, set, frozenset, deque)):
+            items = list(islice(o, sample))
+            inner = sum(size(x) for x in items)
+            return n + (inner * len(o) // len(items) if items else 0)
+        if hasattr(o, "__dict__"):
+            n += size(vars(o))
+        for slot in getattr(type(o), "__slots__", ()):
+            if hasattr(o, slot):
+                n += size(getattr(o, slot))
+        return n
+
+    return size(obj)
+
+
+class MemReport:
+    """tracemalloc snapshots at stage boundaries plus a background RSS sampler."""
+
+    # Filtered after grouping: Snapshot.filter_traces() is pure Python per trace and slower than the stage
+    _SKIP_FILES = (
+        __file__,
+        tracemalloc.__file__,
+        "<frozen importlib._bootstrap>",
+        "<frozen importlib._bootstrap_external>",
+        "<unknown>",
+    )
+
+    def __init__(self, top: int, current_stage: Callable[[], Optional[str]]):
+        self.top = top
+        self.current_stage = current_stage
+        self.tracked: Dict[str, Any] = {}
+        self.stages: List[dict] = []
+        self.rss_samples: List[tuple] = []
+        self.overhead_s = 0.0
+        self._starts: List[list] = []
+        self._t0 = time.perf_counter()
+        self._stop = threading.Event()
+        tracemalloc.start()
+        self._sampler = threading.Thread(target=self._sample_rss, name="rss-sampler", daemon=True)
+        self._sampler.start()
+
+    def _elapsed(self) -> float:
+        return round(time.perf_counter() - self._t0, 2)
+
+    def _sample_rss(self) -> None:
+        while not self._stop.wait(RSS_SAMPLE_SECONDS):
+            self.rss_samples.append((self._elapsed(), round(current_rss_mb(), 1), self.current_stage()))
+
+    def _structures(self) -> Dict[str, dict]:
+        out = {}
+        for name, obj in self.tracked.items():
+            try:
+                items = len(obj)
+            except TypeError:
+                items = None
+            out[name] = {"mb": round(deep_sizeof(obj) / (1024 * 1024), 2), "items": items}
+        return out
+
+    def start(self, name: str) -> None:
+        # reset_peak() is global, so fold the peak so far into every open scope first
+        traced, peak = tracemalloc.get_traced_memory()
+        for open_scope in self._starts:
+            open_scope[3] = max(open_scope[3], peak)
+        tracemalloc.reset_peak()
+        self._starts.append([tracemalloc.take_snapshot(), self._elapsed(), traced, 0])
+
+    def end(self, name: str) -> None:
+        traced, peak = tracemalloc.get_traced_memory()
+        before, started, traced_start, peak_before = self._starts.pop()
+        peak = max(peak, peak_before)
+        grew = [
+            d for d in tracemalloc.take_snapshot().compare_to(before, "lineno")
+            if d.size_diff > 0 and d.traceback[0].filename not in self._SKIP_FILES
+        ][: self.top]
+        rss_now = round(current_rss_mb(), 1)
+        window = [rss for t, rss, _ in self.rss_samples if t >= started] + [rss_now]
+        self.stages.append({
+            "stage": name,
+            "traced_mb": round(traced / (1024 * 1024), 2),
+            "stage_peak_mb": round(peak / (1024 * 1024), 2),
+            "transient_mb": round((peak - max(traced, traced_start)) / (1024 * 1024), 2),
+            "rss_mb": rss_now,
+            "max_rss_mb": max(window),
+            "structures": self._structures(),
+            "top_growth": [
+                {
+                    "site": f"{d.traceback[0].filename}:{d.traceback[0].lineno}",
+                    "size_diff_mb": round(d.size_diff / (1024 * 1024), 3),
+                    "count_diff": d.count_diff,
+                }
+                for d in grew
+            ],
+        })
+
+    def stop(self) -> None:
+        self._stop.set()
+        if tracemalloc.is_tracing():
+            tracemalloc.stop()
+
+    def to_dict(self) -> dict:
+        return {
+            "snapshot_overhead_s": round(self.overhead_s, 3),
+            "rss_sample_seconds": RSS_SAMPLE_SECONDS,
+            "stages": self.stages,
+            "rss_samples": self.rss_samples,
+        }
+
+    def print_report(self, out) -> None:
+        rss = [s[1] for s in self.rss_samples]
+        print(f"[mem] snapshot overhead {self.overhead_s:.2f}s, {len(rss)} RSS samples"
+              + (f", max {max(rss):.1f} MB" if rss else ""), file=out)
+        print(f"  {'stage':<24} {'traced MB':>10} {'peak MB':>9} {'transient':>10} {'RSS MB':>8} {'max RSS':>8}", file=out)
+        for s in self.stages:
+            print(f"  {s['stage']:<24} {s['traced_mb']:>10.1f} {s['stage_peak_mb']:>9.1f} {s['transient_mb']:>10.1f} "
+                  f"{s['rss_mb']:>8.1f} {s['max_rss_mb']:>8.1f}", file=out)
+        for s in self.stages:
+            if not s["structures"] and not s["top_growth"]:
+                continue
+            print(f"  after {s['stage']}:", file=out)
+            for name, st in s["structures"].items():
+                items = f" ({st['items']:,} items)" if st["items"] is not None else ""
+                print(f"    {name:<24} {st['mb']:>9.1f} MB{items}", file=out)
+            for d in s["top_growth"]:
+                print(f"    {d['size_diff_mb']:>+9.2f} MB {d['count_diff']:>+10,} blocks  {d['site']}", file=out)
+
+
+class StageProfiler:
+    """Exclusive per-stage timer; disabled instances do nothing."""
+
+    def __init__(
+        self,
+        script: str,
+        enabled: bool = False,
+        json_path: Optional[str] = None,
+        mem_report: bool = False,
+        mem_top: int = 10,
+    ):
+        self.script = script
+        self.enabled = enabled or bool(json_path) or mem_report
+        self.json_path = json_path
+        self.stages: Dict[str, Stage] = {}
+        self._stack: List[Stage] = []
+        self._mark = 0.0
+        self._started = time.perf_counter()
+        self._started_at = datetime.now(timezone.utc).isoformat()
+        self._reported = False
+        self.mem = MemReport(mem_top, self._current_stage) if mem_report else None
+        if self.enabled:
+            atexit.register(self.report)
+
+    @classmethod
+    def from_args(cls, args: argparse.Namespace, script: str) -> "StageProfiler":
+        return cls(script, enabled=args.profile, json_path=args.profile_json or None,
+                   mem_report=args.mem_report, mem_top=args.mem_top)
+
+    def _current_stage(self) -> Optional[str]:
+        stack = self._stack
+        return stack[-1].name if stack else None
+
+    def _get(self, name: str) -> Stage:
+        stage = self.stages.get(name)
+        if stage is None:
+            stage = self.stages[name] = Stage(name)
+        return stage
+
+    def _enter(self, stage: Stage) -> None:
+        now = time.perf_counter()
+        if self._stack:
+            self._stack[-1].seconds += now - self._mark
+        self._stack.append(stage)
+        self._mark = now
+
+    def _exit(self) -> None:
+        now = time.perf_counter()
+        self._stack.pop().seconds += now - self._mark
+        self._mark = now
+
+    def _untimed(self, hook: Callable[[str], None], name: str) -> None:
+        """Run a --mem-report hook without charging it to the enclosing stage."""
+        t = time.perf_counter()
+        hook(name)
+        spent = time.perf_counter() - t
+        self._mark += spent
+        self.mem.overhead_s += spent
+
+    @contextmanager
+    def stage(self, name: str):
+        """Time the block as stage `name`; yields the Stage for record counts."""
+        if not self.enabled:
+            yield _NULL_STAGE
+            return
+        stage = self._get(name)
+        stage.calls += 1
+        with self.mem_scope(name):
+            self._enter(stage)
+            try:
+                yield stage
+            finally:
+                self._exit()
+
+    @contextmanager
+    def mem_scope(self, name: str):
+        """--mem-report snapshots around the block without adding a timed stage."""
+        if self.mem is None:
+            yield
+            return
+        self._untimed(self.mem.start, name)
+        try:
+            yield
+        finally:
+            self._untimed(self.mem.end, name)
+
+    def iter(self, name: str, iterable: Iterable) -> Iterable:
+        """Charge the time spent producing each item to stage `name` (records_out += 1 per item)."""
+        if not self.enabled:
+            return iterable
+        return self._timed_iter(self._get(name), iter(iterable))
+
+    def _timed_iter(self, stage: Stage, it: Iterator) -> Iterator:
+        stage.calls += 1
+        while True:
+            self._enter(stage)
+            try:
+                item = next(it)
+            except StopIteration:
+                return
+            finally:
+                self._exit()
+            stage.records_out += 1
+            yield item
+
+    def add(self, name: str, records_in: int = 0, records_out: int = 0, bytes_in: int = 0) -> None:
+        """Count records/bytes for a stage without timing anything."""
+        if self.enabled:
+            self._get(name).add(records_in, records_out, bytes_in)
+
+    def track(self, name: str, obj: Any) -> None:
+        """Register a structure whose size --mem-report records after each stage."""
+        if self.mem is not None:
+            self.mem.tracked[name] = obj
+
+    def to_dict(self) -> dict:
+        data = {
+            "schema": "stage_profile_v1",
+            "script": self.script,
+            "argv": sys.argv[1:],
+            "started_at": self._started_at,
+            "python": sys.version.split()[0],
+            "total_seconds": round(time.perf_counter() - self._started, 6),
+            "peak_rss_mb": round(peak_rss_mb(), 1),
+            "stages": [s.to_dict() for s in self.stages.values()],
+        }
+        if self.mem is not None:
+            data["memory"] = self.mem.to_dict()
+        return data
+
+    def report(self) -> None:
+        """Print the stage table to stderr and write --profile-json (once)."""
+        if not self.enabled or self._reported:
+            return
+        self._reported = True
+        if self.mem is not None:
+            self.mem.stop()
+        data = self.to_dict()
+        total = data["total_seconds"]
+        out = sys.stderr
+        print(file=out)
+        print(f"[profile] {self.script}: total {total:.3f}s, peak RSS {data['peak_rss_mb']:.1f} MB", file=out)
+        print(f"  {'stage':<16} {'calls':>7} {'seconds':>9} {'share':>6} {'rec in':>10} {'rec out':>10} {'rec/s':>11} {'MB/s':>8}", file=out)
+        accounted = 0.0
+        for s in data["stages"]:
+            accounted += s["seconds"]
+            share = 100.0 * s["seconds"] / total if total > 0 else 0.0
+            rate = f"{s['records_per_s']:,.0f}" if s["records_per_s"] is not None else "-"
+            mbps = f"{s['bytes_per_s'] / 1e6:.1f}" if s["bytes_per_s"] is not None else "-"
+            print(f"  {s['name']:<16} {s['calls']:>7} {s['seconds']:>9.3f} {share:>5.1f}% "
+                  f"{s['records_in']:>10} {s['records_out']:>10} {rate:>11} {mbps:>8}", file=out)
+        if self.mem is not None:
+            accounted += self.mem.overhead_s
+            print(f"  {'(mem snapshots)':<16} {'':>7} {self.mem.overhead_s:>9.3f}", file=out)
+        print(f"  {'(unstaged)':<16} {'':>7} {max(0.0, total - accounted):>9.3f}", file=out)
+        if self.mem is not None:
+            self.mem.print_report(out)
+        if self.json_path:
+            with open(self.json_path, "w") as f:
+                json.dump(data, f, indent=2)
+            print(f"[profile] wrote {self.json_path}", file=out)
+
+
+def add_profile_args(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("--profile", action="store_true", help="Print per-stage timing, records/s and peak RSS at exit")
+    parser.add_argument("--profile-json", default="", help="Also write the stage profile as JSON to this path")
+    parser.add_argument("--mem-report", action="store_true", help="tracemalloc snapshots and RSS samples per stage (slow)")
+    parser.add_argument("--mem-top", type=int, default=10, help="Allocation sites listed per stage with --mem-report")
+
+
+def profiler_from_argv(argv: List[str], script: str) -> StageProfiler:
+    """For sys.argv-style scripts: remove the profile / mem-report flags from argv in place."""
+    enabled = False
+    json_path = None
+    mem_report = False
+    mem_top = 10
+    i = 1
+    while i < len(argv):
+        if argv[i] == "--profile":
+            enabled = True
+            del argv[i]
+        elif argv[i] == "--mem-report":
+            mem_report = True
+            del argv[i]
+        elif argv[i] == "--profile-json" and i + 1 < len(argv):
+            json_path = argv[i + 1]
+            del argv[i:i + 2]
+        elif argv[i] == "--mem-top" and i + 1 < len(argv):
+            mem_top = int(argv[i + 1])
+            del argv[i:i + 2]
+        else:
+            i += 1
+    return StageProfiler(script, enabled=enabled, json_path=json_path, mem_report=mem_report, mem_top=mem_top)
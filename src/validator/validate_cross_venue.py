@@ -16,12 +16,15 @@ Usage:
 """
 
 import json
+import os
 import sys
 from collections import defaultdict
 from typing import Dict, List, Optional, Tuple
 from dataclasses import dataclass
 import statistics
 
+from stage_profile import profiler_from_argv
+
 # Native DEX programs only
 NATIVE_DEXES = {
     "pAMMBay6oceH9fJKBRHGP5D4bD4sWpmSwMn52FMfXEA": "PumpSwap",
@@ -415,8 +418,9 @@ def analyze_data_quality(swaps: List[SwapData]) -> dict:
 
 
 def main():
+    prof = profiler_from_argv(sys.argv, "validate_cross_venue")
     if len(sys.argv) < 2:
-        print("Usage: python3 validate_cross_venue.py <ndjson_path>", file=sys.stderr)
+        print("Usage: python3 validate_cross_venue.py <ndjson_path> [--profile] [--profile-json PATH]", file=sys.stderr)
         sys.exit(1)
 
     path = sys.argv[1]
@@ -424,21 +428,32 @@ def main():
 
     swaps = []
     skipped = 0
-    for rec in load_ndjson(path):
-        s = parse_swap(rec)
-        if s:
-            swaps.append(s)
-        else:
-            skipped += 1
+    with prof.stage("parse") as st:
+        for rec in prof.iter("read", load_ndjson(path)):
+            s = parse_swap(rec)
+            if s:
+                swaps.append(s)
+            else:
+                skipped += 1
+        st.add(records_in=len(swaps) + skipped, records_out=len(swaps))
+    prof.add("read", bytes_in=os.path.getsize(path))
 
     print(f"Parsed {len(swaps)} native DEX swaps (skipped {skipped})", file=sys.stderr)
 
-    # Data quality check
-    quality = analyze_data_quality(swaps)
+    with prof.stage("analyze") as st:
+        # Data quality check
+        quality = analyze_data_quality(swaps)
+
+        # Find opportunities
+        same_slot = find_exact_same_slot_opportunities(swaps)
+        adjacent_slot = find_adjacent_slot_opportunities(swaps, max_slot_gap=1)
+        st.add(records_in=len(swaps), records_out=len(same_slot) + len(adjacent_slot))
+
+    with prof.stage("report"):
+        print_report(swaps, quality, same_slot, adjacent_slot)
+
 
-    # Find opportunities
-    same_slot = find_exact_same_slot_opportunities(swaps)
-    adjacent_slot = find_adjacent_slot_opportunities(swaps, max_slot_gap=1)
+def print_report(swaps: List[SwapData], quality: dict, same_slot: List[dict], adjacent_slot: List[dict]) -> None:
 
     print()
     print("=" * 80)
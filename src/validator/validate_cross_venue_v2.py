@@ -15,6 +15,7 @@ Usage:
 """
 
 import json
+import os
 import sys
 from collections import defaultdict
 from typing import Dict, List, Optional, Tuple
@@ -22,6 +23,8 @@ from dataclasses import dataclass, asdict
 from datetime import datetime
 import statistics
 
+from stage_profile import profiler_from_argv
+
 # Native DEX programs only
 NATIVE_DEXES = {
     "pAMMBay6oceH9fJKBRHGP5D4bD4sWpmSwMn52FMfXEA": "PumpSwap",
@@ -384,8 +387,9 @@ def analyze_quality(swaps: List[ParsedSwap]) -> dict:
 
 
 def main():
+    prof = profiler_from_argv(sys.argv, "validate_cross_venue_v2")
     if len(sys.argv) < 2:
-        print("Usage: python3 validate_cross_venue_v2.py <ndjson_path> [--json-out <path>]", file=sys.stderr)
+        print("Usage: python3 validate_cross_venue_v2.py <ndjson_path> [--json-out <path>] [--profile] [--profile-json PATH]", file=sys.stderr)
         sys.exit(1)
 
     path = sys.argv[1]
@@ -399,12 +403,15 @@ def main():
 
     swaps = []
     parse_errors = 0
-    for rec in load_ndjson(path):
-        s = parse_swap(rec)
-        if s:
-            swaps.append(s)
-        else:
-            parse_errors += 1
+    with prof.stage("parse") as st:
+        for rec in prof.iter("read", load_ndjson(path)):
+            s = parse_swap(rec)
+            if s:
+                swaps.append(s)
+            else:
+                parse_errors += 1
+        st.add(records_in=len(swaps) + parse_errors, records_out=len(swaps))
+    prof.add("read", bytes_in=os.path.getsize(path))
 
     print(f"Parsed {len(swaps)} valid swaps (filtered out {parse_errors})", file=sys.stderr)
 
@@ -413,8 +420,10 @@ def main():
         sys.exit(1)
 
     # Analyze
-    quality = analyze_quality(swaps)
-    opportunities = find_same_slot_opportunities(swaps)
+    with prof.stage("analyze") as st:
+        quality = analyze_quality(swaps)
+        opportunities = find_same_slot_opportunities(swaps)
+        st.add(records_in=len(swaps), records_out=len(opportunities))
 
     # Build results
     results = {
@@ -430,13 +439,17 @@ def main():
         },
     }
 
-    # Output
-    if json_out:
-        with open(json_out, "w") as f:
-            json.dump(results, f, indent=2)
-        print(f"\nResults written to: {json_out}", file=sys.stderr)
+    with prof.stage("report"):
+        # Output
+        if json_out:
+            with open(json_out, "w") as f:
+                json.dump(results, f, indent=2)
+            print(f"\nResults written to: {json_out}", file=sys.stderr)
+
+        print_report(quality, opportunities)
+
 
-    # Console output
+def print_report(quality: dict, opportunities: List[dict]) -> None:
     print()
     print("=" * 80)
     print("CROSS-VENUE VALIDATION REPORT v2")